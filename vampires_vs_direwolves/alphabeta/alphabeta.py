@@ -3,24 +3,36 @@ Inspired from http:aipython.org
 """
 
 from copy import copy
-from typing import Type
+from typing import List, Optional, Tuple, Type
+
+import numpy as np
 
 from alphabeta.abstract_heuristic import AbstractHeuristic
 from alphabeta.abstract_possible_moves_computer import \
     AbstractPossibleMovesComputer
+from battle_computer.battle_outcomes import get_outcome_distribution
 from common.logger import logger
-from common.models import Species
+from common.models import SPECIES_BY_VALUE, Species
 from game_management.abstract_game_map import AbstractGameMap
 from game_management.game_map import compute_new_board
 
 
 class AlphaBetaSearch:
+    """Alpha-beta search, battles being resolved with BattleComputer.compute_battle_for_minmax.
+
+    With `chance_nodes`, a move leading to a random battle is a chance node instead: its value is the expected
+    value of the boards after each winner (attacker, defender or nobody) with its expected number of survivors,
+    from the outcome distributions of battle_outcomes. Heuristic values must then be numbers.
+    The outcome table is built on its first use (about 100 MB): build it beforehand with
+    `python -m battle_computer.battle_outcomes` rather than during a timed game.
+    """
 
     def __init__(self, possible_moves_computer: Type[AbstractPossibleMovesComputer],
-                 heuristic: Type[AbstractHeuristic], depth: int):
+                 heuristic: Type[AbstractHeuristic], depth: int, chance_nodes: bool = False):
         self.move_computer = possible_moves_computer()
         self.heuristic = heuristic()
         self.max_depth = depth
+        self.chance_nodes = chance_nodes
         self.specie = None
         self.other_specie = None
 
@@ -44,6 +56,51 @@ class AlphaBetaSearch:
             f'ALPHABETA, explored nodes : {self.explored_nodes}, alpha {self.alpha_pruned}, beta {self.beta_pruned}')
         return [move], score, self.explored_nodes, self.alpha_pruned, self.beta_pruned
 
+    @staticmethod
+    def get_chance_outcomes(board: AbstractGameMap, move, species: Species
+                            ) -> Optional[List[Tuple[float, AbstractGameMap]]]:
+        """(probability, board) after each winner of the random battle of a move, most probable first
+        (None if the move leads to no random battle)
+        """
+        x0, y0, number, x1, y1 = move
+        defender_species, defender_number = board.get_cell_species_and_number((x1, y1))
+        if defender_species in (Species.NONE, species):
+            return None
+        distribution = get_outcome_distribution(species, number, defender_species, defender_number)
+        if len(distribution.probabilities) == 1:  # certain victory
+            return None
+        remaining = board.get_cell_species_count((x0, y0), species) - number
+        outcomes = []
+        for winner in {int(species), int(defender_species), int(Species.NONE)}:
+            is_winner = distribution.species == winner
+            probability = float(distribution.probabilities[is_winner].sum())
+            if probability <= 0:
+                continue
+            survivors = round(float(np.dot(distribution.probabilities[is_winner],
+                                           distribution.survivors[is_winner])) / probability)
+            outcome_board = board.copy()
+            outcome_board.update([species.to_cell((x0, y0), remaining),
+                                  SPECIES_BY_VALUE[winner].to_cell((x1, y1), survivors)])
+            outcomes.append((probability, outcome_board))
+        return sorted(outcomes, key=lambda outcome: -outcome[0])
+
+    def _search_child(self, board: AbstractGameMap, move, species: Species, is_max: bool, alpha, beta, depth):
+        """Child node of a move of species on board, with its value and path"""
+        outcomes = self.get_chance_outcomes(board, move, species) if self.chance_nodes else None
+        if outcomes is None:
+            child = {'board': compute_new_board(board, move), 'max': is_max, 'mv': move}
+            return (child, *self.minmax_alpha_beta(child, alpha, beta, depth))
+        # chance node: outcomes are searched without cutoffs, the child and the path are the ones of the most
+        # probable outcome
+        score, best_child, best_path = 0., None, None
+        for probability, outcome_board in outcomes:
+            child = {'board': outcome_board, 'max': is_max, 'mv': move}
+            outcome_score, path = self.minmax_alpha_beta(child, -1e6 - 1, 1e6 + 1, depth)
+            score += probability * outcome_score
+            if best_child is None:
+                best_child, best_path = child, path
+        return best_child, score, best_path
+
     def is_leaf(self, node, depth):
         over = node['board'].game_over()[0]
         return over or depth >= self.max_depth
@@ -63,14 +120,8 @@ class AlphaBetaSearch:
             moves = self.move_computer.compute(
                 node['board'], self.specie)
             for move in moves:
-                # create new node
-                child = {
-                    'board': compute_new_board(node['board'], move),
-                    'max': False,
-                    'mv': move
-                }
-                score, path = self.minmax_alpha_beta(
-                    child, alpha, beta, depth+1)
+                child, score, path = self._search_child(
+                    node['board'], move, self.specie, False, alpha, beta, depth+1)
                 if score >= beta:  # beta pruning
                     self.beta_pruned += 1
                     b = [child] + path
@@ -84,14 +135,8 @@ class AlphaBetaSearch:
             moves = self.move_computer.compute(
                 node['board'], self.other_specie)
             for move in moves:
-                # create new node
-                child = {
-                    'board': compute_new_board(node['board'], move),
-                    'max': True,
-                    'mv': move
-                }
-                score, path = self.minmax_alpha_beta(
-                    child, alpha, beta, depth+1)
+                child, score, path = self._search_child(
+                    node['board'], move, self.other_specie, True, alpha, beta, depth+1)
                 if score <= alpha:  # alpha pruning
                     self.alpha_pruned += 1
                     b = [child] + path
@@ -1,7 +1,5 @@
 from abc import ABC, abstractmethod
 
-import numpy as np
-
 from alphabeta.abstract_possible_moves_computer import \
     AbstractPossibleMovesComputer
 from common.models import Species
@@ -18,44 +16,27 @@ class DiagMoveComputer(AbstractPossibleMovesComputer):
         except SpeciesExtinctionException:
             return res
 
-        # add all diagonal moves
-        n, m = board.n, board.m
-
-        diag_moves = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1),
-                               ])
-        diag_moves += list(pos)
-        in_bound_d = (diag_moves[:, 0] >= 0) \
-            & (diag_moves[:, 0] < m) \
-            & (diag_moves[:, 1] >= 0) \
-            & (diag_moves[:, 1] < n)
-
-        for i in range(len(diag_moves)):
-            if in_bound_d[i]:
-                res.append((*pos, num, *diag_moves[i]))
+        # add all diagonal moves (None if outside of the board)
+        table = board.neighbour_table
+        diag_moves = table.diagonals[table.index(pos)]
+        for diag_move in diag_moves:
+            if diag_move is not None:
+                res.append((*pos, num, *diag_move))
 
         # add a straight move only if :
         #  - one of neighbours cells is occupied by greater number of units than us
         #  - it contains units but less than us
-        straight_moves = np.array([(0, -1), (1, 0), (0, 1), (-1, 0)])
-        straight_moves += list(pos)
-        straight_moves = straight_moves
-        in_bound_s = (straight_moves[:, 0] >= 0) \
-            & (straight_moves[:, 0] < m) \
-            & (straight_moves[:, 1] >= 0) \
-            & (straight_moves[:, 1] < n)
-
-        adj_moves = np.concatenate((diag_moves, [diag_moves[0]]))
-        for i in range(len(straight_moves)):
-            n0, n1, n2 = 0, 0, 0
-            if not in_bound_s[i]:
+        # straight move i is between diagonal moves i and i + 1
+        for i, straight_move in enumerate(table.straights[table.index(pos)]):
+            n0, n1 = 0, 0
+            if straight_move is None:
                 continue  # cell is outside of the board
-            if in_bound_d[i]:
-                n0 = board.get_cell_number(adj_moves[i])
-
-            if (i < 3 and in_bound_d[i+1]) or (i == 3 and in_bound_d[0]):
-                n1 = board.get_cell_number(adj_moves[i+1])
+            if diag_moves[i] is not None:
+                n0 = board.get_cell_number(diag_moves[i])
+            if diag_moves[(i + 1) % 4] is not None:
+                n1 = board.get_cell_number(diag_moves[(i + 1) % 4])
 
-            n2 = board.get_cell_number(straight_moves[i])
+            n2 = board.get_cell_number(straight_move)
             if (n0 > num) or (n1 > num) or (n2 <= num):
-                res.append((*pos, num, *straight_moves[i]))
+                res.append((*pos, num, *straight_move))
         return res
@@ -1,29 +1,107 @@
-from typing import List, Type
+from functools import total_ordering
+from numbers import Real
+from typing import Callable, List, Type
 
 from common.models import Species
 from game_management.game_map import GameMap
 from alphabeta.abstract_heuristic import AbstractHeuristic
+from alphabeta.simple_heuristics import ExpectationHeuristic, SpeciesRatioHeuristic
+
+
+@total_ordering
+class LexicographicScore:
+    """Score made of several heuristic values, compared in lexicographic order.
+
+    Values are computed lazily: a lower-priority heuristic is only evaluated when all the previous ones are equal,
+    so most comparisons made by alpha-beta only pay for the first heuristic.
+    A plain number x (e.g. alpha/beta bounds) is the one-value score (x,), ordered as tuples are:
+    a score is equal to x only if it has one value equal to x, and greater than x if it starts with x and has
+    other values (the other values are never evaluated).
+    """
+    __slots__ = ("_evaluators", "_values")
+
+    def __init__(self, evaluators: List[Callable[[], float]]):
+        self._evaluators = evaluators
+        self._values = []
+
+    def __len__(self):
+        return len(self._evaluators)
+
+    def __getitem__(self, index: int) -> float:
+        while len(self._values) <= index:
+            self._values.append(self._evaluators[len(self._values)]())
+        return self._values[index]
+
+    @property
+    def values(self) -> tuple:
+        """Fully evaluated tuple of heuristic values"""
+        return tuple(self[i] for i in range(len(self)))
+
+    def _compare(self, other) -> int:
+        if not isinstance(other, LexicographicScore):
+            return self._compare_values(self[0], other) or int(len(self) > 1)
+        for i in range(min(len(self), len(other))):
+            result = self._compare_values(self[i], other[i])
+            if result:
+                return result
+        return self._compare_values(len(self), len(other))
+
+    @staticmethod
+    def _compare_values(value, other_value) -> int:
+        if value == other_value:
+            return 0
+        return 1 if value > other_value else -1
+
+    def __eq__(self, other):
+        if not isinstance(other, (LexicographicScore, Real)):
+            return NotImplemented
+        return self._compare(other) == 0
+
+    def __lt__(self, other):
+        if not isinstance(other, (LexicographicScore, Real)):
+            return NotImplemented
+        return self._compare(other) < 0
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LexicographicScore({', '.join(str(value) for value in self._values)}" \
+               f"{', ...' if len(self._values) < len(self) else ''})"
 
 
 class HeuristicGroup(AbstractHeuristic):
 
-    def __init__(self, heuristics: List[Type[AbstractHeuristic]], weight=1000):
+    def __init__(self, heuristics: List[Type[AbstractHeuristic]], weight=1000, lazy=False):
         """
 
         :param heuristics: ordered list of heuristic classes
         :param weight: relative weight of the order in the list:
         1 for each heuristic has the same weight,
         1000 for the heuristic has a weight proportional to 1000 times power its opposite order (len - order)
+        :param lazy: if True, `evaluate` returns a LexicographicScore (weight is ignored): heuristics are evaluated
+        in priority order and only when needed by a comparison
         """
         super().__init__()
         self._heuristics = heuristics
+        self._instances = [heuristic() for heuristic in heuristics]
         self._weight = weight
+        self._lazy = lazy
 
     def evaluate(self, game_map: GameMap, specie: Species):
         """ Evaluate the current map and return a number to score if it's in favour of the specie
         """
+        if self._lazy:
+            return LexicographicScore([lambda heuristic=heuristic: heuristic.evaluate(game_map, specie)
+                                       for heuristic in self._instances])
         heuristic_result = 0
-        for i, heuristic in enumerate(self._heuristics):
-            coef = self._weight ** (len(self._heuristics) - i) or 1
-            heuristic_result += coef * heuristic().evaluate(game_map, specie)
+        for i, heuristic in enumerate(self._instances):
+            coef = self._weight ** (len(self._instances) - i) or 1
+            heuristic_result += coef * heuristic.evaluate(game_map, specie)
         return heuristic_result
+
+
+class RatioThenExpectationHeuristic(HeuristicGroup):
+    """Species ratio, ties broken by ExpectationHeuristic (only evaluated for the ties)"""
+
+    def __init__(self):
+        super().__init__([SpeciesRatioHeuristic, ExpectationHeuristic], lazy=True)
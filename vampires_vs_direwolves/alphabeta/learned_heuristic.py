@@ -0,0 +1,179 @@
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from alphabeta.abstract_heuristic import AbstractHeuristic
+from common.logger import logger
+from common.models import Species
+from game_management.abstract_game_map import AbstractGameMap
+from game_management.game_map import GameMap
+
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "weights", "learned_heuristic.npz")
+
+FEATURE_NAMES = ("number", "humans_attraction", "number_times_opponent_distance", "groups")
+# Default linear weights: same trade-off as NumberAndDistanceHeuristic (number, distance to humans, opponent distance)
+DEFAULT_LAYERS = [(np.array([[10.], [0.1], [-0.001], [0.]]), np.zeros(1))]
+
+_loaded_layers: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+
+
+def distance_to_nearest(masks: np.ndarray) -> np.ndarray:
+    """Chebyshev distance from each cell to the nearest True cell, for a batch of boolean masks (B, n, m).
+
+    Computed with successive 3x3 dilations over the whole batch. Cells of boards without any True cell get np.inf.
+    """
+    batch_size, n, m = masks.shape
+    distances = np.full(masks.shape, np.inf)
+    distances[masks] = 0
+    reached = masks.copy()
+    padded = np.zeros((batch_size, n + 2, m + 2), dtype=bool)
+    for distance in range(1, max(n, m)):
+        padded[:, 1:-1, 1:-1] = reached
+        dilated = reached.copy()
+        for shift_y in range(3):
+            for shift_x in range(3):
+                dilated |= padded[:, shift_y:shift_y + n, shift_x:shift_x + m]
+        new_cells = dilated & ~reached
+        if not new_cells.any():
+            break
+        distances[new_cells] = distance
+        reached = dilated
+    return distances
+
+
+def _humans_attraction(human_maps: np.ndarray, totals: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    """Sum of (number of humans / distance) over the human houses that the species can convert"""
+    convertible = (human_maps > 0) & (human_maps <= totals[:, None, None])
+    return np.where(convertible, human_maps / np.maximum(distances, 1), 0).sum(axis=(1, 2))
+
+
+def extract_features(human_maps: np.ndarray, own_maps: np.ndarray, opponent_maps: np.ndarray) -> np.ndarray:
+    """Features of a batch of boards (arrays of shape (B, n, m)), from the point of view of the `own` species.
+
+    :return: array of shape (B, len(FEATURE_NAMES))
+    """
+    own_totals = own_maps.sum(axis=(1, 2))
+    opponent_totals = opponent_maps.sum(axis=(1, 2))
+    own_distances = distance_to_nearest(own_maps > 0)
+    opponent_distances = distance_to_nearest(opponent_maps > 0)
+
+    number = own_totals - opponent_totals
+    attraction = _humans_attraction(human_maps, own_totals, own_distances) \
+        - _humans_attraction(human_maps, opponent_totals, opponent_distances)
+    opponent_distance = np.where(own_maps > 0, opponent_distances, np.inf).min(axis=(1, 2))
+    opponent_distance[np.isinf(opponent_distance)] = 0
+    groups = np.count_nonzero(own_maps, axis=(1, 2)) - np.count_nonzero(opponent_maps, axis=(1, 2))
+    return np.stack([number, attraction, number * opponent_distance, groups], axis=1).astype(float)
+
+
+def _get_groups(game_map: AbstractGameMap, species: Species) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions (k, 2) and numbers (k,) of the groups of a species"""
+    groups = game_map.find_species_position_and_number(species)
+    positions = np.array([position for position, _number in groups], dtype=float).reshape(-1, 2)
+    return positions, np.array([number for _position, number in groups], dtype=float)
+
+
+def _distances_to_groups(positions: np.ndarray, group_positions: np.ndarray) -> np.ndarray:
+    """Chebyshev distance from each position to the nearest group (np.inf without groups)"""
+    if not len(group_positions):
+        return np.full(len(positions), np.inf)
+    return np.abs(positions[:, None, :] - group_positions[None, :, :]).max(axis=2).min(axis=1)
+
+
+def extract_board_features(game_map: AbstractGameMap, own_species: Species, opponent_species: Species
+                           ) -> np.ndarray:
+    """Same features as extract_features for one board, computed from its groups instead of dense planes:
+    the cost depends on the number of groups, not on the size of the board (single leaf evaluations).
+
+    :return: array of shape (len(FEATURE_NAMES),)
+    """
+    human_positions, human_numbers = _get_groups(game_map, Species.HUMAN)
+    own_positions, own_numbers = _get_groups(game_map, own_species)
+    opponent_positions, opponent_numbers = _get_groups(game_map, opponent_species)
+    own_total, opponent_total = own_numbers.sum(), opponent_numbers.sum()
+
+    def humans_attraction(total, group_positions):
+        convertible = human_numbers <= total
+        distances = _distances_to_groups(human_positions[convertible], group_positions)
+        return (human_numbers[convertible] / np.maximum(distances, 1)).sum()
+
+    attraction = humans_attraction(own_total, own_positions) - humans_attraction(opponent_total, opponent_positions)
+    opponent_distance = _distances_to_groups(own_positions, opponent_positions).min(initial=np.inf)
+    opponent_distance = 0 if np.isinf(opponent_distance) else opponent_distance
+    number = own_total - opponent_total
+    return np.array([number, attraction, number * opponent_distance, len(own_numbers) - len(opponent_numbers)],
+                    dtype=float)
+
+
+def predict(layers: Sequence[Tuple[np.ndarray, np.ndarray]], features: np.ndarray) -> np.ndarray:
+    """Forward pass of a small MLP (ReLU between layers, linear output); a single layer is a linear model"""
+    output = features
+    for i, (weights, bias) in enumerate(layers):
+        output = output @ weights + bias
+        if i + 1 < len(layers):
+            output = np.maximum(output, 0)
+    return output[:, 0]
+
+
+def save_weights(path: str, layers: Sequence[Tuple[np.ndarray, np.ndarray]]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    arrays = {}
+    for i, (weights, bias) in enumerate(layers):
+        arrays[f"W{i}"] = weights
+        arrays[f"b{i}"] = bias
+    np.savez(path, **arrays)
+    _loaded_layers.pop(path, None)
+
+
+def load_weights(path: str = WEIGHTS_PATH) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Load the layers saved by save_weights, once per path. Default weights are used if the file is missing."""
+    if path not in _loaded_layers:
+        if os.path.isfile(path):
+            with np.load(path) as arrays:
+                _loaded_layers[path] = [(arrays[f"W{i}"], arrays[f"b{i}"]) for i in range(len(arrays.files) // 2)]
+            logger.info(f"Learned heuristic weights loaded from {path}")
+        else:
+            logger.info(f"No learned heuristic weights found at {path}: default weights are used")
+            _loaded_layers[path] = DEFAULT_LAYERS
+    return _loaded_layers[path]
+
+
+class LearnedHeuristic(AbstractHeuristic):
+    """Heuristic given by a small model (linear or MLP) over hand-crafted features, trained on self-play records.
+
+    Train it with `python -m alphabeta.train_learned_heuristic RECORDS_DIR`.
+    """
+
+    def __init__(self, weights_path: str = WEIGHTS_PATH):
+        super().__init__()
+        self._layers = load_weights(weights_path)
+
+    def evaluate_arrays(self, human_maps: np.ndarray, vampire_maps: np.ndarray, werewolf_maps: np.ndarray,
+                        specie: Species) -> np.ndarray:
+        """Evaluate a batch of boards given as arrays of shape (B, n, m)"""
+        if specie is Species.VAMPIRE:
+            own_maps, opponent_maps = vampire_maps, werewolf_maps
+        else:
+            own_maps, opponent_maps = werewolf_maps, vampire_maps
+        scores = predict(self._layers, extract_features(human_maps, own_maps, opponent_maps))
+        # same values as NumberAndDistanceHeuristic when a species is extinct, and as evaluate when both are
+        scores[~opponent_maps.any(axis=(1, 2))] = 1e6
+        scores[~own_maps.any(axis=(1, 2))] = -1e6
+        return scores
+
+    def evaluate_many(self, game_maps: Sequence[GameMap], specie: Species) -> np.ndarray:
+        """Evaluate a batch of boards of the same size"""
+        return self.evaluate_arrays(np.stack([game_map.human_map for game_map in game_maps]),
+                                    np.stack([game_map.vampire_map for game_map in game_maps]),
+                                    np.stack([game_map.werewolf_map for game_map in game_maps]),
+                                    specie)
+
+    def evaluate(self, game_map: AbstractGameMap, specie: Species):
+        """Evaluate one board from its groups (see extract_board_features), without building dense planes"""
+        opponent = Species.get_opposite_species(specie)
+        if not game_map.count_species(specie):
+            return -1e6
+        if not game_map.count_species(opponent):
+            return 1e6
+        return float(predict(self._layers, extract_board_features(game_map, specie, opponent)[None, :])[0])
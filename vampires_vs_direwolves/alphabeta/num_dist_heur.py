@@ -2,16 +2,18 @@ import numpy as np
 
 from alphabeta.abstract_heuristic import AbstractHeuristic
 from common.models import Species
+from game_management import kernels
 from game_management.game_map import GameMap
 from game_management.map_helpers import *
 
 
 class NumberAndDistanceHeuristic(AbstractHeuristic):
 
-    def __init__(self):
+    def __init__(self, num_factor=10, dist_factor=0.1, opponent_distance_factor=0.001):
         super().__init__()
-        self._num_factor = 10
-        self._dist_factor = 0.1
+        self._num_factor = num_factor
+        self._dist_factor = dist_factor
+        self._opponent_distance_factor = opponent_distance_factor
 
     def evaluate(self, game_map: GameMap, specie: Species):
 
@@ -30,6 +32,20 @@ class NumberAndDistanceHeuristic(AbstractHeuristic):
         except StopIteration:
             return 1e6 if specie == Species.VAMPIRE else -1e6
 
+        if kernels.NUMBA_AVAILABLE:
+            dist_v = kernels.humans_attraction(game_map.human_map, *pos_vamp, nb_vamp)
+            dist_w = kernels.humans_attraction(game_map.human_map, *pos_wolv, nb_wolves)
+        else:
+            dist_v, dist_w = self._humans_attractions(game_map, pos_vamp, nb_vamp, pos_wolv, nb_wolves)
+        #print('dist v', dist_v, 'dist w', dist_w)
+        res = (nb_vamp - nb_wolves) * self._num_factor \
+            + (dist_v - dist_w) * self._dist_factor - self._opponent_distance_factor * \
+            get_direct_distance(pos_vamp, pos_wolv) * (nb_vamp - nb_wolves)
+
+        return res if specie == Species.VAMPIRE else -res
+
+    @staticmethod
+    def _humans_attractions(game_map: GameMap, pos_vamp, nb_vamp, pos_wolv, nb_wolves):
         dist_vamp_to_humans = get_distances_to_a_species(pos_vamp, game_map)
         dist_v = 0
         for key in dist_vamp_to_humans:
@@ -48,9 +64,4 @@ class NumberAndDistanceHeuristic(AbstractHeuristic):
             if game_map.get_cell_species_count(key, Species.HUMAN) <= nb_wolves:
                 dist_w += game_map.get_cell_species_count(key, Species.HUMAN) / \
                     dist_wolv_to_humans[key][1]
-        #print('dist v', dist_v, 'dist w', dist_w)
-        res = (nb_vamp - nb_wolves) * self._num_factor \
-            + (dist_v - dist_w) * self._dist_factor - 0.001 * \
-            get_direct_distance(pos_vamp, pos_wolv) * (nb_vamp - nb_wolves)
-
-        return res if specie == Species.VAMPIRE else -res
+        return dist_v, dist_w
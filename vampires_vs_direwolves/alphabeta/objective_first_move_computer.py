@@ -1,7 +1,5 @@
 from abc import ABC, abstractmethod
 
-import numpy as np
-
 from alphabeta.abstract_possible_moves_computer import \
     AbstractPossibleMovesComputer
 from common.models import Species
@@ -16,20 +14,12 @@ class ObjectiveFirstMoveComputer(AbstractPossibleMovesComputer):
             pos, num = get_first_species_position_and_number(board, specie)
         except SpeciesExtinctionException:
             return []
-        n, m = board.n, board.m
-
-        moves = np.array([(-1, -1), (-1, 0), (-1, 1), (0, -1),
-                          (0, 1), (1, -1), (1, 0), (1, 1)])
-
-        moves += list(pos)
-
-        moves = moves[(moves[:, 0] >= 0) & (moves[:, 0] < m) &
-                      (moves[:, 1] >= 0) & (moves[:, 1] < n)]
+        table = board.neighbour_table
 
         mid = []
         last = []
         first = []
-        for new_pos in moves:
+        for new_pos in table.moves[table.index(pos)]:
             n = board.get_cell_number(new_pos)
             if (n > 0) and (n <= num):
                 first.append((*pos, num, *new_pos))
@@ -3,13 +3,14 @@ from common.models import Species
 from game_management.abstract_game_map import AbstractGameMap
 from alphabeta.abstract_heuristic import AbstractHeuristic
 from game_management.map_helpers import get_distances_between_two_species
+from game_management.territory import compute_territory
 
 
 class SpeciesRatioHeuristic(AbstractHeuristic):
     """nombre de l'espèce / nombre de l'espèce ennemie"""
     def evaluate(self, game_map: AbstractGameMap, specie: Species):
         heuristic = game_map.count_species(specie) / game_map.count_species(Species.get_opposite_species(specie))
-        logger.debug(f"Heuristic SpeciesRatioHeuristic: {heuristic}")
+        logger.debug("Heuristic SpeciesRatioHeuristic: %s", heuristic)
         return heuristic
 
 
@@ -22,6 +23,18 @@ class ExpectationHeuristic(AbstractHeuristic):
         ratios = [nb_humans_to_convert / distance for _pos, distance, nb_humans_to_convert in distances.values()]
 
         heuristic = sum(ratios) / enemies_nb
-        logger.debug(f"Heuristic ExpectationHeuristic: {heuristic}\nRatios: {ratios}")
+        logger.debug("Heuristic ExpectationHeuristic: %s\nRatios: %s", heuristic, ratios)
         return heuristic
 
+
+class TerritoryHeuristic(AbstractHeuristic):
+    """(nombre de l'espèce + humains de son territoire) - (même chose pour l'espèce ennemie)
+    Le territoire d'une espèce est l'ensemble des cases qu'elle atteint avant l'ennemi (cases à égalité exclues)"""
+    def evaluate(self, game_map: AbstractGameMap, specie: Species):
+        enemy_specie = Species.get_opposite_species(specie)
+        labels = compute_territory(game_map, specie, enemy_specie).labels
+        human_map = game_map.human_map
+        heuristic = (game_map.count_species(specie) + int(human_map[labels == specie].sum())
+                     - game_map.count_species(enemy_specie) - int(human_map[labels == enemy_specie].sum()))
+        logger.debug("Heuristic TerritoryHeuristic: %s", heuristic)
+        return heuristic
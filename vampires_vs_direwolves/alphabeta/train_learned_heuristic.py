@@ -0,0 +1,97 @@
+"""
+Fit the LearnedHeuristic weights from self-play records (see game_management.game_records)
+
+Example:
+    python -m alphabeta.train_learned_heuristic records/ --hidden 16
+"""
+import argparse
+from typing import List, Tuple
+
+import numpy as np
+
+from alphabeta.learned_heuristic import WEIGHTS_PATH, extract_features, predict, save_weights
+from common.logger import logger
+from common.models import Species
+from game_management.game_records import load_game_records
+
+
+def build_dataset(records: List[Tuple[np.ndarray, np.ndarray, np.ndarray, Species]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Features and targets of all recorded boards, from the point of view of both species.
+
+    Target is 1 if the species won the game, -1 if it lost and 0 if there is no winner.
+    Boards where a species is extinct are skipped (the heuristic handles them without the model).
+    """
+    features, targets = [], []
+    for human_maps, vampire_maps, werewolf_maps, winner in records:
+        alive = vampire_maps.any(axis=(1, 2)) & werewolf_maps.any(axis=(1, 2))
+        human_maps, vampire_maps, werewolf_maps = human_maps[alive], vampire_maps[alive], werewolf_maps[alive]
+        human_maps, vampire_maps, werewolf_maps = (maps.astype(int) for maps in (human_maps, vampire_maps,
+                                                                                  werewolf_maps))
+        outcome = {Species.VAMPIRE: 1., Species.WEREWOLF: -1.}.get(winner, 0.)
+        features.append(extract_features(human_maps, vampire_maps, werewolf_maps))
+        targets.append(np.full(len(human_maps), outcome))
+        features.append(extract_features(human_maps, werewolf_maps, vampire_maps))
+        targets.append(np.full(len(human_maps), -outcome))
+    return np.concatenate(features), np.concatenate(targets)
+
+
+def fit_linear(features: np.ndarray, targets: np.ndarray, l2: float = 1e-3) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Ridge regression, returned as a single layer"""
+    inputs = np.hstack([features, np.ones((len(features), 1))])
+    regularization = l2 * np.eye(inputs.shape[1])
+    regularization[-1, -1] = 0  # bias is not regularized
+    solution = np.linalg.solve(inputs.T @ inputs + regularization, inputs.T @ targets)
+    return [(solution[:-1, None], solution[-1:])]
+
+
+def fit_mlp(features: np.ndarray, targets: np.ndarray, hidden: int = 16, epochs: int = 2000,
+            learning_rate: float = 1e-2, seed: int = 0) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """One hidden layer MLP trained with full-batch Adam on the mean squared error"""
+    rng = np.random.default_rng(seed)
+    mean, std = features.mean(axis=0), features.std(axis=0) + 1e-9
+    inputs = (features - mean) / std
+    params = [rng.normal(0, np.sqrt(2 / inputs.shape[1]), (inputs.shape[1], hidden)), np.zeros(hidden),
+              rng.normal(0, np.sqrt(1 / hidden), (hidden, 1)), np.zeros(1)]
+    moments = [np.zeros_like(param) for param in params]
+    velocities = [np.zeros_like(param) for param in params]
+    for epoch in range(1, epochs + 1):
+        pre_activation = inputs @ params[0] + params[1]
+        activation = np.maximum(pre_activation, 0)
+        error = (activation @ params[2] + params[3])[:, 0] - targets
+        grad_output = 2 * error[:, None] / len(targets)
+        grad_hidden = (grad_output @ params[2].T) * (pre_activation > 0)
+        grads = [inputs.T @ grad_hidden, grad_hidden.sum(axis=0), activation.T @ grad_output, grad_output.sum(axis=0)]
+        for i, grad in enumerate(grads):
+            moments[i] = 0.9 * moments[i] + 0.1 * grad
+            velocities[i] = 0.999 * velocities[i] + 0.001 * grad ** 2
+            params[i] -= learning_rate * (moments[i] / (1 - 0.9 ** epoch)) \
+                / (np.sqrt(velocities[i] / (1 - 0.999 ** epoch)) + 1e-8)
+        if not epoch % 500:
+            logger.info(f"Epoch {epoch}: mse={np.mean(error ** 2):.4f}")
+    # normalization is folded into the first layer, so that the model applies to raw features
+    first_weights = params[0] / std[:, None]
+    first_bias = params[1] - (mean / std) @ params[0]
+    return [(first_weights, first_bias), (params[2], params[3])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("records_dir", help="directory of self-play records (.npz)")
+    parser.add_argument("--output", default=WEIGHTS_PATH, help="weights file to write")
+    parser.add_argument("--hidden", type=int, default=0, help="hidden layer size (0 for a linear model)")
+    parser.add_argument("--epochs", type=int, default=2000)
+    args = parser.parse_args()
+
+    features, targets = build_dataset(load_game_records(args.records_dir))
+    logger.info(f"Training set: {len(targets)} boards")
+    if args.hidden:
+        layers = fit_mlp(features, targets, hidden=args.hidden, epochs=args.epochs)
+    else:
+        layers = fit_linear(features, targets)
+    logger.info(f"Training mse: {np.mean((predict(layers, features) - targets) ** 2):.4f}")
+    save_weights(args.output, layers)
+    logger.info(f"Weights saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,157 @@
 # -*- coding: utf-8 -*-
-from typing import Tuple
+import math
+from typing import NamedTuple, Tuple
 
 import numpy as np
-from scipy.stats import binom
 
 from common.exceptions import InvalidBattleException
-from common.models import Species
+from common.models import SPECIES_BY_VALUE, Species
+
+# Precomputed battle tables, for the hot paths of the AIs (BattleComputer objects are too slow to create in searches).
+# Indexed by [defender class, attacker count, defender count], for counts up to MAX_COUNT (the population of a map).
+# The attacker is a vampire or a werewolf: both behave the same, only the defender class matters.
+MAX_COUNT = 255
+HUMAN_DEFENDER, ENEMY_DEFENDER = 0, 1  # defender classes
+
+_HUMAN, _NONE = int(Species.HUMAN), int(Species.NONE)
+
+
+def get_probability_planes(max_count: int = MAX_COUNT) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Arrays indexed by [defender class, attacker count, defender count], in float64:
+    (defender is human, battle is random, probability that the attacker wins), as computed by BattleComputer
+    """
+    counts = np.arange(max_count + 1, dtype=float)
+    attacker_counts, defender_counts = counts[None, :, None], counts[None, None, :]
+    is_human = np.array([True, False])[:, None, None]  # HUMAN_DEFENDER, ENEMY_DEFENDER
+    is_random = np.where(is_human, attacker_counts < defender_counts, attacker_counts < 1.5 * defender_counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        proba = np.where(~is_random, 1.,
+                         np.where(attacker_counts == defender_counts, 0.5,
+                                  np.where(attacker_counts < defender_counts,
+                                           0.5 * attacker_counts / defender_counts,
+                                           attacker_counts / defender_counts - 0.5)))
+    return np.broadcast_to(is_human, proba.shape), is_random, proba
+
+
+def _build_tables():
+    counts = np.arange(MAX_COUNT + 1, dtype=float)
+    attacker_counts, defender_counts = counts[None, :, None], counts[None, None, :]
+    is_human, is_random, proba = get_probability_planes()
+    attacker_expectation = proba * np.where(is_human, attacker_counts + defender_counts, attacker_counts)
+    defender_expectation = (1 - proba) * defender_counts
+    minmax_attacker_wins = np.where(is_human, ~is_random, proba >= 0.6)
+    minmax_survivors = np.where(minmax_attacker_wins, attacker_expectation, defender_expectation).astype(int)
+    return (proba.astype(np.float32), attacker_expectation.astype(np.float32),
+            defender_expectation.astype(np.float32), minmax_attacker_wins.astype(np.uint8),
+            minmax_survivors.astype(np.uint16))  # up to 2 * MAX_COUNT survivors for humans
+
+
+# probability that the attacker wins, expected survivors in case of victory of each side (see get_esperance),
+# and result of compute_battle_for_minmax (1 if the attacker wins, number of survivors)
+(PROBA_ATTACKER_WINS, ATTACKER_EXPECTATION, DEFENDER_EXPECTATION,
+ MINMAX_ATTACKER_WINS, MINMAX_SURVIVORS) = _build_tables()
+
+
+def _get_defender_class(defender_species: Species) -> int:
+    return HUMAN_DEFENDER if defender_species == _HUMAN else ENEMY_DEFENDER
+
+
+def get_proba_attacker_wins(attacker_species: Species, attacker_count: int, defender_species: Species,
+                            defender_count: int) -> float:
+    """Same as BattleComputer.proba_attacker_wins (in float32 precision)"""
+    if defender_species == _NONE or defender_species == attacker_species:
+        return 1.
+    return float(PROBA_ATTACKER_WINS[_get_defender_class(defender_species), attacker_count, defender_count])
+
+
+def is_certain_victory(attacker_species: Species, attacker_count: int, defender_species: Species,
+                       defender_count: int) -> bool:
+    return get_proba_attacker_wins(attacker_species, attacker_count, defender_species, defender_count) == 1
+
+
+def get_esperance(attacker_species: Species, attacker_count: int, defender_species: Species,
+                  defender_count: int) -> Tuple[float, float]:
+    """Expected survivors in case of victory of the attacker and of the defender, as BattleComputer.get_esperance"""
+    if defender_species == _NONE or defender_species == attacker_species:
+        return attacker_count, defender_count
+    defender_class = _get_defender_class(defender_species)
+    return (float(ATTACKER_EXPECTATION[defender_class, attacker_count, defender_count]),
+            float(DEFENDER_EXPECTATION[defender_class, attacker_count, defender_count]))
+
+
+def compute_battle_for_minmax(attacker_species: Species, attacker_count: int, defender_species: Species,
+                              defender_count: int) -> Tuple[Species, int]:
+    """Same as BattleComputer.compute_battle_for_minmax, fusions and empty cells included"""
+    if defender_species == _NONE or defender_species == attacker_species:
+        return SPECIES_BY_VALUE[attacker_species], attacker_count + defender_count
+    defender_class = _get_defender_class(defender_species)
+    if MINMAX_ATTACKER_WINS[defender_class, attacker_count, defender_count]:
+        return SPECIES_BY_VALUE[attacker_species], int(MINMAX_SURVIVORS[defender_class, attacker_count, defender_count])
+    return SPECIES_BY_VALUE[defender_species], int(MINMAX_SURVIVORS[defender_class, attacker_count, defender_count])
+
+
+class OutcomeDistribution(NamedTuple):
+    """All the possible results of a battle (same order as BattleComputer.get_all_probabilities)"""
+    species: np.ndarray  # species value of the cell after the battle
+    survivors: np.ndarray  # number of persons in the cell after the battle
+    probabilities: np.ndarray
+
+
+_LOG_FACTORIALS = np.array([math.lgamma(n + 1) for n in range(2 * MAX_COUNT + 2)])
+
+
+def binomial_pmf(n, p, k) -> np.ndarray:
+    """Vectorized probability mass function of the binomial law B(n, p) at k, for n up to 2 * MAX_COUNT + 1"""
+    n, p, k = np.asarray(n), np.asarray(p, dtype=float), np.asarray(k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_pmf = (_LOG_FACTORIALS[n] - _LOG_FACTORIALS[k] - _LOG_FACTORIALS[n - k]
+                   + np.where(k > 0, k * np.log(p), 0.) + np.where(n > k, (n - k) * np.log1p(-p), 0.))
+    return np.exp(log_pmf)
+
+
+def compute_outcome_pmfs(attacker_count: int, defender_species: Species, defender_count: int,
+                         proba_attacker_wins: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Outcomes of a random battle, as two weighted binomial laws:
+    - attacker_pmf[k]: probability that the attacker wins with k survivors (converted humans included)
+    - defender_pmf[k]: probability that the defender wins with k survivors
+    Both k = 0 entries are probabilities that nobody survives.
+    """
+    nb_attacker_trials = attacker_count + defender_count if defender_species == _HUMAN else attacker_count
+    attacker_pmf = proba_attacker_wins * binomial_pmf(nb_attacker_trials, proba_attacker_wins,
+                                                      np.arange(nb_attacker_trials + 1))
+    defender_pmf = (1 - proba_attacker_wins) * binomial_pmf(defender_count, 1 - proba_attacker_wins,
+                                                            np.arange(defender_count + 1))
+    return attacker_pmf, defender_pmf
+
+
+def get_distribution_from_pmfs(attacker_species: Species, defender_species: Species, attacker_pmf: np.ndarray,
+                               defender_pmf: np.ndarray) -> OutcomeDistribution:
+    """Distribution of a random battle from the pmfs of compute_outcome_pmfs"""
+    species = np.empty(len(attacker_pmf) + len(defender_pmf) - 1, dtype=np.int8)
+    species[:len(attacker_pmf) - 1] = attacker_species
+    species[len(attacker_pmf) - 1:-1] = defender_species
+    species[-1] = _NONE
+    survivors = np.concatenate((np.arange(1, len(attacker_pmf)), np.arange(1, len(defender_pmf)), [0]))
+    probabilities = np.concatenate((attacker_pmf[1:], defender_pmf[1:], [attacker_pmf[0] + defender_pmf[0]]))
+    return OutcomeDistribution(species, survivors, probabilities)
+
+
+def compute_outcome_distribution(attacker_species: Species, attacker_count: int, defender_species: Species,
+                                 defender_count: int) -> OutcomeDistribution:
+    """All the possible results of a battle, in float64 (see battle_outcomes for the precomputed distributions)"""
+    proba = BattleComputer((SPECIES_BY_VALUE[attacker_species], attacker_count),
+                           (SPECIES_BY_VALUE[defender_species], defender_count)).proba_attacker_wins
+    if proba == 1:
+        is_fusion = defender_species in (_HUMAN, _NONE, attacker_species)
+        return OutcomeDistribution(np.array([attacker_species], dtype=np.int8),
+                                   np.array([attacker_count + defender_count if is_fusion else attacker_count]),
+                                   np.ones(1))
+    return get_distribution_from_pmfs(attacker_species, defender_species,
+                                      *compute_outcome_pmfs(attacker_count, defender_species, defender_count, proba))
 
 
 class BattleComputer:
-    """Base class for AI"""
+    """Base class for AI (see the module functions for the fast table-driven versions)"""
 
     def __init__(self, attacker: Tuple[Species, int], defender: Tuple[Species, int]):
 
@@ -121,9 +263,13 @@ class BattleComputer:
             nb_survivors = self.get_esperance()[1 - victory][1]
         else:
             victory = np.random.binomial(n=1, p=self.proba_attacker_wins)
-            expectation = self.get_esperance()[1 - victory][1]
-            nb_survivors = np.random.binomial(
-                n=expectation / self.proba_attacker_wins, p=self.proba_attacker_wins)
+            # survivors of the winner: binomial law of compute_outcome_pmfs
+            if victory:
+                nb_trials = self.attacker_count + self.defender_count if self.defender_specie is Species.HUMAN \
+                    else self.attacker_count
+                nb_survivors = np.random.binomial(n=nb_trials, p=self.proba_attacker_wins)
+            else:
+                nb_survivors = np.random.binomial(n=self.defender_count, p=1 - self.proba_attacker_wins)
         if not nb_survivors:
             winning_species = Species.NONE
         elif victory:
@@ -152,38 +298,11 @@ class BattleComputer:
         example :
             [(WEREWOLF, 1, 0.5), (VAMPIRE, 1, 0.5)]
         """
-        # # Case of a certain victory
-        if self.proba_attacker_wins == 1:
-            if self.defender_count is Species.HUMAN or self.attacker_specie is self.defender_specie:
-                return [(self.attacker_specie, self.attacker_count + self.defender_count, 1)]
-            else:
-                return [(self.attacker_specie, self.attacker_count, 1)]
-
-        # # Case of a Random battle
-        probabilities = []
-
-        if self.defender_count is Species.HUMAN:
-            n_attacker = self.attacker_count + self.defender_count
-        else:
-            n_attacker = self.attacker_count
-
-        attacker_random_variable = binom(n_attacker, self.proba_attacker_wins)
-        defender_random_variable = binom(
-            self.defender_count, 1 - self.proba_attacker_wins)
-
-        # # attacker victory
-        for k in range(1, n_attacker + 1):
-            probabilities.append(
-                [self.attacker_specie, k, self.proba_attacker_wins * attacker_random_variable.pmf(k)])
-        # # defender victory
-        for k in range(1, self.defender_count + 1):
-            probabilities.append(
-                [self.defender_specie, k, (1 - self.proba_attacker_wins) * defender_random_variable.pmf(k)])
-        # # no survivors
-        probabilities.append([Species.NONE, 0, self.proba_attacker_wins * attacker_random_variable.pmf(0) + (
-            1 - self.proba_attacker_wins) * defender_random_variable.pmf(0)])
-
-        return probabilities
+        distribution = compute_outcome_distribution(self.attacker_specie, self.attacker_count, self.defender_specie,
+                                                    self.defender_count)
+        return [[SPECIES_BY_VALUE[species], survivors, probability] for species, survivors, probability
+                in zip(distribution.species.tolist(), distribution.survivors.tolist(),
+                       distribution.probabilities.tolist())]
 
 
 if __name__ == "__main__":
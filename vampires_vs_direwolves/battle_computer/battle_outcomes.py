@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed outcome distributions of all the random battles up to MAX_COUNT persons on each side.
+
+The pmfs of battle_computer.compute_outcome_pmfs (float32) are stored one after the other in a .npy file of CACHE_DIR,
+built on first use (about 100 MB) and memory-mapped by all the processes using it:
+the distribution of a battle is then a slice of the table, without any computation.
+
+CACHE_DIR is the BATTLE_OUTCOMES_DIR environment variable if set, else vampires_vs_direwolves in the user cache
+directory ($XDG_CACHE_HOME or ~/.cache).
+"""
+import os
+import tempfile
+from typing import Tuple
+
+import numpy as np
+
+from battle_computer.battle_computer import (ENEMY_DEFENDER, HUMAN_DEFENDER, MAX_COUNT, OutcomeDistribution,
+                                             compute_outcome_distribution, compute_outcome_pmfs,
+                                             get_distribution_from_pmfs, get_probability_planes)
+from common.logger import logger
+from common.models import Species
+
+CACHE_DIR = os.environ.get("BATTLE_OUTCOMES_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "vampires_vs_direwolves")
+
+_HUMAN = int(Species.HUMAN)
+
+
+class OutcomeTable:
+    """Pmfs (attacker_pmf, defender_pmf) of the random battles, indexed by [defender class, attacker count,
+    defender count] as the tables of battle_computer. Certain battles have no entry.
+    """
+
+    def __init__(self, values: np.ndarray, max_count: int = MAX_COUNT):
+        self.values = values  # float32 pmfs of all the random battles, line by line of the index
+        self.max_count = max_count
+        _is_human, self.is_random, self.probas = get_probability_planes(max_count)
+        self._attacker_lengths, self._offsets, size = self._get_layout(max_count, self.is_random)
+        assert len(values) == size, f"Bad outcome table size: {len(values)} instead of {size}"
+
+    @staticmethod
+    def _get_layout(max_count: int, is_random: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Length of the attacker pmfs, offset of the pmfs of each battle, and size of the table"""
+        counts = np.arange(max_count + 1)
+        attacker_counts, defender_counts = counts[None, :, None], counts[None, None, :]
+        nb_attacker_trials = np.where(np.arange(2)[:, None, None] == HUMAN_DEFENDER,
+                                      attacker_counts + defender_counts, attacker_counts)
+        attacker_lengths = np.where(is_random, nb_attacker_trials + 1, 0)
+        lengths = np.where(is_random, attacker_lengths + defender_counts + 1, 0)
+        ends = np.cumsum(lengths)
+        return attacker_lengths, (ends - lengths.ravel()).reshape(lengths.shape), int(ends[-1])
+
+    @classmethod
+    def build(cls, max_count: int = MAX_COUNT) -> 'OutcomeTable':
+        _is_human, is_random, probas = get_probability_planes(max_count)
+        _attacker_lengths, offsets, size = cls._get_layout(max_count, is_random)
+        values = np.zeros(size, dtype=np.float32)
+        for defender_class, attacker_count, defender_count in zip(*np.nonzero(is_random)):
+            offset = offsets[defender_class, attacker_count, defender_count]
+            defender_species = Species.HUMAN if defender_class == HUMAN_DEFENDER else Species.WEREWOLF
+            attacker_pmf, defender_pmf = compute_outcome_pmfs(int(attacker_count), defender_species,
+                                                              int(defender_count),
+                                                              probas[defender_class, attacker_count, defender_count])
+            values[offset:offset + len(attacker_pmf)] = attacker_pmf
+            values[offset + len(attacker_pmf):offset + len(attacker_pmf) + len(defender_pmf)] = defender_pmf
+        return cls(values, max_count)
+
+    def save(self, path: str):
+        """Save the table atomically (processes may build it at the same time)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".npy", delete=False) as file:
+            np.save(file, self.values)
+        os.replace(file.name, path)
+
+    @classmethod
+    def load(cls, path: str, max_count: int = MAX_COUNT) -> 'OutcomeTable':
+        return cls(np.load(path, mmap_mode="r"), max_count)
+
+    def get_pmfs(self, defender_class: int, attacker_count: int, defender_count: int
+                 ) -> Tuple[np.ndarray, np.ndarray]:
+        """(attacker_pmf, defender_pmf) of a random battle, views of the table"""
+        offset = int(self._offsets[defender_class, attacker_count, defender_count])
+        attacker_length = int(self._attacker_lengths[defender_class, attacker_count, defender_count])
+        return (self.values[offset:offset + attacker_length],
+                self.values[offset + attacker_length:offset + attacker_length + defender_count + 1])
+
+
+_table: OutcomeTable = None
+
+
+def get_table_path(max_count: int = MAX_COUNT) -> str:
+    return os.path.join(CACHE_DIR, f"battle_outcomes_{max_count}.npy")
+
+
+def get_outcome_table() -> OutcomeTable:
+    """Table shared by the process, loaded from (or built in) CACHE_DIR on first use"""
+    global _table
+    if _table is None:
+        path = get_table_path()
+        if not os.path.exists(path):
+            logger.info(f"Building battle outcome table {path}...")
+            OutcomeTable.build().save(path)
+        _table = OutcomeTable.load(path)
+    return _table
+
+
+def get_outcome_distribution(attacker_species: Species, attacker_count: int, defender_species: Species,
+                             defender_count: int) -> OutcomeDistribution:
+    """All the possible results of a battle (see BattleComputer.get_all_probabilities), from the table"""
+    if defender_species in (Species.NONE, attacker_species):
+        return compute_outcome_distribution(attacker_species, attacker_count, defender_species, defender_count)
+    table = get_outcome_table()
+    if max(attacker_count, defender_count) > table.max_count:
+        return compute_outcome_distribution(attacker_species, attacker_count, defender_species, defender_count)
+    defender_class = HUMAN_DEFENDER if defender_species == _HUMAN else ENEMY_DEFENDER
+    if not table.is_random[defender_class, attacker_count, defender_count]:
+        return compute_outcome_distribution(attacker_species, attacker_count, defender_species, defender_count)
+    return get_distribution_from_pmfs(attacker_species, defender_species,
+                                      *table.get_pmfs(defender_class, attacker_count, defender_count))
+
+
+if __name__ == "__main__":
+    get_outcome_table()  # warm-up: builds the table in CACHE_DIR before the games
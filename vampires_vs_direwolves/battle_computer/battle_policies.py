@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Battle policies: how the battles of a turn are resolved, interchangeable in game_management.transition.
+
+- MinmaxBattlePolicy: pessimistic results of BattleComputer.compute_battle_for_minmax (search engines)
+- ExpectationBattlePolicy: expected results of BattleComputer.compute_one_battle_result(use_expectation=True)
+- RandomBattlePolicy: random results of BattleComputer.compute_one_battle_result (server, simulators)
+
+Each policy resolves either one battle (`resolve_one`) or a batch of battles in one vectorized call (`resolve`).
+Fusions (same species) and moves to empty cells are handled by all policies.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from battle_computer.battle_computer import (ENEMY_DEFENDER, HUMAN_DEFENDER, MINMAX_ATTACKER_WINS, MINMAX_SURVIVORS,
+                                             compute_battle_for_minmax)
+from common.models import Species
+
+_HUMAN, _NONE = int(Species.HUMAN), int(Species.NONE)
+
+
+def get_battle_probabilities(attacker_species: int, attacker_numbers: np.ndarray, defender_species: np.ndarray,
+                             defender_numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized BattleComputer.proba_attacker_wins. Returns (no battle, random battle, probability) arrays"""
+    attacker_numbers = np.asarray(attacker_numbers, dtype=float)
+    defender_numbers = np.asarray(defender_numbers, dtype=float)
+    no_battle = (defender_species == _NONE) | (defender_species == attacker_species)
+    is_random = ~no_battle & np.where(defender_species == _HUMAN, attacker_numbers < defender_numbers,
+                                      attacker_numbers < 1.5 * defender_numbers)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        proba = np.where(~is_random, 1.,
+                         np.where(attacker_numbers == defender_numbers, 0.5,
+                                  np.where(attacker_numbers < defender_numbers,
+                                           0.5 * attacker_numbers / defender_numbers,
+                                           attacker_numbers / defender_numbers - 0.5)))
+    return no_battle, is_random, proba
+
+
+def resolve_battles(attacker_species: int, attacker_numbers: np.ndarray, defender_species: np.ndarray,
+                    defender_numbers: np.ndarray, rng: np.random.Generator,
+                    use_expectation=False) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized version of BattleComputer.compute_one_battle_result for a batch of battles.
+
+    :param attacker_species: species moving (same for all battles)
+    :param attacker_numbers: number of attackers arriving in each cell
+    :param defender_species: species living in each cell (Species.NONE if empty)
+    :param defender_numbers: number of persons living in each cell
+    :return: (species, number) of the cells after the battles
+    """
+    attacker_numbers = np.asarray(attacker_numbers, dtype=float)
+    defender_numbers = np.asarray(defender_numbers, dtype=float)
+    defender_species = np.asarray(defender_species)
+    is_human = defender_species == _HUMAN
+    no_battle, is_random, proba = get_battle_probabilities(attacker_species, attacker_numbers, defender_species,
+                                                           defender_numbers)
+
+    # trivial battles: fusion, empty cell or certain victory
+    species = np.full(len(proba), attacker_species)
+    numbers = np.where(no_battle | is_human, attacker_numbers + defender_numbers, attacker_numbers)
+
+    # random battles
+    if is_random.any():
+        proba_random = proba[is_random]
+        if use_expectation:
+            victory = proba_random > 0.5  # WARN: special case 0.5: not correct (same as BattleComputer)
+        else:
+            victory = rng.random(len(proba_random)) < proba_random
+        expectation = np.where(victory,
+                               proba_random * np.where(is_human[is_random], attacker_numbers[is_random]
+                                                       + defender_numbers[is_random], attacker_numbers[is_random]),
+                               (1 - proba_random) * defender_numbers[is_random])
+        if use_expectation:
+            survivors = expectation
+        else:
+            # survivors of the winners: binomial laws of battle_computer.compute_outcome_pmfs
+            nb_trials = np.where(victory, np.where(is_human[is_random], attacker_numbers[is_random]
+                                                   + defender_numbers[is_random], attacker_numbers[is_random]),
+                                 defender_numbers[is_random]).astype(int)
+            survivors = rng.binomial(n=nb_trials, p=np.where(victory, proba_random, 1 - proba_random)).astype(float)
+        species[is_random] = np.where(survivors == 0, _NONE,
+                                      np.where(victory, attacker_species, defender_species[is_random]))
+        numbers[is_random] = survivors
+    return species, numbers.astype(int)
+
+
+def get_game_seed(seed: int, game_index: int) -> int:
+    """Seed of the battles of the game_index-th game of a series seeded with `seed`.
+    Two series with the same seed have the same random battle results, game by game.
+    """
+    return int(np.random.SeedSequence([seed, game_index]).generate_state(1)[0])
+
+
+class BattlePolicy:
+    """Base class of the battle policies"""
+
+    def resolve(self, attacker_species: int, attacker_numbers: np.ndarray, defender_species: np.ndarray,
+                defender_numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Species and number of persons of the cells after a batch of battles (species NONE if nobody survives)
+
+        :param attacker_species: species moving (same for all battles)
+        :param attacker_numbers: number of attackers arriving in each cell
+        :param defender_species: species living in each cell (Species.NONE if empty)
+        :param defender_numbers: number of persons living in each cell
+        """
+        raise NotImplementedError
+
+    def resolve_one(self, attacker_species: int, attacker_number: int, defender_species: int,
+                    defender_number: int) -> Tuple[int, int]:
+        """Species and number of persons of a cell after one battle"""
+        species, numbers = self.resolve(attacker_species, np.array([attacker_number]), np.array([defender_species]),
+                                        np.array([defender_number]))
+        return int(species[0]), int(numbers[0])
+
+
+class MinmaxBattlePolicy(BattlePolicy):
+    """Pessimistic deterministic results, as BattleComputer.compute_battle_for_minmax"""
+
+    def resolve(self, attacker_species, attacker_numbers, defender_species, defender_numbers):
+        attacker_numbers = np.asarray(attacker_numbers, dtype=int)
+        defender_numbers = np.asarray(defender_numbers, dtype=int)
+        defender_species = np.asarray(defender_species)
+        no_battle = (defender_species == _NONE) | (defender_species == attacker_species)
+        defender_class = np.where(defender_species == _HUMAN, HUMAN_DEFENDER, ENEMY_DEFENDER)
+        attacker_wins = MINMAX_ATTACKER_WINS[defender_class, attacker_numbers, defender_numbers].astype(bool)
+        numbers = np.where(no_battle, attacker_numbers + defender_numbers,
+                           MINMAX_SURVIVORS[defender_class, attacker_numbers, defender_numbers])
+        species = np.where(no_battle | attacker_wins, attacker_species, defender_species)
+        return np.where(numbers > 0, species, _NONE), numbers
+
+    def resolve_one(self, attacker_species, attacker_number, defender_species, defender_number):
+        species, number = compute_battle_for_minmax(attacker_species, attacker_number, defender_species,
+                                                    defender_number)
+        return (int(species), number) if number > 0 else (_NONE, 0)
+
+
+class ExpectationBattlePolicy(BattlePolicy):
+    """Expected deterministic results, as BattleComputer.compute_one_battle_result(use_expectation=True)"""
+
+    def resolve(self, attacker_species, attacker_numbers, defender_species, defender_numbers):
+        return resolve_battles(attacker_species, attacker_numbers, defender_species, defender_numbers, rng=None,
+                               use_expectation=True)
+
+
+class RandomBattlePolicy(BattlePolicy):
+    """Random results, as BattleComputer.compute_one_battle_result, drawn from its own random generator"""
+
+    def __init__(self, rng: np.random.Generator = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    @classmethod
+    def from_seed(cls, seed: int) -> 'RandomBattlePolicy':
+        return cls(np.random.default_rng(seed))
+
+    def resolve(self, attacker_species, attacker_numbers, defender_species, defender_numbers):
+        return resolve_battles(attacker_species, attacker_numbers, defender_species, defender_numbers, self.rng)
+
+
+MINMAX = MinmaxBattlePolicy()
+EXPECTATION = ExpectationBattlePolicy()
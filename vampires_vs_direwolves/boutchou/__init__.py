@@ -1,36 +1,61 @@
 # -*- coding: utf-8 -*-
-from boutchou.abstract_ai import AbstractAI, AbstractSafeAI
-from boutchou.expert_ai import ExpertAI
-from boutchou.alpha_beta_ai import (AlphaBetaAI, AlphaBetaDiag,
-                                    AlphaBetaExpectation, AlphaBetaObj,
-                                    AlphaBetaSimple)
-from boutchou.boutchou_ai import Boutchou
-from boutchou.human_ai import HumanAI
-from boutchou.multi_split_ai import MultiSplitAI
-from boutchou.random_ai import RandomAI
-from boutchou.rush_to_humans_ai import MoveToBestHumans, RushToHumansAI
-from boutchou.rush_to_opponent_ai import (MoveToHumanOrMoveToOpponentIfBetter,
-                                          RushToOpponentAI)
-from boutchou.tkinter_ai import TkinterHumanAI
-
-__all__ = [
-    'AbstractAI',
-    'AbstractSafeAI',
-    'AlphaBetaAI',
-    'ExpertAI',
-    'Boutchou',
-    'RandomAI',
-    'RushToHumansAI',
-    'MoveToHumanOrMoveToOpponentIfBetter',
-    'MoveToBestHumans',
-    'RushToOpponentAI',
-    'MultiSplitAI',
-    'HumanAI',
-    'TkinterHumanAI',
-
-    'AlphaBetaAI',
-    'AlphaBetaSimple',
-    'AlphaBetaExpectation',
-    'AlphaBetaDiag',
-    'AlphaBetaObj',
-]
+"""
+AIs of the package, imported on first use (PEP 562): `from boutchou import Boutchou` only imports Boutchou
+and its dependencies, not Flask (HumanAI) nor tkinter (TkinterHumanAI).
+New AIs are added to AI_REGISTRY (or with register_ai) instead of being imported here.
+"""
+from importlib import import_module
+from typing import Type
+
+# AI name -> module defining it
+AI_REGISTRY = {
+    'AbstractAI': 'boutchou.abstract_ai',
+    'AbstractSafeAI': 'boutchou.abstract_ai',
+    'ExpertAI': 'boutchou.expert_ai',
+    'Boutchou': 'boutchou.boutchou_ai',
+    'RandomAI': 'boutchou.random_ai',
+    'RushToHumansAI': 'boutchou.rush_to_humans_ai',
+    'MoveToBestHumans': 'boutchou.rush_to_humans_ai',
+    'RushToOpponentAI': 'boutchou.rush_to_opponent_ai',
+    'MoveToHumanOrMoveToOpponentIfBetter': 'boutchou.rush_to_opponent_ai',
+    'MultiSplitAI': 'boutchou.multi_split_ai',
+    'PortfolioAI': 'boutchou.portfolio_ai',
+    'HumanAI': 'boutchou.human_ai',  # Flask
+    'TkinterHumanAI': 'boutchou.tkinter_ai',  # tkinter
+
+    'AlphaBetaAI': 'boutchou.alpha_beta_ai',
+    'AlphaBetaSimple': 'boutchou.alpha_beta_ai',
+    'AlphaBetaExpectation': 'boutchou.alpha_beta_ai',
+    'AlphaBetaChance': 'boutchou.alpha_beta_ai',
+    'AlphaBetaTerritory': 'boutchou.alpha_beta_ai',
+    'AlphaBetaLexicographic': 'boutchou.alpha_beta_ai',
+    'AlphaBetaDiag': 'boutchou.alpha_beta_ai',
+    'AlphaBetaObj': 'boutchou.alpha_beta_ai',
+}
+
+__all__ = list(AI_REGISTRY)
+
+
+def register_ai(name: str, module_path: str):
+    """Make an AI available as `boutchou.<name>` (module imported on first use)"""
+    AI_REGISTRY[name] = module_path
+    if name not in __all__:
+        __all__.append(name)
+
+
+def get_ai_class(name: str) -> Type['AbstractAI']:
+    """AI class from its name, importing its module if needed"""
+    return __getattr__(name)
+
+
+def __getattr__(name: str):
+    module_path = AI_REGISTRY.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_path), name)
+    globals()[name] = value  # next accesses do not go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(AI_REGISTRY))
@@ -28,6 +28,10 @@ class AbstractAI(ABC):
     def generate_move(self) -> List[Tuple[int, int, int, int, int]]:
         pass
 
+    def close(self) -> None:
+        """Release the resources of the AI, at the end of the games"""
+        pass
+
     @classmethod
     def next_move(cls, game_map: AbstractGameMap, species: Species):
         cls._inst = cls._inst or cls()
@@ -49,5 +53,5 @@ class AbstractSafeAI(AbstractAI, ABC):
         """Generate an always-safe move (in the sense of game rules)"""
         old_position, number = get_first_species_position_and_number(self._map, self._species)
         new_position = NextMoveRule(self._map, self._species).safe_move(old_position)
-        logger.debug(f"Safe move: {new_position}")
+        logger.debug("Safe move: %s", new_position)
         return [(*old_position, number, *new_position)]
@@ -3,10 +3,11 @@ import numpy as np
 from alphabeta.abstract_possible_moves_computer import SimpleMoveComputer
 from alphabeta.alphabeta import AlphaBetaSearch
 from alphabeta.diag_move_computer import DiagMoveComputer
+from alphabeta.group_heuristics import RatioThenExpectationHeuristic
 from alphabeta.num_dist_heur import NumberAndDistanceHeuristic
 from alphabeta.objective_first_move_computer import ObjectiveFirstMoveComputer
 from alphabeta.simple_heuristics import (ExpectationHeuristic,
-                                         SpeciesRatioHeuristic)
+                                         SpeciesRatioHeuristic, TerritoryHeuristic)
 from boutchou.abstract_ai import AbstractAI
 
 
@@ -17,6 +18,7 @@ class AlphaBetaAI(AbstractAI):
         self.nodes = []
         self.alphas = []
         self.betas = []
+        self.last_score = None  # score of the last search
 
         self.search = AlphaBetaSearch(
             possible_moves_computer=SimpleMoveComputer,
@@ -25,7 +27,7 @@ class AlphaBetaAI(AbstractAI):
         )
 
     def generate_move(self):
-        move, blaaaaaaaa, nodes, alpha, beta = self.search.compute(
+        move, self.last_score, nodes, alpha, beta = self.search.compute(
             self._map, self._species)
 
         self.nodes.append(nodes)
@@ -52,6 +54,33 @@ class AlphaBetaExpectation(AlphaBetaAI):
                                       depth=3)
 
 
+class AlphaBetaChance(AlphaBetaAI):
+    """AlphaBetaExpectation with chance nodes on random battles (see AlphaBetaSearch)"""
+
+    def __init__(self):
+        super().__init__()
+        self.search = AlphaBetaSearch(possible_moves_computer=SimpleMoveComputer,
+                                      heuristic=ExpectationHeuristic,
+                                      depth=3,
+                                      chance_nodes=True)
+
+
+class AlphaBetaTerritory(AlphaBetaAI):
+    def __init__(self):
+        super().__init__()
+        self.search = AlphaBetaSearch(possible_moves_computer=SimpleMoveComputer,
+                                      heuristic=TerritoryHeuristic,
+                                      depth=3)
+
+
+class AlphaBetaLexicographic(AlphaBetaAI):
+    def __init__(self):
+        super().__init__()
+        self.search = AlphaBetaSearch(possible_moves_computer=SimpleMoveComputer,
+                                      heuristic=RatioThenExpectationHeuristic,
+                                      depth=3)
+
+
 class AlphaBetaDiag(AlphaBetaAI):
     def __init__(self):
         super().__init__()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple, Type
+
+from boutchou.abstract_ai import AbstractAI, AbstractSafeAI
+from boutchou.alpha_beta_ai import AlphaBetaAI, AlphaBetaDiag
+from boutchou.expert_ai import ExpertAI
+from common.logger import logger
+from common.models import Species
+from game_management.board_codec import decode_game_map, to_bytes
+from game_management.rule_checks import check_movements
+
+DEADLINE = 1.5  # in seconds, for all engines
+
+# engine instances of a worker process (kept between turns)
+_worker_engines: Dict[Type[AbstractAI], AbstractAI] = {}
+
+
+def _run_engine(engine_class: Type[AbstractAI], board: bytes, species: Species):
+    """Generate a move with an engine in a worker process. Returns (moves, search score or None)"""
+    game_map = decode_game_map(board)
+    engine = _worker_engines.setdefault(engine_class, engine_class())
+    engine.load_map(game_map)
+    engine.load_species(species)
+    moves = engine.generate_move()
+    return moves, getattr(engine, "last_score", None)
+
+
+class PortfolioAI(AbstractSafeAI):
+    """Run several engines in parallel worker processes with the same deadline, then pick one of their moves.
+
+    Confidence rules:
+    - "agreement": the move proposed by most engines (ties broken by engines order)
+    - "score": the move of the engine whose search score ranks best among its own past scores (heuristics of
+    the engines have different scales; engines without score are ignored), "agreement" if no engine returned a score
+
+    If `map_preferences` gives an engine for the map size (n, m), its move is used whenever it is ready.
+    Worker processes are stopped by `close`, at the end of the games.
+    """
+
+    def __init__(self, engines: List[Type[AbstractAI]] = None, deadline: float = DEADLINE, rule: str = "agreement",
+                 map_preferences: Dict[Tuple[int, int], Type[AbstractAI]] = None):
+        super().__init__()
+        assert rule in ("agreement", "score"), f"Unknown confidence rule: {rule}"
+        self._engines = engines or [ExpertAI, AlphaBetaAI, AlphaBetaDiag]
+        self._deadline = deadline
+        self._rule = rule
+        self._map_preferences = map_preferences or {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[Type[AbstractAI], Future] = {}  # engines still running after a previous deadline
+        self._scores: Dict[Type[AbstractAI], List[float]] = {}  # search scores of each engine, for the "score" rule
+
+    def _submit(self) -> Dict[Type[AbstractAI], Future]:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=len(self._engines))
+        board = to_bytes(self._map)
+        futures = {}
+        for engine in self._engines:
+            if engine in self._pending and not self._pending.pop(engine).done():
+                logger.warning(f"Portfolio: {engine.__name__} still busy with a previous board, skipped")
+                continue
+            futures[engine] = self._executor.submit(_run_engine, engine, board, self._species)
+        return futures
+
+    def _collect(self, futures: Dict[Type[AbstractAI], Future]) -> Dict[Type[AbstractAI], Tuple[tuple, float]]:
+        wait(futures.values(), timeout=self._deadline)
+        results = {}
+        for engine, future in futures.items():
+            if not future.done():
+                logger.info(f"Portfolio: {engine.__name__} missed the deadline")
+                self._pending[engine] = future
+                continue
+            try:
+                moves, score = future.result()
+                check_movements(moves, self._map, self._species)
+            except Exception as err:
+                logger.warning(f"Portfolio: {engine.__name__} gave no valid move: {err!r}")
+                continue
+            results[engine] = (tuple(tuple(int(value) for value in move) for move in moves), score)
+            if score is not None:
+                self._scores.setdefault(engine, []).append(score)
+        return results
+
+    def _get_score_rank(self, engine: Type[AbstractAI], score) -> float:
+        """Fraction of the scores of an engine lower or equal to score, in ]0, 1]"""
+        scores = self._scores.get(engine) or [score]
+        return sum(past_score <= score for past_score in scores) / len(scores)
+
+    def _choose(self, results: Dict[Type[AbstractAI], Tuple[tuple, float]]) -> Optional[tuple]:
+        preferred_engine = self._map_preferences.get((self._map.n, self._map.m))
+        if preferred_engine in results:
+            return results[preferred_engine][0]
+        if self._rule == "score":
+            scored = [(self._get_score_rank(engine, score), -self._engines.index(engine), moves)
+                      for engine, (moves, score) in results.items() if score is not None]
+            if scored:
+                return max(scored, key=lambda ele: ele[:2])[2]
+        votes = Counter(moves for moves, _score in results.values())
+        if not votes:
+            return None
+        best_count = max(votes.values())
+        for engine in self._engines:  # engines order breaks ties
+            if engine in results and votes[results[engine][0]] == best_count:
+                return results[engine][0]
+
+    def _generate_move(self):
+        results = self._collect(self._submit())
+        moves = self._choose(results)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Portfolio results: %s", {engine.__name__: result for engine, result in results.items()})
+        return list(moves) if moves else None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._pending.clear()
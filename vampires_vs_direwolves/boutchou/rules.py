@@ -1,11 +1,15 @@
 from random import randint, shuffle
 from typing import Tuple, List
 
+import numpy as np
+
 from alphabeta.objective_first_move_computer import ObjectiveFirstMoveComputer
 from common.logger import logger
 from common.models import Species
 from game_management.abstract_game_map import AbstractGameMap
-from game_management.map_helpers import (get_next_move_to_destination, get_distances_to_a_species, get_direct_distance)
+from game_management.map_helpers import (get_next_move_to_destination, get_distances_to_a_species)
+from game_management.distance_fields import DistanceField, distance_field_service
+from game_management.territory import get_distance_planes
 
 
 class AbstractMoveRules:
@@ -55,6 +59,10 @@ class NextMoveRule(AbstractMoveRules):
         new_pos = possible_moves[rand_ind]
         return new_pos
 
+    def _get_distance_field(self, position) -> DistanceField:
+        """Safe distances and routes from the group at position (cached until the board changes)"""
+        return distance_field_service.get_field(self._game_map, self._species, position)
+
     def _sort_humans(self, position, method, **params):
         humans = get_distances_to_a_species(position, self._game_map, species=Species.HUMAN)
         if method == "distance":
@@ -80,7 +88,10 @@ class NextMoveRule(AbstractMoveRules):
                 continue
             new_pos = get_next_move_to_destination(position, human_pos)
             if new_pos not in allowed_moves:
-                continue
+                # direct move blocked: first move of the safest route, if any
+                new_pos = self._get_distance_field(position).get_next_step(human_pos)
+                if new_pos not in allowed_moves:
+                    continue
             return new_pos
         return None
 
@@ -216,38 +227,33 @@ class NextMoveRule(AbstractMoveRules):
         return new_pos
 
 
-    def _get_accessible_positions(self, position_attacker, position_enemy):
-        """Get accessible positions of enemy if chased by attacker. It's position_attacker turn."""
-        # todo: optimize algorithm with geometrical considerations
-        distance = get_direct_distance(position_attacker, position_enemy)
-        if distance == 1:
-            return []
-        accessible_positions = []
-        for position in self._game_map.positions:
-            # todo: to be optimized
-            if get_direct_distance(position, position_enemy) < get_direct_distance(position, position_attacker):
-                accessible_positions.append(position)
-        return accessible_positions
-
-
     def move_to_opponent_if_blocked(self, position):
         """Move to opponent if you are certain to win (modulo some approximations)"""
         own_number = self._game_map.get_cell_species_count(position, self._species)
         enemy_species = Species.get_opposite_species(self._species)
         enemies = self._game_map.find_species_position_and_number(enemy_species)
-        for enemy_position, enemy_number in enemies:
+        if not enemies:
+            return None
+        enemy_positions = [enemy_position for enemy_position, _enemy_number in enemies]
+        enemy_numbers = np.array([enemy_number for _enemy_position, enemy_number in enemies])
+
+        # accessible positions of each enemy chased by us (cells strictly closer to the enemy), in one pass
+        own_distances = get_distance_planes(self._game_map.n, self._game_map.m, [position])[0]
+        enemy_distances = get_distance_planes(self._game_map.n, self._game_map.m, enemy_positions)
+        accessible = enemy_distances < own_distances
+        accessible[enemy_distances[:, position[1], position[0]] == 1] = False
+
+        # humans the enemy can convert, and enemy groups (itself included) it can join
+        human_map = self._game_map.human_map
+        enemy_map = self._game_map.vampire_map if enemy_species is Species.VAMPIRE else self._game_map.werewolf_map
+        backups = np.where(human_map < enemy_numbers[:, None, None], human_map, 0) + enemy_map
+        # todo: also take into account own species blocked and that could be converted by the enemy
+        potential_increased_numbers = enemy_numbers + (backups * accessible).sum(axis=(1, 2))
+
+        for enemy_position, enemy_number, potential_increased_number in zip(enemy_positions, enemy_numbers,
+                                                                             potential_increased_numbers):
             if enemy_number * 1.5 >= own_number:  # too risky to attack
                 continue
-            potential_increased_number = enemy_number
-            for potential_backup_position in self._get_accessible_positions(position, enemy_position):
-                pot_sp, pot_nb = self._game_map.get_cell_species_and_number(potential_backup_position)
-                if pot_sp is Species.HUMAN and enemy_number > pot_nb and True:
-                    potential_increased_number += pot_nb
-                if pot_sp is enemy_species:
-                    potential_increased_number += pot_nb
-                # todo: also take into account own species blocked and that could be converted by the enemy
-                if potential_increased_number * 1.5 >= own_number:
-                    break
             if potential_increased_number * 1.5 < own_number:  # enemy can not grow enough to win
                 new_pos = get_next_move_to_destination(position, enemy_position)
                 if new_pos in self._possible_moves.get_possible_moves_without_overcrowded_houses(position):
@@ -12,6 +12,8 @@ class RulesSequence(AbstractSafeAI):
     """AI working with a list of rules.
 
     """
+    wait_time = WAIT_TIME  # in seconds, before sending moves (0 for headless games)
+
     def __init__(self):
         super().__init__()
         self._move_methods = []
@@ -56,5 +58,5 @@ class RulesSequence(AbstractSafeAI):
             forbidden_moves_start.add(old_position)
             forbidden_moves_end.update({upd[3:] for upd in new_updates})
 
-        sleep(WAIT_TIME)  # wait WAIT_TIME second(s)
+        sleep(self.wait_time)  # wait WAIT_TIME second(s)
         return updates or None
@@ -1,51 +1,148 @@
 # -*- coding: utf-8 -*-
 # open source project
+"""
+Logger of the package.
+
+Records are put in a queue by the calling thread (QueueHandler) and written to the console and the log files
+by a listener thread (QueueListener): the game threads never wait for disk I/O.
+
+Levels can be set per module (module name without .py, as %(module)s), with set_module_levels or with the
+LOG_LEVELS environment variable, e.g. LOG_LEVELS="INFO,server_models=DEBUG": a bare level is the default level.
+The default level is INFO: debug records (debug.log) are opt-in, e.g. LOG_LEVELS=DEBUG.
+Debug calls must be lazy (`logger.debug("Received int: %s", value)`) so they cost nothing when disabled.
+"""
+import atexit
 import logging
+import logging.handlers
 import os
-
+import queue
+import sys
+from typing import Dict, List, Union
 
 DEFAULT_CONSOLE_LEVEL = logging.INFO
+DEFAULT_LEVEL = logging.INFO
 
+Level = Union[int, str]
 
-def _initialize_logger(output_dir):
-    _logger = logging.getLogger("custom")
-    _logger.setLevel(logging.DEBUG)
+
+class ModuleLevelFilter(logging.Filter):
+    """Drops the records below the level of their module (default level for the other modules)"""
+
+    def __init__(self, default_level: int = DEFAULT_LEVEL):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.module_levels.get(record.module, self.default_level)
+
+
+def _create_handlers(output_dir) -> List[logging.Handler]:
+    handlers = []
 
     # create console handler and set level to info
     handler = logging.StreamHandler()
     handler.setLevel(DEFAULT_CONSOLE_LEVEL)
     formatter = logging.Formatter("%(levelname)s (%(asctime)s) - %(module)s %(lineno)d - %(message)s")
     handler.setFormatter(formatter)
-    _logger.addHandler(handler)
+    handlers.append(handler)
 
     # create error file handler and set level to error
     handler = logging.FileHandler(os.path.join(output_dir, "error.log"), "w", encoding=None, delay=True)
     handler.setLevel(logging.ERROR)
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(module)s %(funcName)s %(lineno)d - %(message)s")
     handler.setFormatter(formatter)
-    _logger.addHandler(handler)
+    handlers.append(handler)
 
     # create info file handler and set level to info
     handler = logging.FileHandler(os.path.join(output_dir, "info.log"), "w", encoding=None, delay=True)
     handler.setLevel(logging.INFO)
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     handler.setFormatter(formatter)
-    _logger.addHandler(handler)
+    handlers.append(handler)
 
     # create debug file handler and set level to debug
-    handler = logging.FileHandler(os.path.join(output_dir, "debug.log"), "w")
+    handler = logging.FileHandler(os.path.join(output_dir, "debug.log"), "w", delay=True)
     handler.setLevel(logging.DEBUG)
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(module)s %(funcName)s %(lineno)d - %(message)s")
     handler.setFormatter(formatter)
-    _logger.addHandler(handler)
-    return _logger
+    handlers.append(handler)
+    return handlers
+
+
+def _initialize_logger(output_dir):
+    _logger = logging.getLogger("custom")
+
+    # the calling thread only filters and enqueues the records, the listener thread handles them
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ModuleLevelFilter())
+    _logger.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(queue_handler.queue, *_create_handlers(output_dir),
+                                              respect_handler_level=True)
+    listener.start()
+    return _logger, queue_handler, listener
+
+
+def _to_level(level: Level) -> int:
+    if isinstance(level, str):
+        level_value = logging.getLevelName(level.strip().upper())
+        if not isinstance(level_value, int):
+            raise ValueError(f"Unknown log level: {level}")
+        return level_value
+    return level
+
+
+def set_module_levels(module_levels: Dict[str, Level] = None, default_level: Level = None):
+    """Set the levels of some modules (e.g. {"server_models": "INFO"}) and/or the default level of the others.
+    The logger level is the lowest of them: `logger.isEnabledFor` is False for the levels nobody logs.
+    """
+    level_filter: ModuleLevelFilter = _queue_handler.filters[0]
+    if default_level is not None:
+        level_filter.default_level = _to_level(default_level)
+    for module, level in (module_levels or {}).items():
+        level_filter.module_levels[module] = _to_level(level)
+    logger.setLevel(min([level_filter.default_level, *level_filter.module_levels.values()]))
+
+
+def parse_levels(levels: str) -> Dict[str, int]:
+    """Levels of a LOG_LEVELS string ("INFO,server_models=DEBUG"), the default level having the key None"""
+    parsed_levels = {}
+    for item in filter(None, (item.strip() for item in levels.split(","))):
+        module, _sep, level = item.rpartition("=")
+        parsed_levels[module.strip() or None] = _to_level(level)
+    return parsed_levels
+
+
+def stop_listener():
+    """Write the records still in the queue and stop the listener thread (at exit)"""
+    if _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_listener_after_fork():
+    """The listener thread does not survive a fork: child processes (ProcessPoolExecutor) get their own"""
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+    multiprocessing_util = sys.modules.get("multiprocessing.util")
+    if multiprocessing_util is not None:
+        # multiprocessing children exit with os._exit, without the atexit callbacks
+        multiprocessing_util.Finalize(None, stop_listener, exitpriority=0)
 
 
 _log_path = os.path.join(os.getcwd(), 'logs/')
 os.makedirs(_log_path, exist_ok=True)
 
-logger = _initialize_logger(_log_path)
-logger.debug("Logger loaded successfully. Logging directory: {}".format(_log_path))
+logger, _queue_handler, _listener = _initialize_logger(_log_path)
+atexit.register(stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+_levels = parse_levels(os.environ.get("LOG_LEVELS", ""))
+set_module_levels({module: level for module, level in _levels.items() if module is not None},
+                  default_level=_levels.get(None, DEFAULT_LEVEL))
+logger.debug("Logger loaded successfully. Logging directory: %s", _log_path)
 
 
 # For testing purposes.
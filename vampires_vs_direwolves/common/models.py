@@ -118,6 +118,9 @@ class Species(enum.IntEnum):
         raise IncorrectSpeciesException(self)
 
 
+SPECIES_BY_VALUE = tuple(Species)  # species value -> Species
+
+
 class Singleton(type):
     """Metaclass that authorize only one instance of a class."""
     _instances = {}
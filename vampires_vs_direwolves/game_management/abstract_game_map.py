@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Union, Generator, Set
+from typing import Iterable, List, Tuple, Union, Generator, Set
 
-from common.exceptions import GameMapOverPopulated
+from battle_computer.battle_policies import MINMAX, BattlePolicy
+from common.exceptions import GameMapOverPopulated, MapCorruptedException
 from common.logger import logger
-from common.models import Species
+from common.models import SPECIES_BY_VALUE, Species
 from common.xml_map_parser import XMLMapParser
+from game_management.neighbour_tables import NeighbourTable, get_neighbour_table
+from game_management.spatial_index import SpatialIndex
+from game_management.transition import compute_transition
 
 
 class AbstractGameMap(ABC):
@@ -36,29 +40,61 @@ class AbstractGameMap(ABC):
         self._n = n
         self._m = m
         self._nb_updates = -1
+        get_neighbour_table(n, m)  # built once per map size
 
     n = property(lambda self: self._n)
     m = property(lambda self: self._m)
     update_number = property(lambda self: self._nb_updates)
     map_table = property(lambda self: self._map_table)  # WARN: map_table format depends on the class !
 
-    @abstractmethod
     def update(self, ls_updates: List[Tuple[int, int, int, int, int]]):
         """Update map given a list of updates from server
         An update tuple has the following format: (position_x, position_y, nb humans, nb vampires, nb werewolves)
         """
+        self._apply_updates(ls_updates)
+        self._count_update()
+
+    def _apply_updates(self, ls_updates: List[Tuple[int, int, int, int, int]]):
+        """Store the cells of the updates (overridden by subclasses instead of update, so that update stays
+        a cooperative chain, e.g. AbstractGameMapWithVisualizer refreshing its viewer)"""
+        for update in ls_updates:
+            self._set_cell(update[0], update[1], *self._decode_update(update))
+
+    def _count_update(self):
+        logger.debug("Game map updated")
         self._nb_updates += 1
 
     @staticmethod
-    def _get_move_range(coord: int, max_coord: int) -> Tuple[int, int]:
-        """Get the range of possible moves for a coordinate x or y."""
-        if coord + 1 == max_coord:
-            range_coord = (-1, 1)
-        elif coord == 0:
-            range_coord = (0, 2)
-        else:
-            range_coord = (-1, 2)
-        return range_coord
+    def _decode_update(update: Tuple[int, int, int, int, int]) -> Tuple[Species, int]:
+        """(species, number) of the cell of an update"""
+        species, number = Species.NONE, 0
+        for species_value, species_number in enumerate(update[2:]):
+            if species_number:
+                if number:
+                    err_msg = f"More than one species in one cell ({update})!"
+                    logger.error(err_msg)
+                    raise MapCorruptedException(err_msg)
+                species, number = SPECIES_BY_VALUE[species_value], species_number
+        return species, number
+
+    @abstractmethod
+    def _set_cell(self, x: int, y: int, species: Species, number: int):
+        """Store `number` persons of `species` in cell (x, y) (Species.NONE and 0 for an empty cell)"""
+        pass
+
+    def apply_moves(self, moves: Iterable[Tuple[int, int, int, int, int]], battle_policy: BattlePolicy = MINMAX):
+        """Apply the moves of one species in place (see transition.compute_transition)"""
+        for x, y, species, number in compute_transition(self, moves, battle_policy):
+            self._set_cell(x, y, species, number)
+
+    def apply_move(self, move: Tuple[int, int, int, int, int]):
+        """Apply a move in place, battles being resolved with BattleComputer.compute_battle_for_minmax"""
+        self.apply_moves((move,))
+
+    @property
+    def neighbour_table(self) -> NeighbourTable:
+        """Precomputed neighbours of each cell (shared by all the maps of the same size)"""
+        return get_neighbour_table(self._n, self._m)
 
     def get_possible_moves(self, position: Tuple[int, int], force_move: bool = False,
                            forbidden_positions: Set[Tuple[int, int]] = None) -> List[Tuple[int, int]]:
@@ -68,19 +104,10 @@ class AbstractGameMap(ABC):
         :param force_move: if True, (x,y) is not returned in the list of possibilities.
         :param forbidden_positions: optional set of forbidden position
         """
-        forbidden_positions = forbidden_positions or set()
-        x, y = position
-        range_x = self._get_move_range(x, self.m)
-        range_y = self._get_move_range(y, self.n)
-        positions_set = set()
-        for shift_x in range(*range_x):
-            for shift_y in range(*range_y):
-                positions_set.add((x + shift_x, y + shift_y))
-        if force_move:
-            positions_set.difference_update({position})
-        assert 4 - int(force_move) <= len(positions_set) <= 9 - int(force_move)
-        positions_set -= forbidden_positions
-        return list(positions_set)
+        possible_moves = self.neighbour_table.get_possible_moves(position, force_move)
+        if forbidden_positions:
+            return [move for move in possible_moves if move not in forbidden_positions]
+        return list(possible_moves)
 
     @property
     def positions(self):
@@ -112,39 +139,54 @@ class AbstractGameMap(ABC):
         pass
 
     @abstractmethod
-    def species_position_generator(self, species: Species) -> Generator:
+    def _get_sorted_groups(self, species: Species) -> List[Tuple[Tuple[int, int], int]]:
+        """Groups ((x, y), number) of a species, line by line (same order as np.nonzero on a species map)"""
         pass
 
+    def species_position_generator(self, species: Species) -> Generator:
+        for position, _number in self._get_sorted_groups(species):
+            yield position
+
     def find_species_position(self, species: Species) -> List[Tuple[int, int]]:
         """Given a species, returns the list of positions where this species lives"""
         species_positions = list(self.species_position_generator(species))
-        logger.debug(f"Positions of {species.name}: {species_positions}")
+        logger.debug("Positions of %s: %s", species.name, species_positions)
         return species_positions
 
-    @abstractmethod
     def species_position_and_number_generator(self, species: Species) -> Generator:
-        pass
+        yield from self._get_sorted_groups(species)
 
     def find_species_position_and_number(self, species: Species) -> List[Tuple[Tuple[int, int], int]]:
         """Given a species, returns the list of positions and number where this species lives"""
         return list(self.species_position_and_number_generator(species))
 
+    def get_spatial_index(self, species: Species) -> SpatialIndex:
+        """Groups of a species indexed by position, for nearest groups queries"""
+        # WARN: not optimized: built at each call, to be overridden
+        return SpatialIndex.from_groups(self.species_position_and_number_generator(species))
+
     def count_species(self, species) -> int:
         # WARN: not optimized: to be overridden
         return sum(nb for _pos, nb in self.species_position_and_number_generator(species))
 
     @property
     def is_game_over(self) -> bool:
-        return bool(len(self.find_species_position(Species.VAMPIRE))
-                    * len(self.find_species_position(Species.WEREWOLF)))
+        return bool(self.count_species(Species.VAMPIRE) and self.count_species(Species.WEREWOLF))
+
+    def game_over(self) -> Tuple[bool, Species]:
+        # also returns the winning specie
+        if not self.count_species(Species.VAMPIRE):
+            return True, Species.WEREWOLF
+        elif not self.count_species(Species.WEREWOLF):
+            return True, Species.VAMPIRE
+        else:
+            return False, None
 
     @property
     def winning_species(self) -> Species:
-        vampires_pos = self.find_species_position(Species.VAMPIRE)
-        werewolves_pos = self.find_species_position(Species.WEREWOLF)
-        if not len(vampires_pos):
+        if not self.count_species(Species.VAMPIRE):
             winner = Species.WEREWOLF
-        elif not len(werewolves_pos):
+        elif not self.count_species(Species.WEREWOLF):
             winner = Species.VAMPIRE
         else:
             winner = Species.NONE
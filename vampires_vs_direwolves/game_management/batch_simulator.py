@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from typing import Callable, Dict, List, Tuple, Type
+
+import numpy as np
+
+from battle_computer.battle_policies import EXPECTATION, BattlePolicy, RandomBattlePolicy
+from boutchou.rules_sequence import RulesSequence
+from common.models import Species
+from game_management.game_map import GameMap
+
+Move = Tuple[int, int, int, int, int]
+Policy = Callable[['BatchSimulator', Species], List[List[Move]]]
+
+
+class BatchSimulator:
+    """B games played simultaneously, stored as a (B, n, m, 3) array of [humans, vampires, werewolves] cells.
+
+    Moves of all games are applied in one vectorized step, without any server nor socket.
+    Moves are not checked: they must respect the game rules (see rule_checks.check_movements).
+    Battles are resolved by a battle policy: random by default, as on the server (see battle_computer.battle_policies).
+
+    >>> simulator = BatchSimulator.from_game_map(game_map, batch_size=1000, seed=0)
+    >>> simulator.run({Species.VAMPIRE: ai_policy(ExpertAI), Species.WEREWOLF: ai_policy(AlphaBetaAI)})
+    """
+
+    def __init__(self, boards: np.ndarray, seed=None, use_expectation=False, battle_policy: BattlePolicy = None):
+        assert boards.ndim == 4 and boards.shape[3] == 3, f"Bad boards shape: {boards.shape}"
+        self._boards = boards.astype(np.int32)
+        if battle_policy is None:
+            battle_policy = EXPECTATION if use_expectation else RandomBattlePolicy(np.random.default_rng(seed))
+        self._battle_policy = battle_policy
+        self._winners = np.full(len(boards), int(Species.NONE))
+        self._is_over = np.zeros(len(boards), dtype=bool)
+        self._nb_rounds = np.zeros(len(boards), dtype=int)
+        self._update_game_over()
+
+    @classmethod
+    def from_game_map(cls, game_map: GameMap, batch_size: int, **kwargs) -> 'BatchSimulator':
+        return cls(np.repeat(game_map.map_table[None], batch_size, axis=0), **kwargs)
+
+    boards = property(lambda self: self._boards)
+    batch_size = property(lambda self: self._boards.shape[0])
+    n = property(lambda self: self._boards.shape[1])
+    m = property(lambda self: self._boards.shape[2])
+    is_over = property(lambda self: self._is_over)  # games over
+    winners = property(lambda self: self._winners)  # winning species values (Species.NONE if no winner yet)
+    nb_rounds = property(lambda self: self._nb_rounds)  # number of steps played by each game
+
+    def get_game_map(self, index: int) -> GameMap:
+        """GameMap copy of one of the games"""
+        board = self._boards[index].astype(int)
+        game_map = GameMap()
+        game_map.load_board(self.n, self.m, board, board[:, :, 0], board[:, :, 1], board[:, :, 2])
+        return game_map
+
+    def count_species(self, species: Species) -> np.ndarray:
+        return self._boards[:, :, :, int(species)].sum(axis=(1, 2))
+
+    def _update_game_over(self):
+        no_vampires = self.count_species(Species.VAMPIRE) == 0
+        no_werewolves = self.count_species(Species.WEREWOLF) == 0
+        new_over = ~self._is_over & (no_vampires | no_werewolves)
+        # same order as AbstractGameMap.winning_species
+        self._winners[new_over] = np.where(no_vampires[new_over], int(Species.WEREWOLF), int(Species.VAMPIRE))
+        self._is_over |= new_over
+
+    def step(self, moves: List[List[Move]], species: Species) -> np.ndarray:
+        """Apply a list of moves of `species` for each game (moves of games already over are ignored).
+
+        :return: boolean array of the games over
+        """
+        assert len(moves) == self.batch_size, f"Expected {self.batch_size} move lists, got {len(moves)}"
+        ls_moves = [(i, *move) for i, game_moves in enumerate(moves) if not self._is_over[i] for move in game_moves]
+        self._nb_rounds[~self._is_over] += 1
+        if not ls_moves:
+            return self._is_over
+        games, x0, y0, numbers, x1, y1 = np.array(ls_moves, dtype=int).T
+        species_index = int(species)
+
+        # same single pass as transition.compute_transition, for all the games at once:
+        # departures, then arrivals grouped by destination cell (rule #5: a cell can not be both)
+        np.subtract.at(self._boards, (games, y0, x0, species_index), numbers)
+        arrivals = np.zeros(self._boards.shape[:3], dtype=int)
+        np.add.at(arrivals, (games, y1, x1), numbers)
+        cells = np.nonzero(arrivals)
+
+        defenders = self._boards[cells]
+        defender_numbers = defenders.sum(axis=1)
+        defender_species = np.where(defender_numbers > 0, defenders.argmax(axis=1), int(Species.NONE))
+        result_species, result_numbers = self._battle_policy.resolve(species_index, arrivals[cells], defender_species,
+                                                                     defender_numbers)
+        self._boards[cells] = 0
+        alive = result_species != Species.NONE
+        self._boards[tuple(index[alive] for index in cells) + (result_species[alive],)] = result_numbers[alive]
+
+        self._update_game_over()
+        return self._is_over
+
+    def run(self, policies: Dict[Species, Policy], starting_species: Species = Species.VAMPIRE,
+            max_rounds: int = 200) -> np.ndarray:
+        """Play all the games until they are over or `max_rounds` rounds are played.
+
+        :param policies: function giving the moves of all the games, for each species
+        :return: winning species values (Species.NONE for games not over)
+        """
+        species_order = (starting_species, starting_species.get_opposite_species())
+        for _round in range(max_rounds):
+            for species in species_order:
+                if self._is_over.all():
+                    return self._winners
+                self.step(policies[species](self, species), species)
+        return self._winners
+
+
+def ai_policy(ai_class: Type['AbstractAI'], *args, **kwargs) -> Policy:
+    """Policy playing each game of a simulator with its own instance of an AI"""
+    ais = {}
+
+    def policy(simulator: BatchSimulator, species: Species) -> List[List[Move]]:
+        moves = []
+        for i in range(simulator.batch_size):
+            if simulator.is_over[i]:
+                moves.append([])
+                continue
+            if (i, species) not in ais:
+                ai = ai_class(*args, **kwargs)
+                if isinstance(ai, RulesSequence):
+                    ai.wait_time = 0  # headless games: no need to wait
+                ais[i, species] = ai
+            ai = ais[i, species]
+            ai.load_map(simulator.get_game_map(i))
+            ai.load_species(species)
+            moves.append(ai.generate_move())
+        return moves
+
+    return policy
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Binary board format, to send boards to other processes or write them to disk.
+
+A board is a header (magic, format version, encoding, n, m) followed by either:
+- DENSE: the uint8 planes of CompactGameMap, number of persons then species value of each cell
+- SPARSE: the number of groups (uint16) then one (x, y, species, number) record per group, line by line,
+  numbers being uint16
+
+Dense boards are decoded without copy from any buffer (bytes, bytearray, memoryview, mmap):
+the planes of the CompactGameMap returned by from_buffer are views of the buffer (read-only for bytes or mmap
+opened for reading). Use its copy() to modify it.
+
+Groups of more than 255 persons do not fit in the uint8 planes: such boards are always SPARSE,
+and must be decoded as GameMap with decode_game_map.
+"""
+import struct
+from typing import Generator, Tuple, Union
+
+import numpy as np
+
+from common.exceptions import GameMapOverPopulated, MapCorruptedException
+from common.models import Species
+from game_management.abstract_game_map import AbstractGameMap
+from game_management.compact_game_map import CompactGameMap
+from game_management.game_map import GameMap
+
+MAGIC = b"VVWB"
+FORMAT_VERSION = 2
+DENSE = 0
+SPARSE = 1
+
+_HEADER = struct.Struct("<4sBBHH")  # magic, format version, encoding, n, m
+_GROUP_COUNT = struct.Struct("<H")
+_GROUP_DTYPE = np.dtype([("x", "<u2"), ("y", "<u2"), ("species", "u1"), ("number", "<u2")])
+MAX_DENSE_NUMBER = 255
+MAX_SPARSE_NUMBER = 65535
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def get_encoded_size(n: int, m: int, encoding: int = DENSE, nb_groups: int = 0) -> int:
+    if encoding == DENSE:
+        return _HEADER.size + 2 * n * m
+    return _HEADER.size + _GROUP_COUNT.size + nb_groups * _GROUP_DTYPE.itemsize
+
+
+def to_bytes(game_map: AbstractGameMap, encoding: int = None) -> bytes:
+    """Encode a board (encoding: DENSE, SPARSE, or None for the smallest one, SPARSE for groups over 255)"""
+    groups = [(x, y, species, number)
+              for species in (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF)
+              for (x, y), number in game_map.species_position_and_number_generator(species)]
+    max_number = max((group[3] for group in groups), default=0)
+    if max_number > MAX_SPARSE_NUMBER:
+        raise GameMapOverPopulated(f"Groups of more than {MAX_SPARSE_NUMBER} persons can not be encoded: {max_number}")
+    groups = np.array(groups, dtype=_GROUP_DTYPE)
+    groups = groups[np.lexsort((groups["x"], groups["y"]))]
+    if encoding is None:
+        dense_size = get_encoded_size(game_map.n, game_map.m, DENSE)
+        encoding = (DENSE if max_number <= MAX_DENSE_NUMBER
+                    and dense_size <= get_encoded_size(game_map.n, game_map.m, SPARSE, len(groups)) else SPARSE)
+    elif encoding == DENSE and max_number > MAX_DENSE_NUMBER:
+        raise GameMapOverPopulated(f"Groups of more than {MAX_DENSE_NUMBER} persons can only be encoded as SPARSE "
+                                   f"boards: {max_number}")
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, encoding, game_map.n, game_map.m)
+    if encoding == SPARSE:
+        return header + _GROUP_COUNT.pack(len(groups)) + groups.tobytes()
+    count_map = np.zeros((game_map.n, game_map.m), np.uint8)
+    species_map = np.full((game_map.n, game_map.m), int(Species.NONE), np.uint8)
+    count_map[groups["y"], groups["x"]] = groups["number"]
+    species_map[groups["y"], groups["x"]] = groups["species"]
+    return header + count_map.tobytes() + species_map.tobytes()
+
+
+def _read_header(buffer: Buffer, offset: int) -> Tuple[int, int, int]:
+    magic, format_version, encoding, n, m = _HEADER.unpack_from(buffer, offset)
+    if magic != MAGIC or format_version != FORMAT_VERSION or encoding not in (DENSE, SPARSE):
+        raise MapCorruptedException(f"Invalid board header at offset {offset}: {magic}, {format_version}, {encoding}")
+    return encoding, n, m
+
+
+def _read_groups(buffer: Buffer, offset: int) -> Tuple[np.ndarray, int]:
+    """Records of the groups of a SPARSE board (offset after its header), with the offset of the next board"""
+    nb_groups, = _GROUP_COUNT.unpack_from(buffer, offset)
+    offset += _GROUP_COUNT.size
+    groups = np.frombuffer(buffer, dtype=_GROUP_DTYPE, count=nb_groups, offset=offset)
+    return groups, offset + nb_groups * _GROUP_DTYPE.itemsize
+
+
+def _decode(buffer: Buffer, offset: int = 0) -> Tuple[CompactGameMap, int]:
+    """Decode the board at offset, and return it with the offset of the next board"""
+    encoding, n, m = _read_header(buffer, offset)
+    if encoding == DENSE:
+        planes = np.frombuffer(buffer, dtype=np.uint8, count=2 * n * m, offset=offset + _HEADER.size).reshape(2, n, m)
+        return (CompactGameMap.from_planes(n, m, planes[0], planes[1], copy=False),
+                offset + _HEADER.size + 2 * n * m)
+    groups, next_offset = _read_groups(buffer, offset + _HEADER.size)
+    if len(groups) and groups["number"].max() > MAX_DENSE_NUMBER:
+        raise GameMapOverPopulated(f"Board at offset {offset} has groups of more than {MAX_DENSE_NUMBER} persons: "
+                                   f"decode it with decode_game_map")
+    count_map = np.zeros((n, m), np.uint8)
+    species_map = np.full((n, m), int(Species.NONE), np.uint8)
+    count_map[groups["y"], groups["x"]] = groups["number"]
+    species_map[groups["y"], groups["x"]] = groups["species"]
+    return CompactGameMap.from_planes(n, m, count_map, species_map, copy=False), next_offset
+
+
+def from_buffer(buffer: Buffer, offset: int = 0) -> CompactGameMap:
+    """Decode a board (without copy for dense boards), raises GameMapOverPopulated for groups over 255"""
+    return _decode(buffer, offset)[0]
+
+
+def decode_game_map(buffer: Buffer, offset: int = 0) -> GameMap:
+    """Decode a board as a new GameMap, whatever the size of its groups"""
+    encoding, n, m = _read_header(buffer, offset)
+    if encoding == DENSE:
+        return to_game_map(from_buffer(buffer, offset))
+    groups, _next_offset = _read_groups(buffer, offset + _HEADER.size)
+    map_table = np.zeros((n, m, 3), int)
+    map_table[groups["y"], groups["x"], groups["species"]] = groups["number"]
+    return _from_map_table(n, m, map_table)
+
+
+def read_boards(buffer: Buffer) -> Generator[CompactGameMap, None, None]:
+    """Decode consecutive boards, e.g. a replay log made of to_bytes results"""
+    offset = 0
+    while offset < len(buffer):
+        board, offset = _decode(buffer, offset)
+        yield board
+
+
+def to_game_map(game_map: AbstractGameMap) -> GameMap:
+    """GameMap copy of a decoded board"""
+    compact = game_map if isinstance(game_map, CompactGameMap) else CompactGameMap.from_game_map(game_map)
+    map_table = np.zeros((compact.n, compact.m, 3), int)
+    rows, columns = np.nonzero(compact.species_map != Species.NONE)
+    map_table[rows, columns, compact.species_map[rows, columns]] = compact.count_map[rows, columns]
+    return _from_map_table(compact.n, compact.m, map_table)
+
+
+def _from_map_table(n: int, m: int, map_table: np.ndarray) -> GameMap:
+    new_map = GameMap()
+    new_map.load_board(n, m, map_table, map_table[:, :, 0], map_table[:, :, 1], map_table[:, :, 2])
+    return new_map
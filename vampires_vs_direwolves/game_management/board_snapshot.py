@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from common.exceptions import GameMapOverPopulated
+from common.models import Species
+from game_management.abstract_game_map import AbstractGameMap
+
+COMPACTION_DEPTH = 16  # maximal length of a chain of snapshots
+
+
+class BoardSnapshot(AbstractGameMap):
+    """Persistent board sharing its cells with its ancestors: a snapshot only stores the cells changed
+    since its parent {(x, y): (species, number)}, the root snapshot storing all the occupied cells.
+
+    Children are created with `child` (or `copy`, so that compute_new_board works on snapshots):
+
+    >>> root = BoardSnapshot.from_game_map(game_map)
+    >>> boards = [compute_new_board(root, move) for move in moves]  # 2 cells stored by board
+
+    WARN: a snapshot must not be modified (update, apply_move) once it has children.
+    A child of a snapshot deeper than COMPACTION_DEPTH is created over a flattened copy of it (shared by siblings),
+    so that cell lookups stay cheap.
+    The flattened cells and the dense array are built on demand and cached until the next change; the cells of
+    a child are built from the cached cells of its nearest ancestor.
+    """
+
+    def __init__(self, parent: 'BoardSnapshot' = None):
+        super().__init__()
+        self._parent = parent
+        self._changes: Dict[Tuple[int, int], Tuple[Species, int]] = {}
+        self._compacted: Union['BoardSnapshot', None] = None  # flattened copy, parent of the children
+        self._cells: Union[Dict[Tuple[int, int], Tuple[Species, int]], None] = None
+        self._dense = None
+        if parent is None:
+            self._depth = 0
+            self._totals = [0, 0, 0]  # number of [humans, vampires, werewolves]
+        else:
+            self._n, self._m, self._nb_updates = parent.n, parent.m, parent.update_number
+            self._depth = parent._depth + 1
+            self._totals = parent._totals.copy()
+
+    def load_map(self, n: int, m: int):
+        self._parent = None
+        self._changes = {}
+        self._compacted = None
+        self._cells = None
+        self._dense = None
+        self._depth = 0
+        self._totals = [0, 0, 0]
+        super().load_map(n, m)
+
+    def load_board(self, n: int, m: int, cells: Dict[Tuple[int, int], Tuple[Species, int]]):
+        self.load_map(n, m)
+        for (x, y), (species, number) in cells.items():
+            self._set_cell(x, y, species, number)
+
+    def save_board(self):
+        return self.n, self.m, self._get_cells()
+
+    @classmethod
+    def from_game_map(cls, game_map: AbstractGameMap) -> 'BoardSnapshot':
+        snapshot = cls()
+        snapshot.load_map(game_map.n, game_map.m)
+        for species in (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF):
+            for (x, y), number in game_map.species_position_and_number_generator(species):
+                snapshot._set_cell(x, y, species, number)
+        return snapshot
+
+    depth = property(lambda self: self._depth)  # number of ancestors
+
+    def child(self) -> 'BoardSnapshot':
+        if self._depth < COMPACTION_DEPTH:
+            return BoardSnapshot(self)
+        if self._compacted is None:
+            self._compacted = BoardSnapshot()
+            self._compacted.load_board(self.n, self.m, self._get_cells())
+            self._compacted._nb_updates = self._nb_updates
+        return BoardSnapshot(self._compacted)
+
+    copy = child
+
+    def _get_cells(self) -> Dict[Tuple[int, int], Tuple[Species, int]]:
+        """Occupied cells of the board (cached, must not be modified)"""
+        if self._cells is None:
+            chain = []
+            snapshot = self
+            while snapshot is not None and snapshot._cells is None:
+                chain.append(snapshot._changes)
+                snapshot = snapshot._parent
+            cells = {} if snapshot is None else snapshot._cells.copy()
+            for changes in reversed(chain):
+                for position, cell in changes.items():
+                    if cell[1]:
+                        cells[position] = cell
+                    else:
+                        cells.pop(position, None)
+            self._cells = cells
+        return self._cells
+
+    def to_dense(self) -> np.ndarray:
+        """Board as a (n, m, 3) array of [humans, vampires, werewolves] cells, like GameMap.map_table (cached)"""
+        if self._dense is None:
+            self._dense = np.zeros((self.n, self.m, 3), int)
+            for (x, y), (species, number) in self._get_cells().items():
+                self._dense[y, x, int(species)] = number
+        return self._dense
+
+    map_table = property(to_dense)
+    human_map = property(lambda self: self.to_dense()[:, :, int(Species.HUMAN)])
+    vampire_map = property(lambda self: self.to_dense()[:, :, int(Species.VAMPIRE)])
+    werewolf_map = property(lambda self: self.to_dense()[:, :, int(Species.WEREWOLF)])
+
+    def get_cell_species_and_number(self, position: Tuple[int, int]) -> Tuple[Species, int]:
+        position = tuple(position)
+        snapshot = self
+        while snapshot is not None:
+            cell = snapshot._changes.get(position)
+            if cell is not None:
+                return cell
+            snapshot = snapshot._parent
+        return Species.NONE, 0
+
+    def get_cell_species_count(self, position: Tuple[int, int], species: Union[Species, int]) -> int:
+        cell_species, number = self.get_cell_species_and_number(position)
+        return number if cell_species == species else 0
+
+    def _get_sorted_groups(self, species: Species) -> List[Tuple[Tuple[int, int], int]]:
+        return sorted(((position, number) for position, (cell_species, number) in self._get_cells().items()
+                       if cell_species == species), key=lambda item: (item[0][1], item[0][0]))
+
+    def count_species(self, species) -> int:
+        return self._totals[int(species)]
+
+    def _set_cell(self, x: int, y: int, species: Species, number: int):
+        if number > 255:
+            raise GameMapOverPopulated(f"Too much population in cell ({x}, {y}): {number}")
+        position = (int(x), int(y))
+        old_species, old_number = self.get_cell_species_and_number(position)
+        self._cells = None
+        self._dense = None
+        if old_number:
+            self._totals[old_species] -= old_number
+        if number:
+            self._totals[species] += number
+            self._changes[position] = (species, number)
+        elif self._parent is None:
+            self._changes.pop(position, None)
+        else:
+            self._changes[position] = (Species.NONE, 0)  # hides the cell of the ancestors
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from common.exceptions import GameMapOverPopulated
+from common.models import SPECIES_BY_VALUE, Species
+from game_management.abstract_game_map import AbstractGameMap
+
+
+class CompactGameMap(AbstractGameMap):
+    """Game map storage is two uint8 numpy arrays of shape (n, m):
+    the number of persons in each cell, and the species value of each cell (Species.NONE if empty).
+
+    A board takes 2 bytes per cell (48 for GameMap).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._species_map = None
+
+    def load_map(self, n: int, m: int):
+        self._map_table = np.zeros((n, m), np.uint8)
+        self._species_map = np.full((n, m), int(Species.NONE), np.uint8)
+        super().load_map(n, m)
+
+    def load_board(self, n: int, m: int, count_map, species_map):
+        self._map_table = np.array(count_map, np.uint8)
+        self._species_map = np.array(species_map, np.uint8)
+        super().load_map(n, m)
+
+    @classmethod
+    def from_planes(cls, n: int, m: int, count_map: np.ndarray, species_map: np.ndarray,
+                    copy=True) -> 'CompactGameMap':
+        """Board from its uint8 planes (without copy: the board shares the arrays, e.g. views of a buffer)"""
+        if copy:
+            new_map = cls()
+            new_map.load_board(n, m, count_map, species_map)
+            return new_map
+        new_map = cls()
+        new_map._map_table = count_map
+        new_map._species_map = species_map
+        AbstractGameMap.load_map(new_map, n, m)
+        return new_map
+
+    def save_board(self):
+        return self.n, self.m, self._map_table, self._species_map
+
+    def copy(self) -> 'CompactGameMap':
+        new_map = CompactGameMap()
+        new_map.load_board(*self.save_board())
+        new_map._nb_updates = self._nb_updates
+        return new_map
+
+    @classmethod
+    def from_game_map(cls, game_map: AbstractGameMap) -> 'CompactGameMap':
+        new_map = cls()
+        new_map.load_map(game_map.n, game_map.m)
+        for species in (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF):
+            for (x, y), number in game_map.species_position_and_number_generator(species):
+                new_map._map_table[y, x] = number
+                new_map._species_map[y, x] = species
+        return new_map
+
+    @property
+    def count_map(self):
+        """Number of persons in each cell"""
+        return self._map_table
+
+    @property
+    def species_map(self):
+        """Species value of each cell"""
+        return self._species_map
+
+    def _get_species_map(self, species: Species):
+        """Number of persons of a species in each cell (new int array, like GameMap: no uint8 wrap around)"""
+        return np.where(self._species_map == species, self._map_table.astype(int), 0)
+
+    @property
+    def vampire_map(self):
+        return self._get_species_map(Species.VAMPIRE)
+
+    @property
+    def werewolf_map(self):
+        return self._get_species_map(Species.WEREWOLF)
+
+    @property
+    def human_map(self):
+        return self._get_species_map(Species.HUMAN)
+
+    def get_cell_species_and_number(self, position: Tuple[int, int]) -> Tuple[Species, int]:
+        x, y = position
+        return SPECIES_BY_VALUE[self._species_map[y, x]], int(self._map_table[y, x])
+
+    def get_cell_species_count(self, position: Tuple[int, int], species: Union[Species, int]) -> int:
+        x, y = position
+        return int(self._map_table[y, x]) if self._species_map[y, x] == species else 0
+
+    def _get_sorted_groups(self, species: Species) -> List[Tuple[Tuple[int, int], int]]:
+        rows, columns = np.nonzero(self._species_map == species)
+        return [((x, y), number) for x, y, number in zip(columns.tolist(), rows.tolist(),
+                                                        self._map_table[rows, columns].tolist())]
+
+    def count_species(self, species) -> int:
+        return int(self._map_table[self._species_map == species].sum())
+
+    def _set_cell(self, x: int, y: int, species: Species, number: int):
+        if number > 255:
+            raise GameMapOverPopulated(f"Too much population in cell ({x}, {y}): {number}")
+        self._map_table[y, x] = number
+        self._species_map[y, x] = species if number else Species.NONE
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import heapq
+import weakref
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from common.models import Species
+from game_management.abstract_game_map import AbstractGameMap
+
+Position = Tuple[int, int]
+
+UNREACHABLE = 1 << 30  # distance of the cells without safe route
+DANGER_COST = 4  # extra cost of a cell where an enemy group can attack with a certain victory
+
+
+class DistanceField:
+    """Shortest safe routes from a group to every cell, avoiding:
+    - obstacles: overcrowded human houses (as many humans as the group) and enemy groups the group can not beat surely
+    - when possible, danger zones (cost DANGER_COST): cells next to an enemy group certain to win if it attacks
+    """
+    __slots__ = ("source", "number", "costs", "distances", "_first_steps", "_m")
+
+    def __init__(self, source: Position, number: int, costs: np.ndarray, distances: np.ndarray,
+                 first_steps: np.ndarray):
+        self.source = source
+        self.number = number  # number of persons of the group the field was computed for
+        self.costs = costs  # (n, m) cost of entering each cell (UNREACHABLE for obstacles)
+        self.distances = distances  # (n, m) cost of the safest route to each cell (UNREACHABLE if blocked)
+        self._first_steps = first_steps  # (n, m) flat index of the first move of the route to each cell
+        self._m = distances.shape[1]
+
+    def get_distance(self, target: Position) -> int:
+        return int(self.distances[target[1], target[0]])
+
+    def is_reachable(self, target: Position) -> bool:
+        return self.distances[target[1], target[0]] < UNREACHABLE
+
+    def get_next_step(self, target: Position) -> Optional[Position]:
+        """First move of the safest route to the target (None if unreachable or target is the source)"""
+        if not self.is_reachable(target) or tuple(target) == self.source:
+            return None
+        index = int(self._first_steps[target[1], target[0]])
+        return index % self._m, index // self._m
+
+
+def _compute_costs(game_map: AbstractGameMap, species: Species, number: int) -> np.ndarray:
+    """Cost of entering each cell for a group of `number` persons (UNREACHABLE for obstacles)"""
+    costs = np.ones((game_map.n, game_map.m), dtype=np.int64)
+    enemy_species = species.get_opposite_species()
+    for (x, y), enemy_number in game_map.species_position_and_number_generator(enemy_species):
+        if enemy_number >= 1.5 * number:  # the enemy can attack with a certain victory
+            costs[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2] += DANGER_COST
+    for (x, y), enemy_number in game_map.species_position_and_number_generator(enemy_species):
+        if number < 1.5 * enemy_number:  # no certain victory against this group
+            costs[y, x] = UNREACHABLE
+    for (x, y), human_number in game_map.species_position_and_number_generator(Species.HUMAN):
+        if human_number >= number:  # overcrowded house
+            costs[y, x] = UNREACHABLE
+    return costs
+
+
+def _get_size_class(game_map: AbstractGameMap, species: Species, number: int) -> Tuple[int, int, int]:
+    """Numbers of (dangerous enemy groups, enemy obstacles, overcrowded houses) for a group of `number` persons.
+    Each test of _compute_costs is monotonic in `number`: groups of the same size class have the same costs.
+    """
+    enemy_numbers = np.fromiter((enemy_number for _position, enemy_number in
+                                 game_map.species_position_and_number_generator(species.get_opposite_species())),
+                                dtype=np.int64)
+    human_numbers = np.fromiter((human_number for _position, human_number in
+                                 game_map.species_position_and_number_generator(Species.HUMAN)), dtype=np.int64)
+    return (int(np.count_nonzero(enemy_numbers >= 1.5 * number)),
+            int(np.count_nonzero(number < 1.5 * enemy_numbers)),
+            int(np.count_nonzero(human_numbers >= number)))
+
+
+def compute_distance_field(game_map: AbstractGameMap, species: Species, source: Position,
+                           number: int) -> DistanceField:
+    """Dijkstra from a group of `number` persons of a species at `source`"""
+    n, m = game_map.n, game_map.m
+    costs = _compute_costs(game_map, species, number)
+    flat_moves = game_map.neighbour_table.flat_moves
+    source_index = int(source[1]) * m + int(source[0])
+    distances = np.full(n * m, UNREACHABLE, dtype=np.int64)
+    first_steps = np.full(n * m, -1, dtype=np.int64)
+    distances[source_index] = 0
+    flat_costs = costs.ravel()
+    heap = [(0, source_index, source_index)]
+    while heap:
+        distance, index, first_step = heapq.heappop(heap)
+        if distance > distances[index]:
+            continue
+        for next_index in flat_moves[index]:
+            if flat_costs[next_index] >= UNREACHABLE:
+                continue
+            next_distance = distance + flat_costs[next_index]
+            if next_distance < distances[next_index]:
+                distances[next_index] = next_distance
+                first_steps[next_index] = next_index if index == source_index else first_step
+                heapq.heappush(heap, (next_distance, next_index, first_steps[next_index]))
+    return DistanceField((int(source[0]), int(source[1])), int(number), costs, distances.reshape(n, m),
+                         first_steps.reshape(n, m))
+
+
+class _MapFields:
+    """Distance fields of a game map, valid for one version of the map"""
+    __slots__ = ("version", "fields")
+
+    def __init__(self, version):
+        self.version = version  # GameMap.version, or the groups of the board for maps without version
+        self.fields: Dict[Tuple[Species, Position, Tuple[int, int, int]], DistanceField] = {}  # size class keys
+
+
+class DistanceFieldService:
+    """Cache of the distance fields of each game map.
+
+    Fields are shared by the groups of the same size class at a position (see _get_size_class), so that
+    a group keeps its field while its number changes without crossing a threshold.
+    When a GameMap changes, only the fields whose costs changed around the changed cells are dropped
+    (see GameMap.get_changed_cells_since). Other maps drop all their fields when their groups change.
+    """
+
+    def __init__(self):
+        self._maps = weakref.WeakKeyDictionary()  # game map -> _MapFields
+
+    @staticmethod
+    def _get_version(game_map: AbstractGameMap):
+        version = getattr(game_map, "version", None)
+        if version is not None:
+            return version
+        return tuple(tuple(game_map.species_position_and_number_generator(species))
+                     for species in (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF))
+
+    @staticmethod
+    def _get_dirty_region(game_map: AbstractGameMap, changed_cells: Set[Position]) -> np.ndarray:
+        """Cells whose cost may have changed: changed cells and their neighbours (danger zones)"""
+        region = np.zeros((game_map.n, game_map.m), dtype=bool)
+        for x, y in changed_cells:
+            region[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2] = True
+        return region
+
+    def _invalidate(self, game_map: AbstractGameMap, map_fields: _MapFields, version):
+        changed_cells = None
+        if hasattr(game_map, "get_changed_cells_since") and not isinstance(map_fields.version, tuple):
+            changed_cells = game_map.get_changed_cells_since(map_fields.version)
+        if changed_cells is None:
+            map_fields.fields = {}
+        elif changed_cells:
+            region = self._get_dirty_region(game_map, changed_cells)
+            new_costs = {}
+            fields = map_fields.fields
+            map_fields.fields = {}
+            for (species, source, _size_class), field in fields.items():
+                if (species, field.number) not in new_costs:
+                    new_costs[species, field.number] = _compute_costs(game_map, species, field.number)[region]
+                if np.array_equal(new_costs[species, field.number], field.costs[region]):
+                    # still valid, but the size classes may have changed with the groups
+                    map_fields.fields[species, source, _get_size_class(game_map, species, field.number)] = field
+        map_fields.version = version
+
+    def get_field(self, game_map: AbstractGameMap, species: Species, source: Position,
+                  number: int = None) -> DistanceField:
+        """Distance field of a group (`number` defaults to the number of persons at `source`)"""
+        version = self._get_version(game_map)
+        map_fields = self._maps.get(game_map)
+        if map_fields is None:
+            map_fields = self._maps[game_map] = _MapFields(version)
+        elif map_fields.version != version:
+            self._invalidate(game_map, map_fields, version)
+        if number is None:
+            number = game_map.get_cell_species_count(source, species)
+        key = (species, (int(source[0]), int(source[1])), _get_size_class(game_map, species, number))
+        if key not in map_fields.fields:
+            map_fields.fields[key] = compute_distance_field(game_map, species, source, number)
+        return map_fields.fields[key]
+
+
+distance_field_service = DistanceFieldService()  # shared by the rules of a process
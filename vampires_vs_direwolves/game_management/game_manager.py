@@ -3,7 +3,7 @@ import time
 from threading import Thread
 from typing import List, Tuple, Type
 
-from boutchou import *  # import all AIs
+from boutchou import AbstractAI, Boutchou
 from common.exceptions import GameProtocolException, PlayerTimeoutError
 from common.logger import logger
 from game_management.abstract_game_map import AbstractGameMap
@@ -28,7 +28,7 @@ class GameManager:
         self._client: Client = Client(config=server_config)
         self._ai: AbstractAI = ai_class()
         self._map: AbstractGameMap = map_class()
-        logger.debug(f"AI: {self._ai.__class__.__name__}, Map type: {self._map.__class__.__name__}")
+        logger.debug("AI: %s, Map type: %s", self._ai.__class__.__name__, self._map.__class__.__name__)
         self._species: Species = Species.NONE
         # noinspection PyTypeChecker
         self._initial_position: Tuple[int, int] = None
@@ -48,7 +48,7 @@ class GameManager:
             movements_export.extend(movement)
 
         self._client.send("MOV", len(movements), *movements_export)
-        logger.debug(f"{self._name}: Sent MOV command!")
+        logger.debug("%s: Sent MOV command!", self._name)
 
     def _get_int(self) -> int:
         return self._client.receive_int()
@@ -87,14 +87,8 @@ class GameManager:
 
     def _update(self):
         n = self._get_int()
-        changes = []
-        for i in range(n):
-            x = self._get_int()
-            y = self._get_int()
-            humans = self._get_int()
-            vampires = self._get_int()
-            werewolves = self._get_int()
-            changes.append((x, y, humans, vampires, werewolves))
+        values = self._client.receive_ints(5 * n)  # (x, y, humans, vampires, werewolves) of each cell
+        changes = [values[i:i + 5] for i in range(0, 5 * n, 5)]
         self._map.update(changes)
         return n, changes
 
@@ -128,10 +122,10 @@ class GameManager:
         return func()
 
     def _wait_server(self):
-        logger.debug(f"{self._species}: Waiting for server answer...")
+        logger.debug("%s: Waiting for server answer...", self._species)
         message = self._client.receive()
         command = Command.from_string(message)
-        logger.debug(f"{self._name}: Command received: '{command}'")
+        logger.debug("%s: Command received: '%s'", self._name, command)
         if command is None:
             return None
         self._execute_command(command)
@@ -164,10 +158,14 @@ class GameManager:
                     PlayerTimeoutError) as err:
                 logger.error(f"Connection error: {err}")
                 logger.exception(err)
-        logger.debug(f"{self._name}: GameManager closing...")
+            finally:
+                self._ai.close()
+        logger.debug("%s: GameManager closing...", self._name)
 
 
 if __name__ == '__main__':
+    from boutchou import MoveToBestHumans, RushToHumansAI
+
     while True:
         player1 = Thread(target=GameManager(player_name="Boutchou", ai_class=RushToHumansAI).start)
         player2 = Thread(target=GameManager(player_name="Boss", ai_class=MoveToBestHumans).start)
@@ -1,38 +1,194 @@
 # -*- coding: utf-8 -*-
-from typing import Generator, List, Tuple, Union
+from collections import deque
+from typing import Callable, Generator, Iterable, List, Optional, Set, Tuple, Union
 
 import numpy as np
 
-from battle_computer.battle_computer import BattleComputer
+from battle_computer.battle_policies import MINMAX, BattlePolicy
 from common.logger import logger
-from common.models import Singleton, Species
+from common.models import SPECIES_BY_VALUE, Singleton, Species
+from game_management import kernels
 from game_management.abstract_game_map import AbstractGameMap
+from game_management.spatial_index import SpatialIndex
+from game_management.transition import compute_transition
+
+_NONE = int(Species.NONE)
+
+CHANGES_HISTORY_SIZE = 32  # number of versions whose changed cells are kept
 
 
 class GameMap(AbstractGameMap):
     """Game map storage is a numpy array: [[[number of humans, number of vampires, number of werewolves], ...], ...]
     and three other numpy arrays of each character: [[number of persons, ...], ...]
+
+    Totals and occupied cells of each species are maintained on each cell change,
+    so that counts and game over tests do not scan the arrays.
+    The species value of each cell is also maintained (kernels.CORRUPTED if several species live in it),
+    so that decoding a cell is an array read. With `validate`, cells are decoded from the numbers of each species.
+
+    Each change (update or move) increases the version of the map and records the changed cells,
+    so that derived caches only recompute what the changes affect:
+    - either by calling get_changed_cells_since(their version)
+    - or by registering a listener called with (game map, changed cells) after each change,
+      changed cells being None when the whole map changed (load_map, load_board)
+    The spatial indexes are maintained by such a listener.
     """
 
-    def __init__(self):
+    def __init__(self, validate: bool = False):
         super().__init__()
+        self._validate = validate
+        self._species_map = None
         self._human_map = None
         self._vampire_map = None
         self._werewolf_map = None
+        self._totals: List[int] = [0, 0, 0]  # number of [humans, vampires, werewolves]
+        self._occupied: Tuple[Set[Tuple[int, int]], ...] = (set(), set(), set())  # positions (x, y) of each species
+        self._sorted_positions: List[Union[List[Tuple[int, int]], None]] = [None, None, None]  # cache, line by line
+        self._spatial_indexes: Union[Tuple[SpatialIndex, ...], None] = None  # built on demand, then maintained
+        self._version = 0
+        self._changes_history = deque(maxlen=CHANGES_HISTORY_SIZE)  # (version, changed cells)
+        self._listeners: List[Callable[['GameMap', Optional[Set[Tuple[int, int]]]], None]] = [
+            GameMap._refresh_spatial_indexes]
 
     def load_map(self, n: int, m: int):
         self._map_table = np.zeros((n, m, 3), int)
         self._human_map = np.zeros((n, m), int)
         self._vampire_map = np.zeros((n, m), int)
         self._werewolf_map = np.zeros((n, m), int)
+        self._compute_aggregates()
         super().load_map(n, m)
+        self._notify_listeners(None)
 
     def load_board(self, n: int, m: int, map_table, human_map, vampire_map, werewolf_map):
         self._map_table = np.copy(map_table)
         self._human_map = np.copy(human_map)
         self._vampire_map = np.copy(vampire_map)
         self._werewolf_map = np.copy(werewolf_map)
+        self._compute_aggregates()
         super().load_map(n, m)
+        self._notify_listeners(None)
+
+    def copy(self) -> 'GameMap':
+        """Copy of the board (as a GameMap), aggregates included"""
+        new_map = GameMap(self._validate)
+        new_map._n, new_map._m = self._n, self._m
+        new_map._map_table = self._map_table.copy()
+        new_map._species_map = self._species_map.copy()
+        new_map._human_map = self._human_map.copy()
+        new_map._vampire_map = self._vampire_map.copy()
+        new_map._werewolf_map = self._werewolf_map.copy()
+        new_map._totals = self._totals.copy()
+        new_map._occupied = tuple(positions.copy() for positions in self._occupied)
+        new_map._sorted_positions = self._sorted_positions.copy()
+        new_map._version = self._version  # but no history nor other listeners
+        return new_map
+
+    version = property(lambda self: self._version)  # increased by each change of the map
+
+    @property
+    def changed_cells(self) -> Set[Tuple[int, int]]:
+        """Cells changed by the last change of the map"""
+        if self._changes_history and self._changes_history[-1][0] == self._version:
+            return self._changes_history[-1][1]
+        return set()
+
+    def get_changed_cells_since(self, version: int) -> Optional[Set[Tuple[int, int]]]:
+        """Cells changed after a version of the map (None if the version is too old: everything may have changed)"""
+        if version == self._version:
+            return set()
+        if not self._changes_history or version < self._changes_history[0][0] - 1 or version > self._version:
+            return None
+        changed_cells = set()
+        for change_version, cells in self._changes_history:
+            if change_version > version:
+                changed_cells |= cells
+        return changed_cells
+
+    def add_listener(self, listener: Callable[['GameMap', Optional[Set[Tuple[int, int]]]], None]):
+        """Call listener(game_map, changed_cells) after each change of the map (None: whole map changed)"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[['GameMap', Optional[Set[Tuple[int, int]]]], None]):
+        self._listeners.remove(listener)
+
+    def _notify_listeners(self, cells: Optional[Set[Tuple[int, int]]]):
+        for listener in self._listeners:
+            listener(self, cells)
+
+    def _record_changes(self, cells: Set[Tuple[int, int]]):
+        self._version += 1
+        self._changes_history.append((self._version, cells))
+        self._notify_listeners(cells)
+
+    @staticmethod
+    def _refresh_spatial_indexes(game_map: 'GameMap', cells: Optional[Set[Tuple[int, int]]]):
+        # listener (static: no reference cycle), the indexes are rebuilt on demand after a whole map change
+        if cells is None or game_map._spatial_indexes is None:
+            return
+        for x, y in cells:
+            cell = game_map._map_table[y, x]
+            for species, spatial_index in enumerate(game_map._spatial_indexes):
+                spatial_index.set((x, y), cell[species])
+
+    def _compute_aggregates(self):
+        # whole map changed
+        self._version += 1
+        self._changes_history.clear()
+        nb_species = np.count_nonzero(self._map_table, axis=2)
+        self._species_map = np.where(nb_species == 1, self._map_table.argmax(axis=2),
+                                     np.where(nb_species == 0, int(Species.NONE), kernels.CORRUPTED)).astype(np.int8)
+        self._totals = [int(total) for total in self._map_table.sum(axis=(0, 1))]
+        self._occupied = tuple({(int(x), int(y)) for y, x in zip(*np.nonzero(self._map_table[:, :, species]))}
+                               for species in range(3))
+        self._sorted_positions = [None, None, None]
+        self._spatial_indexes = None
+
+    def _refresh_aggregates(self, x: int, y: int, old_cell):
+        """Update the aggregates after the change of cell (x, y), previously equal to old_cell"""
+        new_cell = self._map_table[y, x]
+        for species in range(3):
+            old_number, new_number = int(old_cell[species]), int(new_cell[species])
+            if old_number == new_number:
+                continue
+            self._totals[species] += new_number - old_number
+            if not old_number:
+                self._occupied[species].add((int(x), int(y)))
+                self._sorted_positions[species] = None
+            elif not new_number:
+                self._occupied[species].discard((int(x), int(y)))
+                self._sorted_positions[species] = None
+        cell_species = [species for species in range(3) if new_cell[species]]
+        self._species_map[y, x] = (cell_species[0] if len(cell_species) == 1
+                                   else Species.NONE if not cell_species else kernels.CORRUPTED)
+
+    def _set_cell(self, x: int, y: int, species: Species, number: int):
+        cell = [0, 0, 0]
+        if number:
+            cell[int(species)] = number
+        self._set_numbers(x, y, cell)
+
+    def _set_numbers(self, x: int, y: int, cell):
+        """Set the numbers [humans, vampires, werewolves] of cell (x, y) (several species: corrupted cell)"""
+        old_cell = self._map_table[y, x].copy()
+        self._map_table[y, x] = cell
+        self._human_map[y, x] = cell[0]
+        self._vampire_map[y, x] = cell[1]
+        self._werewolf_map[y, x] = cell[2]
+        self._refresh_aggregates(x, y, old_cell)
+
+    species_totals = property(lambda self: tuple(self._totals))  # number of (humans, vampires, werewolves)
+    species_group_counts = property(lambda self: tuple(len(positions) for positions in self._occupied))
+    occupied_cells = property(lambda self: self._occupied)  # WARN: sets of positions of each species, do not modify
+    species_map = property(lambda self: self._species_map)  # species value of each cell
+
+    def get_spatial_index(self, species: Species) -> SpatialIndex:
+        # WARN: maintained on each update (see _refresh_spatial_indexes), do not modify
+        if self._spatial_indexes is None:
+            self._spatial_indexes = tuple(
+                SpatialIndex.from_groups((position, self._map_table[position[1], position[0], species])
+                                         for position in self._occupied[species])
+                for species in range(3))
+        return self._spatial_indexes[species]
 
     @property
     def vampire_map(self):
@@ -72,89 +228,73 @@ class GameMap(AbstractGameMap):
         return self._map_table[position[1], position[0]]
 
     def get_cell_species(self, position: Tuple[int, int]) -> Species:
-        return Species.from_cell(self.__get_cell(position))
+        return self.get_cell_species_and_number(position)[0]
 
     def get_cell_species_and_number(self, position: Tuple[int, int]) -> Tuple[Species, int]:
-        return Species.from_cell_to_species_and_number(self.__get_cell(position))
+        x, y = position
+        species = self._species_map.item(y, x)
+        if self._validate or species == kernels.CORRUPTED:
+            return Species.from_cell_to_species_and_number(self._map_table[y, x])  # raises MapCorruptedException
+        if species == _NONE:
+            return Species.NONE, 0
+        return SPECIES_BY_VALUE[species], self._map_table.item(y, x, species)
 
     def get_cell_species_count(self, position: Tuple[int, int], species: Union[Species, int]) -> int:
         return self.__get_cell(position)[species if isinstance(species, int) else species.value]
 
+    def _get_sorted_positions(self, species: Species) -> List[Tuple[int, int]]:
+        # same order as np.nonzero on the species map
+        species = int(species)
+        if self._sorted_positions[species] is None:
+            self._sorted_positions[species] = sorted(self._occupied[species], key=lambda position: position[::-1])
+        return self._sorted_positions[species]
+
     def species_position_generator(self, species: Species) -> Generator:
-        non_zero_tab = np.nonzero(self._get_species_map(species))
-        for i, j in zip(non_zero_tab[0], non_zero_tab[1]):
-            yield j, i
+        yield from self._get_sorted_positions(species)
 
     def count_species(self, species) -> int:
-        return self._get_species_map(species).sum()
+        return self._totals[int(species)]
 
-    def species_position_and_number_generator(self, species: Species) -> Generator:
-        non_zero_tab = np.nonzero(self._get_species_map(species))
+    def _get_sorted_groups(self, species: Species) -> List[Tuple[Tuple[int, int], int]]:
         table = self._get_species_map(species)
-        for i, j in zip(non_zero_tab[0], non_zero_tab[1]):
-            yield (j, i), table[i, j]
+        return [((x, y), int(table[y, x])) for x, y in self._get_sorted_positions(species)]
 
-    @property
-    def is_game_over(self) -> bool:
-        # faster implementation than AbstractGameMap
-        return bool(len(np.nonzero(self._get_species_map(Species.WEREWOLF))[0])
-                    * len(np.nonzero(self._get_species_map(Species.VAMPIRE))[0]))
-
-    def game_over(self) -> Tuple[bool, Species]:
-        # also returns the winning specie
-        if not np.sum(self._vampire_map):
-            return True, Species.WEREWOLF
-        elif not np.sum(self._werewolf_map):
-            return True, Species.VAMPIRE
-        else:
-            return False, None
+    def species_position_and_number_generator(self, species: Species) -> Generator:
+        table = self._get_species_map(species)
+        for x, y in self._get_sorted_positions(species):
+            yield (x, y), table[y, x]
 
-    def update(self, ls_updates: List[Tuple[int, int, int, int, int]]):
+    def _apply_updates(self, ls_updates: List[Tuple[int, int, int, int, int]]):
         for update in ls_updates:
-            x, y = update[1], update[0]
-            self._map_table[x, y] = update[2:]
-            self._human_map[x, y] = update[2]
-            self._vampire_map[x, y] = update[3]
-            self._werewolf_map[x, y] = update[4]
-        logger.debug("Game map updated")
-        super().update(ls_updates)
-
-
-def compute_new_board(map: GameMap, move: Tuple[int, int, int, int, int]) -> AbstractGameMap:
-    new_map = GameMap()
-    #print('MAAAAAAAAP', map._map_table, move)
-    new_map.load_board(*map.save_board())
-
-    y0, x0, num, y1, x1 = move[0], move[1], move[2], move[3], move[4]
-    # print(x0, y0, new_map.n, new_map.m)
-    # print(new_map._map_table[x0, y0])
-
-    spec0, n0 = new_map.get_cell_species_and_number(move[:2])
-    assert num <= n0
-    # remove the moving population from former case
-    m0 = new_map._get_species_map(spec0)
-    new_map._map_table[x0, y0, int(spec0)] -= num
-    m0[x0, y0] -= num
-
-    spec1, n1 = new_map.get_cell_species_and_number(move[3:])
-
-    if spec0 != spec1 and n1 > 0:  # fight
-        # remove fighting population from arrival case
-        m1 = new_map._get_species_map(spec1)
-        #print('M1111111111111111111111', m1, spec1)
-        m1[x1, y1] = 0
-        #print(spec0, n0, 'VERSSUUUUUUUUS', spec1, n1)
-        new_map._map_table[x1, y1, int(spec1)] = 0
-        spec, n = BattleComputer((spec0, num), (spec1, n1)
-                                 ).compute_battle_for_minmax()
-        #print('WINNNNNNNNNNER', spec, n)
-        if n > 0:
-            # there is survivors
-            mfin = new_map._get_species_map(spec)
-            mfin[x1, y1] = n
-            new_map._map_table[x1, y1, int(spec)] = n
-
-    else:
-        m0[x1, y1] += num
-        new_map._map_table[x1, y1, int(spec0)] += num
+            self._set_numbers(update[0], update[1], update[2:])
+        self._record_changes({(int(update[0]), int(update[1])) for update in ls_updates})
+
+    def apply_moves(self, moves: Iterable[Tuple[int, int, int, int, int]], battle_policy: BattlePolicy = MINMAX):
+        moves = tuple(moves)
+        if kernels.NUMBA_AVAILABLE and len(moves) == 1 and battle_policy is MINMAX:
+            x0, y0, num, x1, y1 = moves[0]
+            old_cells = self._map_table[y0, x0].copy(), self._map_table[y1, x1].copy()
+            kernels.apply_move(self._map_table, self._human_map, self._vampire_map, self._werewolf_map, *moves[0])
+            self._refresh_aggregates(x0, y0, old_cells[0])
+            self._refresh_aggregates(x1, y1, old_cells[1])
+            self._record_changes({(int(x0), int(y0)), (int(x1), int(y1))})
+            return
+        changes = compute_transition(self, moves, battle_policy)
+        for x, y, species, number in changes:
+            self._set_cell(x, y, species, number)
+        self._record_changes({(x, y) for x, y, _species, _number in changes})
+
+
+def compute_new_board(map: AbstractGameMap, move: Tuple[int, int, int, int, int]) -> AbstractGameMap:
+    """New board after a move, battles being resolved with BattleComputer.compute_battle_for_minmax"""
+    new_map = map.copy()
+    new_map.apply_move(move)
+    return new_map
+
+
+def compute_new_board_after_moves(map: AbstractGameMap, moves: Iterable[Tuple[int, int, int, int, int]],
+                                  battle_policy: BattlePolicy = MINMAX) -> AbstractGameMap:
+    """New board after the moves of one species (see transition.compute_transition)"""
+    new_map = map.copy()
+    new_map.apply_moves(moves, battle_policy)
     return new_map
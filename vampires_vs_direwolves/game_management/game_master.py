@@ -1,18 +1,24 @@
 # -*- coding: utf-8 -*-
+import os
 import socket
+from datetime import datetime
 from threading import Thread
 from time import sleep
 from typing import Any, Dict, List, Tuple
 
-from battle_computer.battle_computer import BattleComputer
+import numpy as np
+
+from battle_computer.battle_policies import EXPECTATION, RandomBattlePolicy, get_game_seed
 from common.exceptions import (PlayerCheatedException, PlayerTimeoutError,
                                TooMuchConnections)
 from common.logger import logger
 from common.models import DataType, PlayerCommand, Species
 from game_management.game_monitoring import GameMonitor
+from game_management.game_records import GameRecorder
 from game_management.map_viewer import MapViewer
 from game_management.rule_checks import check_movements
 from game_management.server_game_map import ServerGameMap
+from game_management.transition import compute_transition, to_updates
 from server_connection.game_server import GameServer
 from server_connection.server_models import AbstractWorker, ServerCommunication
 
@@ -23,14 +29,23 @@ class GameMasterWorker(AbstractWorker):
     """Game master including a server"""
 
     def __init__(self, nb_players: int, max_rounds: int, max_nb_games: int, auto_restart: int = 0, map_path: str = "",
-                 use_expectation_instead_of_random=False):
+                 use_expectation_instead_of_random=False, record_dir: str = "", seed: int = None):
         self._nb_players = nb_players
         self._max_rounds = max_rounds
         self._max_nb_games = max_nb_games
         self._auto_restart = auto_restart  # if negative, infinity loop
         self._use_expectation = use_expectation_instead_of_random
+        self._battle_policy = EXPECTATION if use_expectation_instead_of_random else RandomBattlePolicy()
+
+        # random battles of the n-th game of a match-up (server start or auto-restart) are drawn from
+        # get_game_seed(seed, n): same seed, same battle results for all the match-ups
+        self._seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self._game_seed = None
+        self._nb_games_started = 0
 
         self._map_path = map_path
+        self._record_dir = record_dir  # if set, boards of each game are saved there (self-play records)
+        self._recorder = GameRecorder()
 
         self._server: GameServer = None
         self._game_monitor = GameMonitor()
@@ -79,45 +94,18 @@ class GameMasterWorker(AbstractWorker):
             name=name, species=self._players[connexion]['species'])
         logger.info(f"SERVER: Received name '{name}' from connexion!")
 
-    @staticmethod
-    def fight(species_1, number_1, species_2, number_2, use_expectation):
-        return BattleComputer((species_1, number_1), (species_2, number_2)).compute_one_battle_result(
-            use_expectation=use_expectation)
-
-    def _update_game_map(self, movements: List[Tuple[int, int, int, int, int, int]], species: Species):
-        ls_updates = []
-        nb_old_pos = {}
-        nb_new_pos = {}
-        for old_x, old_y, nb_move, new_x, new_y in movements:
-            previous_nb = nb_old_pos.get(
-                (old_x, old_y), self._game_map.get_cell_species_and_number((old_x, old_y))[1])
-            nb_old_pos[(old_x, old_y)] = previous_nb - nb_move
-            nb_new_pos[(new_x, new_y)] = nb_new_pos.get(
-                (new_x, new_y), 0) + nb_move
-
-        for pos, nb in nb_old_pos.items():
-            ls_updates.append(species.to_cell(pos, nb))
-
-        for pos, nb in nb_new_pos.items():
-            target_species, target_nb = self._game_map.get_cell_species_and_number(
-                pos)
-            res_species, res_nb = self.fight(
-                species, nb, target_species, target_nb, self._use_expectation)
-            update2 = res_species.to_cell(pos, res_nb)
-            ls_updates.append(update2)
-
+    def _update_game_map(self, movements: List[Tuple[int, int, int, int, int]]):
+        ls_updates = to_updates(compute_transition(self._game_map, movements, self._battle_policy))
         self._game_map.update(ls_updates)
         self._updates.append(ls_updates)
+        if self._record_dir:
+            self._recorder.record(self._game_map)
 
     def mov(self, connexion):
         """Receive MOV command from client"""
         n = ServerCommunication.receive_int(connexion)
-        movements = []
-        for _i in range(n):
-            _tmp = []
-            for _j in range(5):
-                _tmp.append(ServerCommunication.receive_int(connexion))
-            movements.append(tuple(_tmp))
+        values = ServerCommunication.receive_ints(connexion, 5 * n)  # (x0, y0, number, x1, y1) of each move
+        movements = [values[i:i + 5] for i in range(0, 5 * n, 5)]
 
         # Check rules
         try:
@@ -127,9 +115,9 @@ class GameMasterWorker(AbstractWorker):
             logger.error(
                 f"{self._players[connexion]['name']} player cheated: {err}")
             raise PlayerCheatedException(self._players[connexion]['name'])
-        logger.debug(f"SERVER: Received MOV command!")
+        logger.debug("SERVER: Received MOV command!")
 
-        self._update_game_map(movements, self._players[connexion]["species"])
+        self._update_game_map(movements)
 
     # #### COMMANDS TO SEND ####
     # Send commands to clients
@@ -251,7 +239,9 @@ class GameMasterWorker(AbstractWorker):
             f"Game #{len(self._game_monitor)} ended. Winning species: {has_won.name} ({winner_name})")
         self._game_monitor.append(winning_species=self._get_name_from_species(has_won),
                                   starting_species=self._starting_species,
-                                  nb_rounds=nb_round)
+                                  nb_rounds=nb_round, seed=self._game_seed)
+        if self._record_dir:
+            self._save_record(has_won)
 
         for player in self._players:
             self.end(player)
@@ -270,6 +260,11 @@ class GameMasterWorker(AbstractWorker):
             self._server.stop()
             self._players.clear()
 
+    def _save_record(self, winning_species: Species):
+        os.makedirs(self._record_dir, exist_ok=True)
+        record_path = os.path.join(self._record_dir, f"game_{datetime.now():%Y%m%d_%H%M%S_%f}.npz")
+        self._recorder.save(record_path, winning_species)
+
     def _start_playing(self):
         if self._nb_players == 1:
             raise NotImplementedError("only 2 players implemented")
@@ -280,7 +275,7 @@ class GameMasterWorker(AbstractWorker):
         logger.info("Game worker thread started!")
 
     def _init_server(self):
-        self.game_monitor.add_server_config(name="default")
+        self.game_monitor.add_server_config(name="default", seed=self._seed)
         self._server = GameServer(game_worker=self)
 
     def _init_map(self):
@@ -291,10 +286,21 @@ class GameMasterWorker(AbstractWorker):
         self._init_map_updates = updates
         self.game_monitor.add_game(file=self._map_path, n=n, m=m, map=updates)
 
+    def _init_battles(self):
+        self._game_seed = get_game_seed(self._seed, self._nb_games_started)
+        self._nb_games_started += 1
+        if not self._use_expectation:
+            self._battle_policy = RandomBattlePolicy.from_seed(self._game_seed)
+        logger.info(f"SERVER: Battle seed of the game: {self._game_seed}")
+
     def _init_game(self):
+        self._init_battles()
         self._game_map.load_map(self._n, self._m)
         self._updates = [self._init_map_updates.copy()]
         self._game_map.update(self._updates[0])
+        self._recorder.reset()
+        if self._record_dir:
+            self._recorder.record(self._game_map)
 
     def _init(self, connexion):
         def init_connection():
@@ -348,6 +354,7 @@ class GameMasterWorker(AbstractWorker):
                 self._game_monitor.reset()
             self._init_server()
             self._init_map()
+            self._nb_games_started = 0
             self._init_game()
             self._is_active = True
             self._server.start()
@@ -53,11 +53,13 @@ class GameMonitor:
     def add_player(self, name, species):
         self._players.append(dict(name=name, species=species))
 
-    def append(self, winning_species: Species, starting_species: Species, nb_rounds: int):
+    def append(self, winning_species: Species, starting_species: Species, nb_rounds: int, seed: int = None):
+        """Record the result of a game (seed: seed of its random battles, to replay them)"""
         self._game_counter.append(winning_species)
         self._game_details.append({"starting_species": starting_species,
                                    "nb_rounds": nb_rounds,
-                                   "winner": winning_species})
+                                   "winner": winning_species,
+                                   "seed": seed})
 
     def reset(self):
         self._game_parameters = {}
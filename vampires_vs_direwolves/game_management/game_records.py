@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from common.logger import logger
+from common.models import Species
+from game_management.game_map import GameMap
+
+
+class GameRecorder:
+    """Record the successive boards of a game, to be saved as a self-play record (.npz)
+
+    A record contains 3 arrays of shape (nb_boards, n, m): `human`, `vampire` and `werewolf`,
+    and the value of the winning species (`winner`, Species.NONE if no winner).
+    """
+
+    def __init__(self):
+        self._human_maps = []
+        self._vampire_maps = []
+        self._werewolf_maps = []
+
+    def __len__(self):
+        return len(self._human_maps)
+
+    def reset(self):
+        self._human_maps.clear()
+        self._vampire_maps.clear()
+        self._werewolf_maps.clear()
+
+    def record(self, game_map: GameMap):
+        self._human_maps.append(np.array(game_map.human_map, dtype=np.uint8))
+        self._vampire_maps.append(np.array(game_map.vampire_map, dtype=np.uint8))
+        self._werewolf_maps.append(np.array(game_map.werewolf_map, dtype=np.uint8))
+
+    def save(self, path: str, winner: Species):
+        if not len(self):
+            logger.warning(f"Empty game record not saved: {path}")
+            return
+        np.savez_compressed(path, human=np.stack(self._human_maps), vampire=np.stack(self._vampire_maps),
+                            werewolf=np.stack(self._werewolf_maps), winner=int(winner))
+        logger.info(f"Game record saved: {path} ({len(self)} boards, winner: {winner.name})")
+
+
+def load_game_record(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Species]:
+    """Load a record saved by GameRecorder: (human_maps, vampire_maps, werewolf_maps, winner)"""
+    with np.load(path) as record:
+        return record["human"], record["vampire"], record["werewolf"], Species(int(record["winner"]))
+
+
+def load_game_records(directory: str) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, Species]]:
+    """Load all the records (.npz files) of a directory"""
+    return [load_game_record(os.path.join(directory, file_name))
+            for file_name in sorted(os.listdir(directory)) if file_name.endswith(".npz")]
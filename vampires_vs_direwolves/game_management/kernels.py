@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Kernels for the search hot path, JIT-compiled with Numba when it is installed.
+
+Functions are written in the subset of Python supported by `numba.njit` and work on integers and numpy arrays only.
+Without Numba, they are plain Python functions and the callers keep using the original NumPy/Python code:
+check `NUMBA_AVAILABLE` before choosing a kernel. The pure Python version of each kernel is available as
+`kernel.py_func` in both cases (tests compare both paths).
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# Species values (see common.models.Species), as plain integers for the kernels
+HUMAN, VAMPIRE, WEREWOLF, NONE = 0, 1, 2, 3
+CORRUPTED = -1
+
+
+def _jit(func):
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True, nogil=True)(func)
+    func.py_func = func
+    return func
+
+
+@_jit
+def decode_cell(humans, vampires, werewolves):
+    """Species and number of persons of a cell: (NONE, 0) if empty, (CORRUPTED, 0) if several species live in"""
+    species, number = NONE, 0
+    if humans:
+        species, number = HUMAN, humans
+    if vampires:
+        if number:
+            return CORRUPTED, 0
+        species, number = VAMPIRE, vampires
+    if werewolves:
+        if number:
+            return CORRUPTED, 0
+        species, number = WEREWOLF, werewolves
+    return species, number
+
+
+@_jit
+def direct_distance(x1, y1, x2, y2):
+    """Same as map_helpers.get_direct_distance"""
+    return max(abs(x2 - x1), abs(y2 - y1))
+
+
+@_jit
+def battle_for_minmax(attacker_species, attacker_number, defender_species, defender_number):
+    """Same as BattleComputer.compute_battle_for_minmax, for a fight between two different species"""
+    if defender_species == HUMAN:
+        is_random_battle = attacker_number < defender_number
+    else:
+        is_random_battle = attacker_number < 1.5 * defender_number
+    if not is_random_battle:
+        proba = 1.
+    elif attacker_number == defender_number:
+        proba = 0.5
+    elif attacker_number < defender_number:
+        proba = 0.5 * attacker_number / defender_number
+    else:
+        proba = attacker_number / defender_number - 0.5
+
+    if defender_species == HUMAN:
+        if is_random_battle:
+            return HUMAN, int(defender_number * (1 - proba))
+        return attacker_species, int(proba * (attacker_number + defender_number))
+    if proba < 0.6:
+        return defender_species, int(defender_number * (1 - proba))
+    return attacker_species, int(proba * attacker_number)
+
+
+@_jit
+def _set_cell_count(map_table, species_maps, row, column, species, number):
+    map_table[row, column, species] = number
+    species_maps[species][row, column] = number
+
+
+@_jit
+def apply_move(map_table, human_map, vampire_map, werewolf_map, x0, y0, number, x1, y1):
+    """Apply one move (x0, y0, number, x1, y1) in place on GameMap arrays, as compute_new_board does"""
+    species_maps = (human_map, vampire_map, werewolf_map)
+    species_0, number_0 = decode_cell(map_table[y0, x0, 0], map_table[y0, x0, 1], map_table[y0, x0, 2])
+    _set_cell_count(map_table, species_maps, y0, x0, species_0, number_0 - number)
+
+    species_1, number_1 = decode_cell(map_table[y1, x1, 0], map_table[y1, x1, 1], map_table[y1, x1, 2])
+    if species_0 != species_1 and number_1 > 0:  # fight
+        _set_cell_count(map_table, species_maps, y1, x1, species_1, 0)
+        species, survivors = battle_for_minmax(species_0, number, species_1, number_1)
+        if survivors > 0:
+            _set_cell_count(map_table, species_maps, y1, x1, species, survivors)
+    else:
+        _set_cell_count(map_table, species_maps, y1, x1, species_0, map_table[y1, x1, species_0] + number)
+
+
+@_jit
+def humans_attraction(human_map, x, y, number):
+    """Sum of (number of humans / distance to (x, y)) over the human houses with at most `number` humans"""
+    attraction = 0.
+    for row in range(human_map.shape[0]):
+        for column in range(human_map.shape[1]):
+            humans = human_map[row, column]
+            if 0 < humans <= number:
+                attraction += humans / direct_distance(x, y, column, row)
+    return attraction
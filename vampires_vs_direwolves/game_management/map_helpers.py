@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from typing import Tuple, Dict, List, Union, Generator
 
-from battle_computer.battle_computer import BattleComputer
+from battle_computer.battle_computer import is_certain_victory
 from common.exceptions import SpeciesExtinctionException
 from common.models import Species
 from game_management.abstract_game_map import AbstractGameMap
@@ -18,26 +18,8 @@ def get_direct_distance(position_1: Tuple[int, int], position_2: Tuple[int, int]
     return total_distance
 
 
-def _get_all_distances_to_a_species(position: Tuple[int, int], game_map: AbstractGameMap,
-                                    species=Species.HUMAN) -> Dict[Tuple[int, int], Tuple[Tuple[int, int], int, int]]:
-    species_positions_and_number = game_map.find_species_position_and_number(species)
-    res = {}
-    for species_position, species_number in species_positions_and_number:
-        res[species_position] = (position, get_direct_distance(position, species_position), species_number)
-    return res
-
-
-def _get_distances_to_a_species_if_victory(position: Tuple[int, int],
-                                           game_map: AbstractGameMap,
-                                           species=Species.HUMAN
-                                           ) -> Dict[Tuple[int, int], Tuple[Tuple[int, int], int, int]]:
-    species_positions_and_number = game_map.find_species_position_and_number(species)
-    res = {}
-    for species_position, species_number in species_positions_and_number:
-        current_species, current_number = game_map.get_cell_species_and_number(position)
-        if BattleComputer((current_species, current_number), (species, species_number)).proba_attacker_wins == 1:
-            res[species_position] = (position, get_direct_distance(position, species_position), species_number)
-    return res
+def _is_certain_victory(attacker: Tuple[Species, int], defender: Tuple[Species, int]) -> bool:
+    return is_certain_victory(attacker[0], attacker[1], defender[0], defender[1])
 
 
 def get_distances_to_a_species(position: Tuple[int, int], game_map: AbstractGameMap,
@@ -51,10 +33,13 @@ def get_distances_to_a_species(position: Tuple[int, int], game_map: AbstractGame
     :param only_if_certain_victory: if True, only distances with a certain victory are returned
     :return: {species_position: (position, direct_distance(position<->species_position), species_number), ... }
     """
+    groups = game_map.get_spatial_index(species).items()
     if only_if_certain_victory:
-        return _get_distances_to_a_species_if_victory(position, game_map, species)
-    else:
-        return _get_all_distances_to_a_species(position, game_map, species)
+        attacker = game_map.get_cell_species_and_number(position)
+        groups = [(species_position, species_number) for species_position, species_number in groups
+                  if _is_certain_victory(attacker, (species, species_number))]
+    return {species_position: (position, get_direct_distance(position, species_position), species_number)
+            for species_position, species_number in groups}
 
 
 def get_distances_between_two_species(game_map: AbstractGameMap,
@@ -65,27 +50,22 @@ def get_distances_between_two_species(game_map: AbstractGameMap,
     """
 
     :param only_if_certain_victory: if True, only distances with a certain victory are returned
+    (closest group of species_1 certain to win, species_2 groups that no group can beat are not returned)
     :param game_map: game map
     :param species_1: attacker species
     :param species_2: defender species
     :return: {pos_specie_2: (pos_closest_specie_1, distance, species_2_number), ...}
     """
-    species_1_pos = game_map.find_species_position(species_1)
-
-    if not species_1:
-        return {}
+    index_1 = game_map.get_spatial_index(species_1)
+    groups_2 = game_map.get_spatial_index(species_2).get_number
+    condition = None
+    if only_if_certain_victory:
+        def condition(pos_1, nb_1, pos_2):
+            return _is_certain_victory((species_1, nb_1), (species_2, groups_2(pos_2)))
 
-    # todo: optimize algorithm
-    for i, pos_1 in enumerate(species_1_pos):
-        if not i:
-            distances = get_distances_to_a_species(pos_1, game_map, species_2, only_if_certain_victory)
-        else:
-            tmp_distances = get_distances_to_a_species(pos_1, game_map, species_2, only_if_certain_victory)
-            for pos_2, (_pos, distance, nb_2) in distances.items():
-                tmp_distance = tmp_distances[pos_2][1]
-                if tmp_distance < distance:
-                    distances[pos_2] = (pos_1, tmp_distance, nb_2)
-    return distances
+    positions_2 = [pos_2 for pos_2, _nb_2 in game_map.get_spatial_index(species_2).items()]
+    return {pos_2: (pos_1, distance, groups_2(pos_2))
+            for pos_2, (distance, pos_1, _nb_1) in index_1.nearest_to_each(positions_2, condition).items()}
 
 
 def _get_next_coord_to_destination(initial_coord, destination_coord):
@@ -128,6 +108,9 @@ if __name__ == '__main__':
         def update(self, ls_updates: List[Tuple[int, int, int, int, int]]):
             pass
 
+        def _set_cell(self, x: int, y: int, species: Species, number: int):
+            pass
+
         def get_cell_species(self, position: Tuple[int, int]) -> Species:
             pass
 
@@ -143,11 +126,17 @@ if __name__ == '__main__':
             else:
                 return [(0, 0), (2, 1)]
 
+        def _get_sorted_groups(self, species: Species) -> List[Tuple[Tuple[int, int], int]]:
+            pass
+
         def species_position_generator(self, species: Species) -> Generator:
             pass
 
         def species_position_and_number_generator(self, species: Species) -> Generator:
-            return [((1, 2), 5), ((3, 3), 2)]
+            if species is Species.HUMAN:
+                return [((1, 2), 5), ((3, 3), 2)]
+            else:
+                return [((0, 0), 3), ((2, 1), 4)]
 
 
     assert get_distances_to_a_species((0, 0), MockMap(), Species.HUMAN) == {(1, 2): ((0, 0), 2, 5),
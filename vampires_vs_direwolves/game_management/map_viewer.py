@@ -9,7 +9,7 @@ from abc import ABC, abstractmethod
 from time import sleep
 from typing import Dict, List, Tuple, Type
 
-from boutchou import AbstractAI, RandomAI, RushToHumansAI, RushToOpponentAI
+import boutchou
 from common.logger import logger
 from common.models import Singleton, Species
 from game_management.abstract_game_map import AbstractGameMap
@@ -296,7 +296,7 @@ class MapViewer(AbstractMapViewer, metaclass=Singleton):
         print(f"moves: {self._next_moves}")
         self._user_str.set(f"Moves: {self._next_moves}")
 
-    def _generate_move_from_ai(self, ai: Type[AbstractAI]):
+    def _generate_move_from_ai(self, ai: Type[boutchou.AbstractAI]):
         self._next_moves.clear()
         self._next_moves += ai.next_move(self._game_map, self._current_species)
 
@@ -313,26 +313,26 @@ class MapViewer(AbstractMapViewer, metaclass=Singleton):
             self._next_moves.clear()
         elif event.keysym == "h":
             print("move to humans")
-            self._generate_move_from_ai(RushToHumansAI)
+            self._generate_move_from_ai(boutchou.RushToHumansAI)
         elif event.keysym == "H":
             print("move to humans")
-            self._generate_move_from_ai(RushToHumansAI)
+            self._generate_move_from_ai(boutchou.RushToHumansAI)
             print("enter: send moves")
             self._ready_to_send_moves = True
         elif event.keysym == "o":
             print("move to opponent")
-            self._generate_move_from_ai(RushToOpponentAI)
+            self._generate_move_from_ai(boutchou.RushToOpponentAI)
         elif event.keysym == "O":
             print("move to opponent")
-            self._generate_move_from_ai(RushToOpponentAI)
+            self._generate_move_from_ai(boutchou.RushToOpponentAI)
             print("enter: send moves")
             self._ready_to_send_moves = True
         elif event.keysym == "r":
             print("random move")
-            self._generate_move_from_ai(RandomAI)
+            self._generate_move_from_ai(boutchou.RandomAI)
         elif event.keysym == "R":
             print("random move")
-            self._generate_move_from_ai(RandomAI)
+            self._generate_move_from_ai(boutchou.RandomAI)
             print("enter: send moves")
             self._ready_to_send_moves = True
         elif len(event.char) == 1 and event.char in "0123456789":
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+Position = Tuple[int, int]
+
+# (shift x, shift y) of the moves, in the order of the move computers
+MOVE_SHIFTS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+DIAGONAL_SHIFTS = ((-1, -1), (1, -1), (1, 1), (-1, 1))
+STRAIGHT_SHIFTS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class NeighbourTable(NamedTuple):
+    """Neighbours of each cell of a n x m map, indexed by flat index y * m + x"""
+    n: int
+    m: int
+    possible_moves: Tuple[Tuple[Position, ...], ...]  # cell included, same order as the former set of positions
+    moves: Tuple[Tuple[Position, ...], ...]  # cell excluded, in MOVE_SHIFTS order
+    flat_moves: Tuple[Tuple[int, ...], ...]  # flat indices of `moves`
+    diagonals: Tuple[Tuple[Optional[Position], ...], ...]  # in DIAGONAL_SHIFTS order, None if outside the map
+    straights: Tuple[Tuple[Optional[Position], ...], ...]  # in STRAIGHT_SHIFTS order, None if outside the map
+
+    def index(self, position: Position) -> int:
+        return int(position[1]) * self.m + int(position[0])
+
+    def get_possible_moves(self, position: Position, force_move: bool = False) -> Tuple[Position, ...]:
+        """Same positions (and order) as AbstractGameMap.get_possible_moves"""
+        x, y = position
+        possible_moves = self.possible_moves[int(y) * self.m + int(x)]
+        if force_move:
+            return tuple(move for move in possible_moves if move != (x, y))
+        return possible_moves
+
+
+def _get_shifted_position(n: int, m: int, x: int, y: int, shift: Position) -> Optional[Position]:
+    new_x, new_y = x + shift[0], y + shift[1]
+    return (new_x, new_y) if 0 <= new_x < m and 0 <= new_y < n else None
+
+
+def _get_former_possible_moves(n: int, m: int, x: int, y: int) -> Tuple[Position, ...]:
+    # positions were iterated from a set: keep its order, moves of the rules depend on it
+    positions_set = set()
+    for shift_x in range(max(x - 1, 0), min(x + 2, m)):
+        for shift_y in range(max(y - 1, 0), min(y + 2, n)):
+            positions_set.add((shift_x, shift_y))
+    return tuple(positions_set)
+
+
+@lru_cache(maxsize=None)
+def get_neighbour_table(n: int, m: int) -> NeighbourTable:
+    """Neighbour table of a n x m map (built once per map size)"""
+    n, m = int(n), int(m)
+    assert n > 0 and m > 0
+    cells = [(x, y) for y in range(n) for x in range(m)]
+    moves = tuple(tuple(position for position in (_get_shifted_position(n, m, x, y, shift) for shift in MOVE_SHIFTS)
+                        if position is not None) for x, y in cells)
+    return NeighbourTable(
+        n=n, m=m,
+        possible_moves=tuple(_get_former_possible_moves(n, m, x, y) for x, y in cells),
+        moves=moves,
+        flat_moves=tuple(tuple(new_y * m + new_x for new_x, new_y in cell_moves) for cell_moves in moves),
+        diagonals=tuple(tuple(_get_shifted_position(n, m, x, y, shift) for shift in DIAGONAL_SHIFTS)
+                        for x, y in cells),
+        straights=tuple(tuple(_get_shifted_position(n, m, x, y, shift) for shift in STRAIGHT_SHIFTS)
+                        for x, y in cells),
+    )
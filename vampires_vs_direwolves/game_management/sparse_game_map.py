@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from common.exceptions import GameMapOverPopulated
+from common.models import Species
+from game_management.abstract_game_map import AbstractGameMap
+
+
+class SparseGameMap(AbstractGameMap):
+    """Game map storage is a dict of the occupied cells {(x, y): (species, number)}, with the groups of each species.
+
+    Updates are O(1) and iterations are O(number of groups), whatever the size of the map.
+    Groups are iterated in the same order as GameMap (line by line).
+    Dense arrays (map_table and per-species maps) and sorted groups are built on demand and cached until the next
+    change.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cells: Dict[Tuple[int, int], Tuple[Species, int]] = {}
+        self._groups: Dict[Species, Dict[Tuple[int, int], int]] = {}
+        self._totals: Dict[Species, int] = {}
+        self._sorted_groups: Dict[Species, List[Tuple[Tuple[int, int], int]]] = {}
+        self._dense = None
+
+    def load_map(self, n: int, m: int):
+        self._cells = {}
+        self._groups = {species: {} for species in (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF)}
+        self._totals = dict.fromkeys(self._groups, 0)
+        self._sorted_groups = {}
+        self._dense = None
+        super().load_map(n, m)
+
+    def load_board(self, n: int, m: int, cells: Dict[Tuple[int, int], Tuple[Species, int]]):
+        self.load_map(n, m)
+        for (x, y), (species, number) in cells.items():
+            self._set_cell(x, y, species, number)
+
+    def save_board(self):
+        return self.n, self.m, self._cells
+
+    def copy(self) -> 'SparseGameMap':
+        new_map = SparseGameMap()
+        new_map._n, new_map._m, new_map._nb_updates = self._n, self._m, self._nb_updates
+        new_map._cells = self._cells.copy()
+        new_map._groups = {species: groups.copy() for species, groups in self._groups.items()}
+        new_map._totals = self._totals.copy()
+        # cached lists are replaced, never modified: they can be shared
+        new_map._sorted_groups = self._sorted_groups.copy()
+        return new_map
+
+    @classmethod
+    def from_game_map(cls, game_map: AbstractGameMap) -> 'SparseGameMap':
+        new_map = cls()
+        new_map.load_map(game_map.n, game_map.m)
+        for species in (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF):
+            for (x, y), number in game_map.species_position_and_number_generator(species):
+                new_map._set_cell(x, y, species, number)
+        return new_map
+
+    def to_dense(self) -> np.ndarray:
+        """Board as a (n, m, 3) array of [humans, vampires, werewolves] cells, like GameMap.map_table (cached)"""
+        if self._dense is None:
+            self._dense = np.zeros((self.n, self.m, 3), int)
+            for (x, y), (species, number) in self._cells.items():
+                self._dense[y, x, int(species)] = number
+        return self._dense
+
+    map_table = property(to_dense)
+    human_map = property(lambda self: self.to_dense()[:, :, int(Species.HUMAN)])
+    vampire_map = property(lambda self: self.to_dense()[:, :, int(Species.VAMPIRE)])
+    werewolf_map = property(lambda self: self.to_dense()[:, :, int(Species.WEREWOLF)])
+
+    def get_cell_species_and_number(self, position: Tuple[int, int]) -> Tuple[Species, int]:
+        return self._cells.get(tuple(position), (Species.NONE, 0))
+
+    def get_cell_species_count(self, position: Tuple[int, int], species: Union[Species, int]) -> int:
+        return self._groups[Species(species)].get(tuple(position), 0)
+
+    def _get_sorted_groups(self, species: Species) -> List[Tuple[Tuple[int, int], int]]:
+        sorted_groups = self._sorted_groups.get(species)
+        if sorted_groups is None:
+            sorted_groups = sorted(self._groups[species].items(), key=lambda item: (item[0][1], item[0][0]))
+            self._sorted_groups[species] = sorted_groups
+        return sorted_groups
+
+    def count_species(self, species) -> int:
+        return self._totals[Species(species)]
+
+    def _set_cell(self, x: int, y: int, species: Species, number: int):
+        if number > 255:
+            raise GameMapOverPopulated(f"Too much population in cell ({x}, {y}): {number}")
+        position = (int(x), int(y))
+        old_species, old_number = self._cells.pop(position, (Species.NONE, 0))
+        if old_number:
+            del self._groups[old_species][position]
+            self._totals[old_species] -= old_number
+            self._sorted_groups.pop(old_species, None)
+        if number:
+            self._cells[position] = (species, number)
+            self._groups[species][position] = number
+            self._totals[species] += number
+            self._sorted_groups.pop(species, None)
+        self._dense = None
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from typing import Callable, Dict, Iterable, List, Tuple
+
+Position = Tuple[int, int]
+Neighbour = Tuple[int, Position, int]  # (distance, position, number)
+
+BUCKET_SIZE = 4  # side of the square buckets, in cells
+
+
+def _sort_key(neighbour: Neighbour):
+    # ties broken line by line, the order of the groups in the game maps
+    return neighbour[0], neighbour[1][1], neighbour[1][0]
+
+
+class SpatialIndex:
+    """Groups {position: number} of one species, stored in square buckets of the map,
+    so that the closest groups of a position are found without looking at all of them.
+
+    Distances are Chebyshev distances (number of moves, see map_helpers.get_direct_distance).
+    Results are lists of (distance, position, number), sorted by distance, then line by line.
+    """
+
+    def __init__(self, bucket_size: int = BUCKET_SIZE):
+        self._bucket_size = bucket_size
+        self._buckets: Dict[Position, Dict[Position, int]] = {}
+        self._numbers: Dict[Position, int] = {}
+
+    @classmethod
+    def from_groups(cls, groups: Iterable[Tuple[Position, int]], bucket_size: int = BUCKET_SIZE) -> 'SpatialIndex':
+        index = cls(bucket_size)
+        for position, number in groups:
+            index.set(position, number)
+        return index
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, position: Position):
+        return tuple(position) in self._numbers
+
+    def get_number(self, position: Position) -> int:
+        return self._numbers.get(tuple(position), 0)
+
+    def items(self) -> List[Tuple[Position, int]]:
+        """Groups (position, number), line by line"""
+        return sorted(self._numbers.items(), key=lambda item: (item[0][1], item[0][0]))
+
+    def _get_bucket(self, position: Position) -> Position:
+        return position[0] // self._bucket_size, position[1] // self._bucket_size
+
+    def set(self, position: Position, number: int):
+        """Set the number of a group (0 removes it)"""
+        position = (int(position[0]), int(position[1]))
+        bucket = self._get_bucket(position)
+        if number:
+            self._numbers[position] = int(number)
+            self._buckets.setdefault(bucket, {})[position] = int(number)
+        elif position in self._numbers:
+            del self._numbers[position]
+            del self._buckets[bucket][position]
+            if not self._buckets[bucket]:
+                del self._buckets[bucket]
+
+    def _get_bucket_distance(self, position: Position, bucket: Position) -> int:
+        """Lower bound of the distance between a position and the cells of a bucket"""
+        x_min, y_min = bucket[0] * self._bucket_size, bucket[1] * self._bucket_size
+        gap_x = max(x_min - position[0], 0, position[0] - x_min - self._bucket_size + 1)
+        gap_y = max(y_min - position[1], 0, position[1] - y_min - self._bucket_size + 1)
+        return max(gap_x, gap_y)
+
+    def _get_sorted_buckets(self, position: Position) -> List[Tuple[int, Position]]:
+        return sorted((self._get_bucket_distance(position, bucket), bucket) for bucket in self._buckets)
+
+    def nearest(self, position: Position, k: int = 1,
+                condition: Callable[[Position, int], bool] = None) -> List[Neighbour]:
+        """The k closest groups of a position (only the groups satisfying `condition(position, number)` if given)"""
+        x, y = position
+        neighbours = []
+        for bucket_distance, bucket in self._get_sorted_buckets(position):
+            if len(neighbours) >= k and bucket_distance > neighbours[k - 1][0]:
+                break  # no closer group in the next buckets
+            for group_position, number in self._buckets[bucket].items():
+                if condition is None or condition(group_position, number):
+                    distance = max(abs(group_position[0] - x), abs(group_position[1] - y))
+                    neighbours.append((distance, group_position, number))
+            neighbours.sort(key=_sort_key)
+        return neighbours[:k]
+
+    def within_radius(self, position: Position, radius: int) -> List[Neighbour]:
+        """Groups at a distance of at most `radius` of a position"""
+        x, y = position
+        neighbours = []
+        for bucket_distance, bucket in self._get_sorted_buckets(position):
+            if bucket_distance > radius:
+                break
+            for group_position, number in self._buckets[bucket].items():
+                distance = max(abs(group_position[0] - x), abs(group_position[1] - y))
+                if distance <= radius:
+                    neighbours.append((distance, group_position, number))
+        return sorted(neighbours, key=_sort_key)
+
+    def nearest_to_each(self, positions: Iterable[Position],
+                        condition: Callable[[Position, int, Position], bool] = None) -> Dict[Position, Neighbour]:
+        """Closest group of each position: {position: (distance, group position, group number)}.
+
+        `condition(group_position, group_number, position)` filters the groups for each position.
+        Positions without any (valid) group are not returned.
+        """
+        result = {}
+        for position in positions:
+            group_condition = None if condition is None else (
+                lambda group_position, number, target=position: condition(group_position, number, target))
+            neighbours = self.nearest(position, condition=group_condition)
+            if neighbours:
+                result[position] = neighbours[0]
+        return result
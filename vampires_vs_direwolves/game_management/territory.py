@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from common.models import Species
+from game_management.abstract_game_map import AbstractGameMap
+
+UNREACHABLE = 1 << 30  # distance of the cells when there is no group
+
+
+class Territory(NamedTuple):
+    """Planes (n, m) of a map shared between two species"""
+    distance_1: np.ndarray  # distance to the closest group of species 1 (UNREACHABLE if no group)
+    distance_2: np.ndarray
+    closest_1: np.ndarray  # index of the closest group of species 1 (in find_species_position order), -1 if no group
+    closest_2: np.ndarray
+    labels: np.ndarray  # species value reaching the cell first
+
+
+def get_distance_planes(n: int, m: int, positions: List[Tuple[int, int]]) -> np.ndarray:
+    """Chebyshev distances (number of moves) between each position and each cell: array (len(positions), n, m)"""
+    if not len(positions):
+        return np.zeros((0, n, m), int)
+    positions = np.asarray(positions, dtype=int)
+    y, x = np.indices((n, m))
+    return np.maximum(np.abs(x[None] - positions[:, 0, None, None]), np.abs(y[None] - positions[:, 1, None, None]))
+
+
+def _get_closest(distances: np.ndarray, n: int, m: int) -> Tuple[np.ndarray, np.ndarray]:
+    if not len(distances):
+        return np.full((n, m), UNREACHABLE), np.full((n, m), -1)
+    return distances.min(axis=0), distances.argmin(axis=0)  # ties: first group, line by line
+
+
+def compute_territory(game_map: AbstractGameMap, species_1: Species, species_2: Species,
+                      tie_species: Species = Species.NONE) -> Territory:
+    """Which species reaches each cell first, from all their groups.
+
+    :param tie_species: label of the cells reached at the same time by both species (e.g. the species to move)
+    """
+    n, m = game_map.n, game_map.m
+    distance_1, closest_1 = _get_closest(get_distance_planes(n, m, game_map.find_species_position(species_1)), n, m)
+    distance_2, closest_2 = _get_closest(get_distance_planes(n, m, game_map.find_species_position(species_2)), n, m)
+    labels = np.where(distance_1 < distance_2, int(species_1),
+                      np.where(distance_2 < distance_1, int(species_2), int(tie_species)))
+    labels[(distance_1 == UNREACHABLE) & (distance_2 == UNREACHABLE)] = Species.NONE
+    return Territory(distance_1, distance_2, closest_1, closest_2, labels)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Transition kernel: the cells changed by the moves of one player, shared by the server, the search and the simulators.
+
+Moves (x0, y0, number, x1, y1) are resolved in a single pass, as the server does:
+1. departures are removed from their cells
+2. arrivals are merged by destination cell (rule #5: a cell can not be both a source and a target)
+3. the battles of all destination cells are resolved by one call to a battle policy
+"""
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from battle_computer.battle_policies import MINMAX, BattlePolicy
+from common.models import SPECIES_BY_VALUE, Species
+
+Move = Tuple[int, int, int, int, int]
+CellChange = Tuple[int, int, Species, int]  # (x, y, species, number)
+
+
+def compute_transition(game_map, moves: Iterable[Move], battle_policy: BattlePolicy = MINMAX) -> List[CellChange]:
+    """Cells changed by the moves of one species: departure cells first, then destination cells.
+
+    The map is not modified (see AbstractGameMap.apply_moves).
+    """
+    departures: Dict[Tuple[int, int], int] = {}
+    arrivals: Dict[Tuple[int, int], int] = {}
+    for x0, y0, number, x1, y1 in moves:
+        source, target, number = (int(x0), int(y0)), (int(x1), int(y1)), int(number)
+        departures[source] = departures.get(source, 0) + number
+        arrivals[target] = arrivals.get(target, 0) + number
+    if not departures:
+        return []
+
+    changes = []
+    species = None
+    for (x, y), number in departures.items():
+        cell_species, cell_number = game_map.get_cell_species_and_number((x, y))
+        species = cell_species if species is None else species
+        assert cell_species is species and number <= cell_number, \
+            f"Invalid departure from ({x}, {y}): {number} {species.name} for {cell_number} {cell_species.name}"
+        changes.append((x, y, species if number < cell_number else Species.NONE, int(cell_number) - number))
+
+    defenders = [game_map.get_cell_species_and_number(position) for position in arrivals]
+    if len(arrivals) == 1:
+        (number,), ((defender_species, defender_number),) = arrivals.values(), defenders
+        result_species, result_number = battle_policy.resolve_one(int(species), number, int(defender_species),
+                                                                  int(defender_number))
+        results = ([result_species], [result_number])
+    else:
+        results = battle_policy.resolve(int(species), np.fromiter(arrivals.values(), int, len(arrivals)),
+                                        np.array([int(defender[0]) for defender in defenders]),
+                                        np.array([defender[1] for defender in defenders], dtype=int))
+    for (x, y), result_species, result_number in zip(arrivals, *results):
+        changes.append((x, y, SPECIES_BY_VALUE[result_species], int(result_number)))
+    return changes
+
+
+def to_updates(changes: Iterable[CellChange]) -> List[Tuple[int, int, int, int, int]]:
+    """Server updates (x, y, humans, vampires, werewolves) of changed cells"""
+    return [species.to_cell((x, y), number) for x, y, species, number in changes]
@@ -3,7 +3,7 @@
 import sys
 
 from game_management.game_manager import GameManager
-from boutchou import Boutchou, HumanAI
+from boutchou import Boutchou, get_ai_class
 
 """
 Main script, ready for a tournament.
@@ -39,7 +39,7 @@ else:
 
 def main():
     game_manager = GameManager(server_config=server_config, ai_class=Boutchou) if not human \
-        else GameManager(server_config=None, ai_class=HumanAI)
+        else GameManager(server_config=None, ai_class=get_ai_class("HumanAI"))  # imports Flask
     game_manager.start()
 
     print("End of program")
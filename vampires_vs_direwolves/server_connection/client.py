@@ -42,3 +42,6 @@ class Client(AbstractServer):
 
     def receive_int(self):
         return ServerCommunication.receive_int(self._sock, timeout=self.timeout)
+
+    def receive_ints(self, count: int):
+        return ServerCommunication.receive_ints(self._sock, count, timeout=self.timeout)
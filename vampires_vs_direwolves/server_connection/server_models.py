@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 import select
 import socket
+import struct
+import weakref
 from abc import abstractmethod, ABC
+from threading import Lock
 from time import time, sleep
 from typing import Union, Tuple
 
@@ -13,48 +16,143 @@ from common.exceptions import PlayerTimeoutError
 from server_connection.config_connection import CONFIG
 
 
-class ServerCommunication:
-    @staticmethod
-    def empty_socket(connection):
-        connection: socket.socket
-        bytes_received = bytes()
-        while 1:
-            inputready, o, e = select.select([connection], [], [], 0.0)
-            if len(inputready) == 0:
+class SocketBuffer:
+    """Buffered reader of one connection, and encoder of the messages sent to it.
+
+    Reads fill a preallocated bytearray with as many bytes as available (`recv_into`), messages are then parsed
+    from the buffer: a whole UPD costs one system call instead of one per integer.
+    Messages are encoded with one struct format and sent with one `sendall`.
+    """
+
+    def __init__(self, connection: socket.socket, size: int = 4096):
+        self.connection = connection
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # first unread byte
+        self._end = 0  # end of the received bytes
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _reserve(self, nb_bytes: int):
+        """Make room for nb_bytes unread bytes from the start of the buffer"""
+        nb_unread = len(self)
+        if nb_bytes > len(self._buffer):
+            buffer = bytearray(max(nb_bytes, 2 * len(self._buffer)))
+            buffer[:nb_unread] = self._buffer[self._start:self._end]
+            self._buffer, self._view = buffer, memoryview(buffer)
+        elif self._start:
+            self._view[:nb_unread] = self._view[self._start:self._end]
+        self._start, self._end = 0, nb_unread
+
+    def _recv(self, timeout: float = 0) -> int:
+        """Receive the available bytes in one call (0 if none before the timeout, no timeout if 0)"""
+        if timeout and not select.select([self.connection], [], [], timeout)[0]:
+            return 0
+        nb_received = self.connection.recv_into(self._view[self._end:])
+        if not nb_received:
+            raise ConnectionAbortedError(f"Connection closed by peer: {self.connection}")
+        self._end += nb_received
+        return nb_received
+
+    def _fill(self, nb_bytes: int, timeout: float = 0):
+        """Receive until nb_bytes unread bytes are available (timeout for all of them, 0 for no timeout)"""
+        if len(self) >= nb_bytes:
+            return
+        if self._start + nb_bytes > len(self._buffer):
+            self._reserve(nb_bytes)
+        deadline = time() + timeout
+        while len(self) < nb_bytes:
+            remaining = deadline - time()
+            if timeout and (remaining <= 0 or not self._recv(remaining)):
+                logger.error(f"Timeout Error: more than {timeout} s.")
+                raise PlayerTimeoutError(self.connection)
+            elif not timeout:
+                self._recv()
+
+    def read(self, nb_bytes: int, timeout: float = 0) -> memoryview:
+        """Next nb_bytes bytes, as a view of the buffer valid until the next read"""
+        self._fill(nb_bytes, timeout)
+        view = self._view[self._start:self._start + nb_bytes]
+        self._start += nb_bytes
+        return view
+
+    def read_ints(self, count: int, timeout: float = 0) -> Tuple[int, ...]:
+        """Next `count` integers (1 byte each)"""
+        return tuple(self.read(count, timeout))
+
+    def drain(self) -> bytes:
+        """Discard the buffered bytes and the bytes already received by the socket"""
+        while select.select([self.connection], [], [], 0.0)[0]:
+            if self._end == len(self._buffer):
+                self._reserve(len(self) + 1)
+            nb_received = self.connection.recv_into(self._view[self._end:])
+            if not nb_received:
                 break
-            for s in inputready:
-                bytes_received += s.recv(1)
+            self._end += nb_received
+        extra_bytes = bytes(self._view[self._start:self._end])
+        self._start = self._end = 0
+        return extra_bytes
+
+    @staticmethod
+    def encode(args) -> bytes:
+        """Encode strings (ascii) and integers (1 byte) of nested tuples / lists with one struct format"""
+        formats, values = [], []
+        stack = [iter((args,))]
+        while stack:
+            arg = next(stack[-1], stack)
+            if arg is stack:
+                stack.pop()
+            elif isinstance(arg, (int, np.integer)):
+                if arg >= 256:
+                    logger.warning(f"Integer to send is too big: {arg}! It will be replaced by {arg % 256}.")
+                formats.append("B")
+                values.append(int(arg % 256))  # % 256 to ensure only 1 byte is used
+            elif isinstance(arg, (tuple, list)):
+                stack.append(iter(arg))
+            elif isinstance(arg, str):
+                encoded = arg.encode(encoding="ascii")
+                formats.append(f"{len(encoded)}s")
+                values.append(encoded)
+            else:
+                raise TypeError(arg)
+        return struct.pack("".join(formats), *values)
+
+
+class ServerCommunication:
+    _buffers: 'weakref.WeakKeyDictionary[socket.socket, SocketBuffer]' = weakref.WeakKeyDictionary()
+    _buffers_lock = Lock()
+
+    @classmethod
+    def get_buffer(cls, connection: socket.socket) -> SocketBuffer:
+        """Buffer of a connection, created on first use"""
+        with cls._buffers_lock:
+            buffer = cls._buffers.get(connection)
+            if buffer is None:
+                buffer = cls._buffers[connection] = SocketBuffer(connection)
+        return buffer
+
+    @classmethod
+    def empty_socket(cls, connection):
+        bytes_received = cls.get_buffer(connection).drain()
         if bytes_received:
             logger.warning(f"Extra bytes received from server: {bytes_received}")
             return bytes_received
 
     @classmethod
-    def create_package(cls, arg):
-        if isinstance(arg, (int, np.integer)):
-            if arg >= 256:
-                logger.warning(f"Integer to send is too big: {arg}! It will be replaced by {arg % 256}.")
-            return int(arg % 256).to_bytes(1, "big", signed=False)  # % 256 to ensure only 1 bit is used
-        elif isinstance(arg, (tuple, list)):
-            package = bytes()
-            for sub_arg in arg:
-                sub_pack = cls.create_package(sub_arg)
-                package += sub_pack
-            return package
-        elif isinstance(arg, str):
-            return arg.encode(encoding="ascii")
-        else:
-            raise TypeError(arg)
+    def create_package(cls, arg) -> bytes:
+        return SocketBuffer.encode(arg)
 
     @classmethod
     def send(cls, connection, *args: Union[str, int, Tuple[int, ...]]):
         package = cls.create_package(args)
-        logger.debug(f"Sent {args} !")
-        connection.send(package)
+        logger.debug("Sent %s !", args)
+        connection.sendall(package)
 
     @staticmethod
     def decode(input_bytes: bytes, expected_type: DataType):
         if expected_type is DataType.STR:
-            decoded_str = input_bytes.decode(encoding="ascii")
+            decoded_str = str(input_bytes, encoding="ascii")
         elif expected_type == DataType.INT:
             decoded_str = int.from_bytes(input_bytes, "little")
         else:
@@ -64,30 +162,29 @@ class ServerCommunication:
     @classmethod
     def receive(cls, connection, nb_bytes: int = 3, expected_type: DataType = DataType.STR,
                 timeout: float = 0) -> Union[int, str]:
-        message = bytes()
-        t0 = time()
-        t1 = t0
-        while (len(message) < nb_bytes) and (not timeout or ((t1 - t0) < timeout)):
-            message += connection.recv(nb_bytes - len(message))
-            t1 = time()
-        if timeout and (t1 - t0) >= timeout:
-            logger.error(f"Timeout Error: more than {timeout} s.")
-            raise PlayerTimeoutError(connection)
+        message = cls.get_buffer(connection).read(nb_bytes, timeout)
         decoded_command = cls.decode(message, expected_type)
         return decoded_command
 
     @classmethod
     def receive_command(cls, connection, timeout: float = 0) -> str:
         cmd = cls.receive(connection, nb_bytes=3, expected_type=DataType.STR, timeout=timeout)
-        logger.debug(f"Received command: {cmd}")
+        logger.debug("Received command: %s", cmd)
         return cmd
 
     @classmethod
     def receive_int(cls, connection, timeout: float = 0) -> int:
-        msg_int = cls.receive(connection, nb_bytes=1, expected_type=DataType.INT, timeout=timeout)
-        logger.debug(f"Received int: {msg_int}")
+        msg_int = cls.get_buffer(connection).read(1, timeout)[0]
+        logger.debug("Received int: %s", msg_int)
         return msg_int
 
+    @classmethod
+    def receive_ints(cls, connection, count: int, timeout: float = 0) -> Tuple[int, ...]:
+        """Next `count` integers, parsed from the buffer of the connection"""
+        msg_ints = cls.get_buffer(connection).read_ints(count, timeout)
+        logger.debug("Received ints: %s", msg_ints)
+        return msg_ints
+
 
 class AbstractServer(ABC):
     def __init__(self, config: dict = None):
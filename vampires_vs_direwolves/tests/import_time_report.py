@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Startup time report: runs `python -X importtime` on import statements in fresh processes
+and prints the total import time with the slowest modules (cumulative times, in ms).
+
+Example (from vampires_vs_direwolves):
+    python tests/import_time_report.py "from boutchou import Boutchou" "import game_management.game_master"
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+DEFAULT_STATEMENTS = [
+    "from boutchou import Boutchou",  # main.py
+    "from game_management.game_manager import GameManager",
+]
+
+
+def get_import_times(statement: str) -> List[Tuple[str, int, int, int]]:
+    """(module, depth, self time, cumulative time) of the modules imported by a statement (times in microseconds,
+    depth 0 for the modules imported by the statement itself)
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=root, env=env,
+                            capture_output=True, text=True, check=True)
+    import_times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative_time, module = line[len("import time:"):].split("|")
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        import_times.append((module.strip(), depth, int(self_time), int(cumulative_time)))
+    return import_times
+
+
+def report(statement: str, nb_modules: int):
+    import_times = get_import_times(statement)
+    total = sum(cumulative_time for _module, depth, _self_time, cumulative_time in import_times if not depth)
+    print(f"{statement}: {total / 1000:.1f} ms, {len(import_times)} modules")
+    for module, _depth, _self_time, cumulative_time in sorted(import_times, key=lambda item: -item[3])[:nb_modules]:
+        print(f"    {cumulative_time / 1000:8.1f} ms  {module}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("statements", nargs="*", default=DEFAULT_STATEMENTS, help="import statements to time")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest modules to show")
+    args = parser.parse_args()
+    for import_statement in args.statements:
+        report(import_statement, args.top)
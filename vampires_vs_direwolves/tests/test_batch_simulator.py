@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Batch simulation of headless games: reproducibility, winners and round limit"""
+import random
+
+import numpy as np
+
+from boutchou.random_ai import RandomAI
+from boutchou.rules_sequence import WAIT_TIME
+from common.models import Species
+from game_management.batch_simulator import BatchSimulator, ai_policy
+from game_management.game_map import GameMap
+
+
+def small_game_map():
+    game_map = GameMap()
+    game_map.load_map(4, 5)
+    game_map.update([Species.VAMPIRE.to_cell((0, 0), 6), Species.WEREWOLF.to_cell((4, 3), 6),
+                     Species.HUMAN.to_cell((2, 1), 3), Species.HUMAN.to_cell((1, 3), 5),
+                     Species.HUMAN.to_cell((3, 0), 2)])
+    return game_map
+
+
+def play(seed):
+    random.seed(seed)  # rules use the random module
+    simulator = BatchSimulator.from_game_map(small_game_map(), batch_size=6, seed=seed)
+    policies = {Species.VAMPIRE: ai_policy(RandomAI), Species.WEREWOLF: ai_policy(RandomAI)}
+    winners = simulator.run(policies, max_rounds=30)
+    return winners.copy(), simulator.nb_rounds.copy(), simulator.boards.copy()
+
+
+def test_seeded_runs_are_reproducible():
+    for expected, result in zip(play(3), play(3)):
+        assert np.array_equal(result, expected)
+
+
+def test_ai_policy_creates_one_ai_per_game_without_waiting():
+    created = []
+
+    class CountedAI(RandomAI):
+        def __init__(self):
+            super().__init__()
+            created.append(self)
+
+    simulator = BatchSimulator.from_game_map(small_game_map(), batch_size=3, seed=0)
+    policy = ai_policy(CountedAI)
+    for _i in range(2):
+        policy(simulator, Species.VAMPIRE)
+    assert len(created) == 3
+    assert all(ai.wait_time == 0 for ai in created) and RandomAI.wait_time == WAIT_TIME
+
+
+def test_winners_are_tallied():
+    boards = np.zeros((3, 1, 3, 3), dtype=int)
+    boards[:, 0, 0, Species.VAMPIRE] = (8, 2, 4)
+    boards[:, 0, 1, Species.WEREWOLF] = (2, 8, 4)
+    simulator = BatchSimulator(boards, seed=0)
+
+    def attack(simulator, species):
+        # certain victories only (at least 1.5 times the defenders): game 2 is not played
+        return [[(0, 0, 8, 1, 0)], [], []] if species == Species.VAMPIRE else [[], [(1, 0, 8, 0, 0)], []]
+
+    winners = simulator.run({Species.VAMPIRE: attack, Species.WEREWOLF: attack}, max_rounds=3)
+    assert list(winners) == [Species.VAMPIRE, Species.WEREWOLF, Species.NONE]
+    assert list(simulator.is_over) == [True, True, False]
+    assert simulator.count_species(Species.VAMPIRE).tolist() == [8, 0, 4]
+    assert simulator.count_species(Species.WEREWOLF).tolist() == [0, 8, 4]
+
+
+def test_max_rounds_cutoff():
+    simulator = BatchSimulator.from_game_map(small_game_map(), batch_size=4, seed=0)
+
+    def stay(simulator, species):
+        return [[] for _i in range(simulator.batch_size)]
+
+    winners = simulator.run({Species.VAMPIRE: stay, Species.WEREWOLF: stay}, max_rounds=7)
+    assert (winners == Species.NONE).all() and not simulator.is_over.any()
+    assert (simulator.nb_rounds == 2 * 7).all()  # one step per species and round
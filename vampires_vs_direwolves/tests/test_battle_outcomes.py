@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Outcome table lookups and their use by the chance nodes of the alpha-beta search"""
+import numpy as np
+import pytest
+
+from alphabeta.abstract_possible_moves_computer import SimpleMoveComputer
+from alphabeta.alphabeta import AlphaBetaSearch
+from alphabeta.simple_heuristics import SpeciesRatioHeuristic
+from battle_computer import battle_outcomes
+from battle_computer.battle_computer import compute_outcome_distribution
+from battle_computer.battle_outcomes import OutcomeTable, get_outcome_distribution
+from common.models import Species
+from game_management.game_map import GameMap
+
+MAX_COUNT = 20  # small table, the full one is built in the user cache directory
+
+
+@pytest.fixture(autouse=True)
+def small_table(monkeypatch):
+    monkeypatch.setattr(battle_outcomes, "_table", OutcomeTable.build(MAX_COUNT))
+
+
+@pytest.mark.parametrize("defender_species", [Species.HUMAN, Species.WEREWOLF])
+def test_table_distributions_equal_computed_ones(defender_species):
+    for attacker_count in range(1, MAX_COUNT + 3):
+        for defender_count in range(1, MAX_COUNT + 3):
+            distribution = get_outcome_distribution(Species.VAMPIRE, attacker_count, defender_species, defender_count)
+            expected = compute_outcome_distribution(Species.VAMPIRE, attacker_count, defender_species,
+                                                    defender_count)
+            assert np.array_equal(distribution.species, expected.species)
+            assert np.array_equal(distribution.survivors, expected.survivors)
+            assert np.allclose(distribution.probabilities, expected.probabilities, atol=1e-6)
+
+
+def test_chance_node_is_the_expectation_of_its_outcomes():
+    game_map = GameMap()
+    game_map.load_map(3, 4)
+    game_map.update([Species.VAMPIRE.to_cell((0, 0), 6), Species.HUMAN.to_cell((1, 0), 8),
+                     Species.WEREWOLF.to_cell((3, 2), 5)])
+    move = (0, 0, 4, 1, 0)
+    outcomes = AlphaBetaSearch.get_chance_outcomes(game_map, move, Species.VAMPIRE)
+    assert len(outcomes) == 3
+    assert sum(probability for probability, _board in outcomes) == pytest.approx(1)
+    distribution = compute_outcome_distribution(Species.VAMPIRE, 4, Species.HUMAN, 8)
+    for probability, board in outcomes:
+        assert board.get_cell_species_count((0, 0), Species.VAMPIRE) == 2
+        species, number = board.get_cell_species_and_number((1, 0))
+        is_winner = distribution.species == int(species)
+        assert probability == pytest.approx(distribution.probabilities[is_winner].sum())
+        assert number == round(np.average(distribution.survivors[is_winner],
+                                          weights=distribution.probabilities[is_winner]))
+    assert AlphaBetaSearch.get_chance_outcomes(game_map, (0, 0, 6, 1, 1), Species.VAMPIRE) is None  # empty cell
+
+    search = AlphaBetaSearch(SimpleMoveComputer, SpeciesRatioHeuristic, depth=1, chance_nodes=True)
+    search.specie, search.other_specie = Species.VAMPIRE, Species.WEREWOLF
+    search.explored_nodes = 0
+    child, score, path = search._search_child(game_map, move, Species.VAMPIRE, False, -1e6 - 1, 1e6 + 1, 1)
+    heuristic = SpeciesRatioHeuristic()
+    assert score == pytest.approx(sum(probability * heuristic.evaluate(board, Species.VAMPIRE)
+                                      for probability, board in outcomes))
+    assert child['mv'] == move and path == [child]
+    assert child['board'].get_cell_species_and_number((1, 0)) \
+        == outcomes[0][1].get_cell_species_and_number((1, 0))  # most probable outcome
+
+
+def test_table_is_not_loaded_by_the_search(monkeypatch):
+    monkeypatch.setattr(battle_outcomes, "_table", None)
+    AlphaBetaSearch(SimpleMoveComputer, SpeciesRatioHeuristic, depth=1, chance_nodes=True)
+    assert battle_outcomes._table is None  # built on first use, not during the construction of the AI
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Round trip tests of the binary board format"""
+import mmap
+
+import numpy as np
+import pytest
+
+from common.exceptions import GameMapOverPopulated
+from common.models import Species
+from game_management.board_codec import (DENSE, SPARSE, decode_game_map, from_buffer, get_encoded_size, read_boards,
+                                         to_bytes, to_game_map)
+from game_management.game_map import GameMap
+from tests.test_kernels import SEEDS, random_game_map
+
+
+def assert_same_board(board, game_map):
+    assert (board.n, board.m) == (game_map.n, game_map.m)
+    for species_map in ("human_map", "vampire_map", "werewolf_map"):
+        assert np.array_equal(getattr(board, species_map), getattr(game_map, species_map))
+
+
+@pytest.mark.parametrize("encoding", [DENSE, SPARSE, None])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_round_trip(seed, encoding):
+    game_map = random_game_map(np.random.default_rng(seed))
+    data = to_bytes(game_map, encoding)
+    if encoding is not None:
+        nb_groups = sum(game_map.species_group_counts)
+        assert len(data) == get_encoded_size(game_map.n, game_map.m, encoding, nb_groups)
+    assert_same_board(from_buffer(data), game_map)
+    assert_same_board(to_game_map(from_buffer(data)), game_map)
+    assert_same_board(decode_game_map(data), game_map)
+
+
+def test_read_boards_from_mmap(tmp_path):
+    rng = np.random.default_rng(0)
+    game_maps = [random_game_map(rng) for _i in range(6)]
+    path = tmp_path / "boards.bin"
+    with open(path, "wb") as file:
+        for i, game_map in enumerate(game_maps):
+            file.write(to_bytes(game_map, (DENSE, SPARSE)[i % 2]))
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        boards = list(read_boards(buffer))
+        assert len(boards) == len(game_maps)
+        for board, game_map in zip(boards, game_maps):
+            assert_same_board(board, game_map)
+        del boards, board  # views of the mmap must be released before closing it
+
+
+def test_groups_over_255_are_sparse():
+    game_map = GameMap()
+    game_map.load_map(3, 4)
+    game_map.update([Species.VAMPIRE.to_cell((0, 0), 300), Species.WEREWOLF.to_cell((3, 2), 7),
+                     Species.HUMAN.to_cell((1, 1), 256)])
+    data = to_bytes(game_map)
+    assert data == to_bytes(game_map, SPARSE)
+    assert_same_board(decode_game_map(data), game_map)
+    with pytest.raises(GameMapOverPopulated):
+        from_buffer(data)
+    with pytest.raises(GameMapOverPopulated):
+        to_bytes(game_map, DENSE)
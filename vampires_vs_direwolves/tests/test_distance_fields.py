@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Tests of the safe routes of the distance fields and of their cache"""
+import numpy as np
+import pytest
+
+from common.models import Species
+from game_management.distance_fields import DANGER_COST, UNREACHABLE, DistanceFieldService, compute_distance_field
+from game_management.game_map import GameMap
+from tests.test_game_maps import random_update
+from tests.test_kernels import SEEDS, random_game_map
+
+
+def test_only_enemies_certain_to_win_are_dangerous():
+    game_map = GameMap()
+    game_map.load_map(5, 7)
+    game_map.update([Species.VAMPIRE.to_cell((0, 2), 10),
+                     Species.WEREWOLF.to_cell((3, 0), 8),  # not beaten surely, but can not win surely either
+                     Species.WEREWOLF.to_cell((3, 4), 15)])  # certain to win if it attacks
+    field = compute_distance_field(game_map, Species.VAMPIRE, (0, 2), 10)
+
+    assert field.costs[0, 3] == field.costs[4, 3] == UNREACHABLE
+    assert field.costs[1, 2] == field.costs[1, 3] == field.costs[1, 4] == 1
+    assert field.costs[3, 2] == field.costs[3, 3] == field.costs[3, 4] == 1 + DANGER_COST
+    assert field.get_distance((3, 1)) == 3
+    assert field.get_distance((3, 3)) == 3 + DANGER_COST
+    assert field.get_distance((6, 2)) == 6
+
+
+def test_groups_of_the_same_size_class_share_their_field():
+    game_map = GameMap()
+    game_map.load_map(5, 7)
+    game_map.update([Species.VAMPIRE.to_cell((0, 2), 10),
+                     Species.WEREWOLF.to_cell((3, 0), 8),
+                     Species.WEREWOLF.to_cell((3, 4), 15)])
+    service = DistanceFieldService()
+    field = service.get_field(game_map, Species.VAMPIRE, (0, 2))
+    assert service.get_field(game_map, Species.VAMPIRE, (0, 2), 9) is field
+    assert service.get_field(game_map, Species.VAMPIRE, (0, 2), 12) is not field  # beats the small enemy
+
+    game_map.update([Species.WEREWOLF.to_cell((3, 4), 13)])  # no longer certain to win against 9 vampires
+    assert service.get_field(game_map, Species.VAMPIRE, (0, 2), 9) is not field
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cached_fields_equal_new_fields(seed):
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    service = DistanceFieldService()
+    for _i in range(5):
+        for species in (Species.VAMPIRE, Species.WEREWOLF):
+            for position, number in game_map.find_species_position_and_number(species):
+                for group_number in (number, int(rng.integers(1, 60))):
+                    field = service.get_field(game_map, species, position, group_number)
+                    expected = compute_distance_field(game_map, species, position, group_number)
+                    assert np.array_equal(field.costs, expected.costs)
+                    assert np.array_equal(field.distances, expected.distances)
+        game_map.update([random_update(game_map, rng)])
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Consistency tests between GameMap and the other boards, cached values included"""
+import numpy as np
+import pytest
+
+from common.models import Species
+from game_management.board_snapshot import COMPACTION_DEPTH, BoardSnapshot
+from game_management.compact_game_map import CompactGameMap
+from game_management.server_game_map import ServerGameMap
+from game_management.sparse_game_map import SparseGameMap
+from tests.test_kernels import SEEDS, random_game_map
+from tests.test_transition import random_moves
+
+SPECIES = (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF)
+
+
+def random_update(game_map, rng: np.random.Generator):
+    x, y = int(rng.integers(game_map.m)), int(rng.integers(game_map.n))
+    return Species(int(rng.integers(4))).to_cell((x, y), int(rng.integers(1, 30)))
+
+
+def assert_same_groups(board, game_map):
+    for species in SPECIES:
+        assert [(tuple(position), int(number)) for position, number
+                in board.species_position_and_number_generator(species)] \
+            == [(tuple(position), int(number)) for position, number
+                in game_map.species_position_and_number_generator(species)]
+        assert board.count_species(species) == game_map.count_species(species)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sparse_sorted_groups_follow_updates(seed):
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    board = SparseGameMap.from_game_map(game_map)
+    assert_same_groups(board, game_map)  # fills the cache
+    board_copy, game_map_copy = board.copy(), game_map.copy()
+    for _i in range(5):
+        update = random_update(game_map, rng)
+        game_map.update([update])
+        board.update([update])
+        assert_same_groups(board, game_map)
+    assert_same_groups(board_copy, game_map_copy)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_snapshot_cached_cells_follow_the_chain(seed):
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    snapshot = BoardSnapshot.from_game_map(game_map)
+    for depth in range(COMPACTION_DEPTH + 5):
+        if depth % 3 == 0:
+            snapshot.save_board()  # cached in some ancestors only
+        snapshot = snapshot.child()
+        update = random_update(game_map, rng)
+        game_map.update([update])
+        snapshot.update([update])
+        assert snapshot.to_dense() is snapshot.to_dense()
+        assert np.array_equal(snapshot.map_table, game_map.map_table)
+        assert_same_groups(snapshot, game_map)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_game_map_listeners_and_spatial_indexes(seed):
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    notifications = []
+    game_map.add_listener(lambda changed_map, cells: notifications.append(cells))
+    spatial_indexes = [game_map.get_spatial_index(species) for species in SPECIES]
+    for _i in range(5):
+        update = random_update(game_map, rng)
+        game_map.update([update])
+        assert notifications[-1] == {update[:2]}
+        for species, spatial_index in zip(SPECIES, spatial_indexes):
+            assert game_map.get_spatial_index(species) is spatial_index
+            assert sorted(spatial_index.items()) == sorted(game_map.species_position_and_number_generator(species))
+
+    other_map = random_game_map(rng)
+    game_map.load_board(*other_map.save_board())
+    assert notifications[-1] is None
+    for species in SPECIES:
+        assert sorted(game_map.get_spatial_index(species).items()) \
+            == sorted(other_map.species_position_and_number_generator(species))
+
+
+class FakeViewer:
+    def __init__(self):
+        self.calls = []
+
+    def load(self, game_map):
+        self.calls.append("load")
+
+    def update(self, ls_updates=None):
+        self.calls.append(("update", ls_updates))
+
+    def monitor(self, game_monitor):
+        self.calls.append("monitor")
+
+
+def test_server_game_map_update_reaches_its_viewer():
+    game_map = ServerGameMap()
+    game_map._map_viewer = viewer = FakeViewer()
+    game_map.load_map(3, 4)
+    updates = [Species.VAMPIRE.to_cell((0, 0), 4), Species.WEREWOLF.to_cell((3, 2), 4)]
+    game_map.update(updates)
+    assert viewer.calls == ["load", ("update", updates), "monitor"]
+    assert game_map.count_species(Species.VAMPIRE) == 4 and game_map.update_number == 0
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_compact_game_map_matches_game_map(seed):
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    board = CompactGameMap()
+    board.load_map(game_map.n, game_map.m)
+    board.update([species.to_cell(position, int(number)) for species in SPECIES
+                  for position, number in game_map.species_position_and_number_generator(species)])
+    for _i in range(5):
+        update = random_update(game_map, rng)
+        game_map.update([update])
+        board.update([update])
+        moves = random_moves(game_map, rng) if not game_map.game_over()[0] else []
+        if moves:
+            game_map.apply_moves(moves)
+            board.apply_moves(moves)
+        for species in SPECIES:
+            assert board.count_species(species) == game_map.count_species(species)
+            assert [(tuple(position), int(number)) for position, number
+                    in board.find_species_position_and_number(species)] \
+                == [(tuple(position), int(number)) for position, number
+                    in game_map.find_species_position_and_number(species)]
+        for species_map in ("human_map", "vampire_map", "werewolf_map"):
+            assert np.array_equal(getattr(board, species_map), getattr(game_map, species_map))
+            assert getattr(board, species_map).dtype.kind == "i"
+    assert (board.human_map - 300).min() < 0  # no uint8 wrap around
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Ordering and lazy evaluation of the lexicographic scores of HeuristicGroup"""
+import pytest
+
+from alphabeta.abstract_heuristic import AbstractHeuristic
+from alphabeta.group_heuristics import HeuristicGroup, LexicographicScore
+from common.models import Species
+
+
+class CountingEvaluator:
+    def __init__(self, value: float):
+        self.value = value
+        self.nb_calls = 0
+
+    def __call__(self) -> float:
+        self.nb_calls += 1
+        return self.value
+
+
+def make_score(*values: float) -> LexicographicScore:
+    return LexicographicScore([CountingEvaluator(value) for value in values])
+
+
+@pytest.mark.parametrize("values, other_values", [
+    ((1, 2), (1, 3)), ((1, 5), (2, 0)), ((0, 0, 1), (0, 1, 0)), ((3,), (3, 0)), ((-1e6 - 1,), (-1, 0)),
+])
+def test_score_ordering_is_tuple_ordering(values, other_values):
+    score, other = make_score(*values), make_score(*other_values)
+    assert score < other and other > score and score <= other and score != other
+    assert not (score == other) and not (score >= other)
+    assert make_score(*values) == make_score(*values)
+
+
+@pytest.mark.parametrize("values, number", [
+    ((1,), 1), ((1, 0), 1), ((1, -5), 1), ((1, 2), 0.5), ((1, 2), 1.5), ((2,), 1e6 + 1), ((2,), -1e6 - 1),
+])
+def test_number_is_a_one_value_score(values, number):
+    """Mixed comparisons (alpha/beta bounds) give the same results as with the score (number,)"""
+    score, number_score = make_score(*values), make_score(number)
+    assert (score == number) == (score == number_score) == (values == (number,))
+    assert (score < number) == (score < number_score) == (values < (number,))
+    assert (score > number) == (score > number_score) == (values > (number,))
+    assert (number < score) == (score > number)
+    assert (score >= number) == (not score < number)
+
+
+def test_lazy_evaluation():
+    evaluators = [CountingEvaluator(1), CountingEvaluator(2), CountingEvaluator(3)]
+    score = LexicographicScore(evaluators)
+    assert score > make_score(0, 5, 5)
+    assert [evaluator.nb_calls for evaluator in evaluators] == [1, 0, 0]
+    assert score < make_score(1, 3, 0)
+    assert [evaluator.nb_calls for evaluator in evaluators] == [1, 1, 0]
+    assert score > 1  # decided by the number of values: nothing more to evaluate
+    assert [evaluator.nb_calls for evaluator in evaluators] == [1, 1, 0]
+    assert score.values == (1, 2, 3)
+    assert score == make_score(1, 2, 3)
+    assert [evaluator.nb_calls for evaluator in evaluators] == [1, 1, 1]  # values are computed once
+
+
+class ConstantHeuristic(AbstractHeuristic):
+    value = 0
+    nb_calls = 0
+
+    def evaluate(self, game_map, specie: Species):
+        type(self).nb_calls += 1
+        return self.value
+
+
+class FirstHeuristic(ConstantHeuristic):
+    value = 2
+
+
+class SecondHeuristic(ConstantHeuristic):
+    value = 3
+
+
+def test_heuristic_group_lazy_mode():
+    FirstHeuristic.nb_calls = SecondHeuristic.nb_calls = 0
+    lazy_group = HeuristicGroup([FirstHeuristic, SecondHeuristic], lazy=True)
+    score = lazy_group.evaluate(None, Species.VAMPIRE)
+    assert (FirstHeuristic.nb_calls, SecondHeuristic.nb_calls) == (0, 0)
+    assert score > make_score(1, 10)
+    assert (FirstHeuristic.nb_calls, SecondHeuristic.nb_calls) == (1, 0)
+    assert score.values == (2, 3)
+
+    weighted_group = HeuristicGroup([FirstHeuristic, SecondHeuristic], weight=10)
+    assert weighted_group.evaluate(None, Species.VAMPIRE) == 10 ** 2 * 2 + 10 * 3
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Equivalence tests between the kernels (JIT-compiled if Numba is installed) and the original NumPy/Python code"""
+import numpy as np
+import pytest
+
+from alphabeta.num_dist_heur import NumberAndDistanceHeuristic
+from battle_computer.battle_computer import BattleComputer
+from common.models import Species
+from game_management import kernels
+from game_management.game_map import GameMap, compute_new_board
+from game_management.map_helpers import get_direct_distance
+
+SEEDS = range(20)
+
+
+def random_game_map(rng: np.random.Generator) -> GameMap:
+    n, m = rng.integers(2, 12, size=2)
+    game_map = GameMap()
+    game_map.load_map(n, m)
+    cells = rng.permutation(n * m)[:rng.integers(2, n * m + 1)]
+    updates = []
+    for i, cell in enumerate(cells):
+        # at least one vampire group and one werewolf group
+        species = Species.VAMPIRE if i == 0 else Species.WEREWOLF if i == 1 else Species(rng.integers(0, 3))
+        updates.append(species.to_cell((int(cell % m), int(cell // m)), int(rng.integers(1, 30))))
+    game_map.update(updates)
+    return game_map
+
+
+def random_move(game_map: GameMap, rng: np.random.Generator):
+    species = Species.VAMPIRE if rng.integers(2) else Species.WEREWOLF
+    positions = game_map.find_species_position_and_number(species)
+    (x, y), number = positions[rng.integers(len(positions))]
+    destinations = game_map.get_possible_moves((x, y), force_move=True)
+    return (x, y, int(rng.integers(1, number + 1)), *destinations[rng.integers(len(destinations))])
+
+
+@pytest.fixture(params=[False, True], ids=["kernel", "py_func"])
+def use_py_func(request):
+    return request.param
+
+
+def get_kernel(name, use_py_func):
+    kernel = getattr(kernels, name)
+    return kernel.py_func if use_py_func else kernel
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_decode_cell(seed, use_py_func):
+    decode_cell = get_kernel("decode_cell", use_py_func)
+    game_map = random_game_map(np.random.default_rng(seed))
+    for cell in game_map.cells:
+        expected_species, expected_number = Species.from_cell_to_species_and_number(cell)
+        assert decode_cell(*cell) == (int(expected_species), expected_number)
+    assert decode_cell(1, 2, 0) == (kernels.CORRUPTED, 0)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_direct_distance(seed, use_py_func):
+    direct_distance = get_kernel("direct_distance", use_py_func)
+    rng = np.random.default_rng(seed)
+    for x1, y1, x2, y2 in rng.integers(0, 30, size=(100, 4)):
+        assert direct_distance(x1, y1, x2, y2) == get_direct_distance((x1, y1), (x2, y2))
+
+
+def test_battle_for_minmax(use_py_func):
+    battle_for_minmax = get_kernel("battle_for_minmax", use_py_func)
+    for attacker in (Species.VAMPIRE, Species.WEREWOLF):
+        for defender in (Species.HUMAN, attacker.get_opposite_species()):
+            for attacker_number in range(1, 40):
+                for defender_number in range(1, 40):
+                    expected = BattleComputer((attacker, attacker_number),
+                                              (defender, defender_number)).compute_battle_for_minmax()
+                    result = battle_for_minmax(int(attacker), attacker_number, int(defender), defender_number)
+                    assert result == (int(expected[0]), expected[1])
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_apply_move(seed, use_py_func, monkeypatch):
+    apply_move = get_kernel("apply_move", use_py_func)
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    for _ in range(10):
+        move = random_move(game_map, rng)
+        monkeypatch.setattr(kernels, "NUMBA_AVAILABLE", False)
+        expected_map = compute_new_board(game_map, move)
+        monkeypatch.undo()
+
+        new_map = GameMap()
+        new_map.load_board(*game_map.save_board())
+        apply_move(new_map.map_table, new_map.human_map, new_map.vampire_map, new_map.werewolf_map, *move)
+        for expected, result in zip(expected_map.save_board()[2:], new_map.save_board()[2:]):
+            np.testing.assert_array_equal(result, expected)
+        if expected_map.game_over()[0]:
+            break
+        game_map = expected_map
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_humans_attraction(seed, use_py_func):
+    humans_attraction = get_kernel("humans_attraction", use_py_func)
+    game_map = random_game_map(np.random.default_rng(seed))
+    (pos_vamp, nb_vamp), (pos_wolv, nb_wolves) = (game_map.find_species_position_and_number(species)[0]
+                                                  for species in (Species.VAMPIRE, Species.WEREWOLF))
+    expected = NumberAndDistanceHeuristic._humans_attractions(game_map, pos_vamp, nb_vamp, pos_wolv, nb_wolves)
+    assert humans_attraction(game_map.human_map, *pos_vamp, nb_vamp) == expected[0]
+    assert humans_attraction(game_map.human_map, *pos_wolv, nb_wolves) == expected[1]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_game_map_paths(seed, monkeypatch):
+    """Both paths of the callers (kernels and original code) give the same results"""
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    moves = [random_move(game_map, rng) for _ in range(5)]
+
+    def run():
+        heuristic = NumberAndDistanceHeuristic()
+        cells = [game_map.get_cell_species_and_number(position) for position in game_map.positions]
+        boards = [compute_new_board(game_map, move).save_board()[2] for move in moves]
+        return cells, boards, [heuristic.evaluate(game_map, species) for species in (Species.VAMPIRE, Species.WEREWOLF)]
+
+    monkeypatch.setattr(kernels, "NUMBA_AVAILABLE", True)
+    with_kernels = run()
+    monkeypatch.setattr(kernels, "NUMBA_AVAILABLE", False)
+    without_kernels = run()
+    assert with_kernels[0] == without_kernels[0]
+    for result, expected in zip(with_kernels[1], without_kernels[1]):
+        np.testing.assert_array_equal(result, expected)
+    assert with_kernels[2] == without_kernels[2]
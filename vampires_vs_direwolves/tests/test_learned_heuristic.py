@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Feature extraction and weights of the learned heuristic"""
+import numpy as np
+import pytest
+
+from alphabeta import learned_heuristic
+from alphabeta.learned_heuristic import (DEFAULT_LAYERS, LearnedHeuristic, distance_to_nearest,
+                                         extract_board_features, extract_features, load_weights, save_weights)
+from common.models import Species
+from game_management.game_map import GameMap
+from tests.test_kernels import SEEDS, random_game_map
+
+
+def test_distance_to_nearest():
+    masks = np.zeros((2, 4, 5), dtype=bool)
+    masks[0, 1, 1] = True
+    distances = distance_to_nearest(masks)
+    expected = np.maximum(np.abs(np.arange(4)[:, None] - 1), np.abs(np.arange(5)[None, :] - 1))
+    assert np.array_equal(distances[0], expected)
+    assert np.isinf(distances[1]).all()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("species", [Species.VAMPIRE, Species.WEREWOLF])
+def test_board_features_equal_batch_features(seed, species):
+    game_map = random_game_map(np.random.default_rng(seed))
+    own_map, opponent_map = (game_map.vampire_map, game_map.werewolf_map) if species is Species.VAMPIRE \
+        else (game_map.werewolf_map, game_map.vampire_map)
+    expected = extract_features(game_map.human_map[None], own_map[None], opponent_map[None])[0]
+    features = extract_board_features(game_map, species, Species.get_opposite_species(species))
+    assert np.allclose(features, expected)
+
+
+def test_evaluate_equals_evaluate_many():
+    heuristic = LearnedHeuristic(weights_path="")
+    game_maps = [random_game_map(np.random.default_rng(seed)) for seed in SEEDS]
+    for n, m in {(game_map.n, game_map.m) for game_map in game_maps}:
+        same_size = [game_map for game_map in game_maps if (game_map.n, game_map.m) == (n, m)]
+        scores = heuristic.evaluate_many(same_size, Species.VAMPIRE)
+        assert np.allclose([heuristic.evaluate(game_map, Species.VAMPIRE) for game_map in same_size], scores)
+
+
+def test_evaluate_extinct_species():
+    game_map = GameMap()
+    game_map.load_map(3, 3)
+    game_map.update([(0, 0, 0, 4, 0), (2, 2, 3, 0, 0)])
+    heuristic = LearnedHeuristic(weights_path="")
+    for species, expected in ((Species.VAMPIRE, 1e6), (Species.WEREWOLF, -1e6)):
+        assert heuristic.evaluate(game_map, species) == expected
+        assert heuristic.evaluate_many([game_map], species).tolist() == [expected]
+
+    game_map.update([(0, 0, 0, 0, 0)])  # both species extinct: lost for both
+    for species in (Species.VAMPIRE, Species.WEREWOLF):
+        assert heuristic.evaluate(game_map, species) == -1e6
+        assert heuristic.evaluate_many([game_map], species).tolist() == [-1e6]
+
+
+def test_weights_round_trip(tmp_path):
+    path = str(tmp_path / "weights" / "model.npz")
+    assert load_weights(path) is DEFAULT_LAYERS  # missing file
+    layers = [(np.arange(8.).reshape(4, 2), np.array([1., -1.])), (np.array([[2.], [3.]]), np.array([0.5]))]
+    save_weights(path, layers)  # also invalidates the default weights cached for this path
+    loaded = load_weights(path)
+    assert len(loaded) == 2
+    for (weights, bias), (loaded_weights, loaded_bias) in zip(layers, loaded):
+        assert np.array_equal(weights, loaded_weights) and np.array_equal(bias, loaded_bias)
+    assert load_weights(path) is loaded  # loaded once per path
+    learned_heuristic._loaded_layers.pop(path)
+
+    features = np.array([[1., 2., 3., 4.]])
+    hidden = np.maximum(features @ layers[0][0] + layers[0][1], 0)
+    assert LearnedHeuristic(path)._layers is not DEFAULT_LAYERS
+    assert np.allclose(learned_heuristic.predict(loaded, features), (hidden @ layers[1][0] + layers[1][1])[:, 0])
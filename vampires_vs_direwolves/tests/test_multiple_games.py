@@ -16,13 +16,14 @@ class GameComparator:
         self._map_paths = map_paths or [""]
         logger.info(f"AIs: {[ai.__name__ for ai in self._ais]}\nMaps: {map_paths}")
 
-    def test(self, nb_games: int = 2, only_different_ais=False, show_map=False):
+    def test(self, nb_games: int = 2, only_different_ais=False, show_map=False, seed: int = None):
         MapViewer().set_visible(show_map)
         game_master = GameMasterWorker(
             nb_players=2,
             max_rounds=200,
             max_nb_games=nb_games,
-            auto_restart=len(self._map_paths)*int(0.5 * (len(self._ais) * (1 + len(self._ais) - 2 * int(only_different_ais)))) - 1
+            auto_restart=len(self._map_paths)*int(0.5 * (len(self._ais) * (1 + len(self._ais) - 2 * int(only_different_ais)))) - 1,
+            seed=seed  # same seed: same random battle results for all the AIs
         )
         game_master.change_map_path(self._map_paths[0])
         game_master.start()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Neighbour tables against the former computation of the possible moves"""
+from typing import List, Tuple
+
+import pytest
+
+from game_management.game_map import GameMap
+from game_management.neighbour_tables import DIAGONAL_SHIFTS, MOVE_SHIFTS, STRAIGHT_SHIFTS, get_neighbour_table
+
+MAP_SIZES = [(2, 2), (2, 7), (5, 3), (6, 6), (10, 13)]
+ONE_WIDE_MAP_SIZES = [(1, 1), (1, 2), (1, 6), (2, 1), (6, 1)]
+
+
+def _get_move_range(coord: int, max_coord: int) -> Tuple[int, int]:
+    if coord + 1 == max_coord:
+        return -1, 1
+    elif coord == 0:
+        return 0, 2
+    return -1, 2
+
+
+def former_possible_moves(n: int, m: int, position: Tuple[int, int], force_move: bool) -> List[Tuple[int, int]]:
+    """Former AbstractGameMap.get_possible_moves (maps of at least 2 x 2 cells)"""
+    x, y = position
+    positions_set = set()
+    for shift_x in range(*_get_move_range(x, m)):
+        for shift_y in range(*_get_move_range(y, n)):
+            positions_set.add((x + shift_x, y + shift_y))
+    if force_move:
+        positions_set.difference_update({position})
+    assert 4 - int(force_move) <= len(positions_set) <= 9 - int(force_move)
+    return list(positions_set)
+
+
+def brute_force_moves(n: int, m: int, position: Tuple[int, int], force_move: bool) -> set:
+    return {(x, y) for y in range(n) for x in range(m)
+            if max(abs(x - position[0]), abs(y - position[1])) <= 1 and (not force_move or (x, y) != position)}
+
+
+def load_map(n: int, m: int) -> GameMap:
+    game_map = GameMap()
+    game_map.load_map(n, m)
+    return game_map
+
+
+@pytest.mark.parametrize("force_move", [False, True])
+@pytest.mark.parametrize("n, m", MAP_SIZES)
+def test_possible_moves_are_the_former_ones(n, m, force_move):
+    table, game_map = get_neighbour_table(n, m), load_map(n, m)
+    for y in range(n):
+        for x in range(m):
+            expected = former_possible_moves(n, m, (x, y), force_move)  # same order: moves of the rules depend on it
+            assert list(table.get_possible_moves((x, y), force_move)) == expected
+            assert game_map.get_possible_moves((x, y), force_move) == expected
+            corner_or_edge = (x in (0, m - 1)) + (y in (0, n - 1))
+            assert len(expected) == (9, 6, 4)[corner_or_edge] - force_move
+    forbidden = {(0, 0), (1, 1)}
+    assert game_map.get_possible_moves((0, 1), True, forbidden) \
+        == [move for move in former_possible_moves(n, m, (0, 1), True) if move not in forbidden]
+
+
+@pytest.mark.parametrize("force_move", [False, True])
+@pytest.mark.parametrize("n, m", ONE_WIDE_MAP_SIZES)
+def test_possible_moves_of_one_wide_boards(n, m, force_move):
+    # game maps have at least 2 x 2 cells, but the tables do not depend on it
+    # (the former computation left the board on these sizes: x - 1 or y - 1 < 0)
+    table = get_neighbour_table(n, m)
+    for y in range(n):
+        for x in range(m):
+            moves = table.get_possible_moves((x, y), force_move)
+            assert len(moves) == len(set(moves))
+            assert set(moves) == brute_force_moves(n, m, (x, y), force_move)
+    if n * m == 1:
+        assert table.get_possible_moves((0, 0), force_move=True) == ()
+    with pytest.raises(AssertionError):
+        load_map(n, m)
+
+
+@pytest.mark.parametrize("n, m", MAP_SIZES + ONE_WIDE_MAP_SIZES)
+def test_shifted_neighbours(n, m):
+    table = get_neighbour_table(n, m)
+    assert get_neighbour_table(n, m) is table  # built once per map size
+    for y in range(n):
+        for x in range(m):
+            index = table.index((x, y))
+            assert index == y * m + x
+
+            def shifted(shift):
+                new_x, new_y = x + shift[0], y + shift[1]
+                return (new_x, new_y) if 0 <= new_x < m and 0 <= new_y < n else None
+
+            assert table.moves[index] == tuple(position for position in map(shifted, MOVE_SHIFTS) if position)
+            assert set(table.moves[index]) == brute_force_moves(n, m, (x, y), True)
+            assert table.flat_moves[index] == tuple(table.index(position) for position in table.moves[index])
+            assert table.diagonals[index] == tuple(map(shifted, DIAGONAL_SHIFTS))
+            assert table.straights[index] == tuple(map(shifted, STRAIGHT_SHIFTS))
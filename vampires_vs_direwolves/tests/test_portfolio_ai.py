@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Confidence rules of PortfolioAI, on engine results given without any worker process"""
+from concurrent.futures import Future
+
+import pytest
+
+from boutchou.expert_ai import ExpertAI
+from boutchou.portfolio_ai import PortfolioAI
+from common.models import Species
+from game_management.game_map import GameMap
+
+MOVE_1 = ((0, 0, 4, 1, 0),)
+MOVE_2 = ((0, 0, 4, 0, 1),)
+MOVE_3 = ((0, 0, 4, 1, 1),)
+
+
+class EngineA(ExpertAI):
+    pass
+
+
+class EngineB(ExpertAI):
+    pass
+
+
+class EngineC(ExpertAI):
+    pass
+
+
+ENGINES = [EngineA, EngineB, EngineC]
+
+
+def make_portfolio(**kwargs) -> PortfolioAI:
+    game_map = GameMap()
+    game_map.load_map(3, 4)
+    game_map.update([Species.VAMPIRE.to_cell((0, 0), 4), Species.WEREWOLF.to_cell((3, 2), 4)])
+    portfolio = PortfolioAI(engines=ENGINES, **kwargs)
+    portfolio.load_map(game_map)
+    portfolio.load_species(Species.VAMPIRE)
+    return portfolio
+
+
+def done_future(moves, score=None) -> Future:
+    future = Future()
+    future.set_result((list(moves), score))
+    return future
+
+
+@pytest.mark.parametrize("rule", ["agreement", "score"])
+def test_agreement(rule):
+    portfolio = make_portfolio(rule=rule)
+    assert portfolio._choose({engine: (MOVE_1, None) for engine in ENGINES}) == MOVE_1
+
+
+def test_majority_and_ties():
+    portfolio = make_portfolio()
+    assert portfolio._choose({EngineA: (MOVE_1, None), EngineB: (MOVE_2, None), EngineC: (MOVE_2, None)}) == MOVE_2
+    assert portfolio._choose({EngineB: (MOVE_2, None), EngineC: (MOVE_3, None)}) == MOVE_2  # engines order
+    assert portfolio._choose({}) is None
+
+
+def test_map_preference():
+    portfolio = make_portfolio(map_preferences={(3, 4): EngineC})
+    assert portfolio._choose({EngineA: (MOVE_1, None), EngineB: (MOVE_1, None), EngineC: (MOVE_3, None)}) == MOVE_3
+    assert portfolio._choose({EngineA: (MOVE_1, None), EngineB: (MOVE_2, None)}) == MOVE_1  # not ready
+
+
+def test_score_is_ranked_per_engine():
+    portfolio = make_portfolio(rule="score")
+    # scores of different heuristics: EngineA always scores much higher than EngineB
+    portfolio._scores = {EngineA: [100., 200., 150.], EngineB: [0.1, 0.2, 0.5]}
+    assert portfolio._choose({EngineA: (MOVE_1, 150.), EngineB: (MOVE_2, 0.5)}) == MOVE_2
+    portfolio._scores = {EngineA: [100., 200., 250.], EngineB: [0.1, 0.2, 0.15]}
+    assert portfolio._choose({EngineA: (MOVE_1, 250.), EngineB: (MOVE_2, 0.15)}) == MOVE_1
+    portfolio._scores = {EngineA: [250.], EngineB: [0.15]}
+    assert portfolio._choose({EngineA: (MOVE_1, 250.), EngineB: (MOVE_2, 0.15)}) == MOVE_1  # engines order
+    # engines without score are ignored, "agreement" without any score
+    assert portfolio._choose({EngineA: (MOVE_1, None), EngineB: (MOVE_2, 0.15), EngineC: (MOVE_1, None)}) == MOVE_2
+    assert portfolio._choose({EngineA: (MOVE_1, None), EngineB: (MOVE_2, None), EngineC: (MOVE_2, None)}) == MOVE_2
+
+
+def test_collect_records_scores_and_skips_late_engines():
+    portfolio = make_portfolio(rule="score", deadline=0.01)
+    late = Future()
+    results = portfolio._collect({EngineA: done_future(MOVE_1, 3.), EngineB: late,
+                                  EngineC: done_future(((0, 0, 5, 1, 0),), 1.)})  # invalid move
+    assert results == {EngineA: (MOVE_1, 3.)}
+    assert portfolio._scores == {EngineA: [3.]}
+    assert portfolio._pending == {EngineB: late}
+
+
+def test_timeout_fallback_to_safe_move(monkeypatch):
+    portfolio = make_portfolio(deadline=0.01)
+    monkeypatch.setattr(portfolio, "_submit", lambda: {engine: Future() for engine in ENGINES})
+    moves = portfolio.generate_move()
+    assert moves == portfolio.generate_safe_move()
+    assert set(portfolio._pending) == set(ENGINES)
+
+
+def test_close():
+    class FakeExecutor:
+        def __init__(self):
+            self.calls = []
+
+        def shutdown(self, wait=True):
+            self.calls.append(wait)
+
+    portfolio = make_portfolio()
+    portfolio._executor = executor = FakeExecutor()
+    portfolio._pending = {EngineA: Future()}
+    portfolio.close()
+    portfolio.close()
+    assert executor.calls == [False] and portfolio._executor is None and not portfolio._pending
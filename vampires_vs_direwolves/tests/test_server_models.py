@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Buffered reads and encoded messages of the server protocol, on a local socket pair"""
+import socket
+from threading import Timer
+
+import pytest
+
+from common.exceptions import PlayerTimeoutError
+from server_connection.server_models import ServerCommunication, SocketBuffer
+
+
+@pytest.fixture
+def sockets():
+    sender, receiver = socket.socketpair()
+    yield sender, receiver
+    sender.close()
+    receiver.close()
+
+
+def test_update_larger_than_the_buffer(sockets):
+    sender, receiver = sockets
+    updates = [(x % 256, x // 256, 0, x % 7, 0) for x in range(1000)]  # 5000 bytes
+    ServerCommunication.send(sender, "UPD", 1000 % 256, updates)
+    buffer = SocketBuffer(receiver, size=4096)
+    assert bytes(buffer.read(3, timeout=1)) == b"UPD"
+    assert buffer.read_ints(1, timeout=1) == (1000 % 256,)
+    assert buffer.read_ints(5 * 1000, timeout=1) == tuple(value for update in updates for value in update)
+    assert not len(buffer)
+
+
+def test_message_split_across_recv_calls(sockets):
+    sender, receiver = sockets
+    sender.sendall(b"MO")
+    timer = Timer(0.05, sender.sendall, [b"V" + SocketBuffer.encode((1, (2, 3, 4, 5, 6)))])
+    timer.start()
+    assert ServerCommunication.receive_command(receiver, timeout=2) == "MOV"
+    assert ServerCommunication.receive_ints(receiver, 6, timeout=2) == (1, 2, 3, 4, 5, 6)
+    timer.join()
+
+
+def test_timeout(sockets):
+    sender, receiver = sockets
+    buffer = SocketBuffer(receiver)
+    with pytest.raises(PlayerTimeoutError):
+        buffer.read(3, timeout=0.05)
+    sender.sendall(b"EN")
+    with pytest.raises(PlayerTimeoutError):
+        buffer.read(3, timeout=0.05)  # incomplete message
+    sender.sendall(b"D")
+    assert bytes(buffer.read(3, timeout=1)) == b"END"
+
+
+def test_peer_close(sockets):
+    sender, receiver = sockets
+    buffer = SocketBuffer(receiver)
+    sender.sendall(b"BY")
+    sender.close()
+    with pytest.raises(ConnectionAbortedError):
+        buffer.read(3)
+
+
+def test_drain(sockets):
+    sender, receiver = sockets
+    buffer = SocketBuffer(receiver, size=8)
+    sender.sendall(bytes(range(20)))
+    assert buffer.read_ints(2, timeout=1) == (0, 1)
+    assert buffer.drain() == bytes(range(2, 20))  # buffered and still in the socket
+    assert buffer.drain() == b""
+    sender.sendall(b"SET")
+    assert bytes(buffer.read(3, timeout=1)) == b"SET"
+
+
+def test_encode():
+    assert SocketBuffer.encode(("UPD", 2, [(1, 2, 0, 3, 0), (4, 5, 6, 0, 0)])) \
+        == b"UPD" + bytes([2, 1, 2, 0, 3, 0, 4, 5, 6, 0, 0])
+    assert SocketBuffer.encode((300,)) == bytes([300 % 256])
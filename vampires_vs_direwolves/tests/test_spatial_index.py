@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Queries of the spatial index against a brute-force Chebyshev scan of all the groups"""
+import numpy as np
+import pytest
+
+from game_management.spatial_index import SpatialIndex
+from tests.test_kernels import SEEDS
+
+BUCKET_SIZES = [1, 3, 4]
+
+
+def brute_force(groups, position, condition=None):
+    """All the groups satisfying condition, sorted by distance then line by line"""
+    return sorted(((max(abs(group[0] - position[0]), abs(group[1] - position[1])), group, number)
+                   for group, number in groups.items() if condition is None or condition(group, number)),
+                  key=lambda neighbour: (neighbour[0], neighbour[1][1], neighbour[1][0]))
+
+
+def random_groups(rng: np.random.Generator, n=12, m=15):
+    cells = rng.permutation(n * m)[:int(rng.integers(1, 30))]  # dense enough for distance ties
+    return {(int(cell % m), int(cell // m)): int(rng.integers(1, 20)) for cell in cells}
+
+
+def positions(n=12, m=15):
+    return [(x, y) for y in range(-2, n + 2) for x in range(-2, m + 2)]  # outside of the groups box too
+
+
+@pytest.mark.parametrize("bucket_size", BUCKET_SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_queries_match_brute_force(seed, bucket_size):
+    rng = np.random.default_rng(seed)
+    groups = random_groups(rng)
+    index = SpatialIndex.from_groups(groups.items(), bucket_size)
+    assert len(index) == len(groups)
+    assert index.items() == sorted(groups.items(), key=lambda item: (item[0][1], item[0][0]))  # line by line
+
+    def condition(group, number):
+        return number % 2 == 0
+
+    for position in positions()[::2]:
+        expected = brute_force(groups, position)
+        for k in (1, 3, len(groups) + 1):
+            assert index.nearest(position, k) == expected[:k]
+        assert index.nearest(position, 2, condition) == brute_force(groups, position, condition)[:2]
+        for radius in (0, 1, 4):
+            assert index.within_radius(position, radius) == [neighbour for neighbour in expected
+                                                             if neighbour[0] <= radius]
+
+    targets = positions()[::7]
+    assert index.nearest_to_each(targets) == {position: brute_force(groups, position)[0] for position in targets}
+    result = index.nearest_to_each(targets, lambda group, number, position: number > position[0])
+    expected = {position: brute_force(groups, position, lambda group, number: number > position[0])
+                for position in targets}
+    assert result == {position: neighbours[0] for position, neighbours in expected.items() if neighbours}
+
+
+def test_ties_are_broken_line_by_line():
+    index = SpatialIndex.from_groups([((4, 3), 1), ((2, 1), 2), ((0, 3), 3), ((4, 1), 4), ((2, 5), 5)],
+                                     bucket_size=2)
+    assert index.nearest((2, 3), k=5) == [(2, (2, 1), 2), (2, (4, 1), 4), (2, (0, 3), 3), (2, (4, 3), 1),
+                                          (2, (2, 5), 5)]
+    assert index.within_radius((2, 3), 2) == index.nearest((2, 3), k=5)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_updates(seed):
+    rng = np.random.default_rng(seed)
+    groups = random_groups(rng)
+    index = SpatialIndex.from_groups(groups.items(), bucket_size=4)
+    for _i in range(20):
+        position = (int(rng.integers(15)), int(rng.integers(12)))
+        number = int(rng.integers(3)) * int(rng.integers(1, 20))  # often 0: removal
+        index.set(position, number)
+        if number:
+            groups[position] = number
+        else:
+            groups.pop(position, None)
+        assert (position in index) == bool(number) and index.get_number(position) == number
+        for target in positions()[::11]:
+            assert index.nearest(target, 2) == brute_force(groups, target)[:2]
+
+
+def test_empty_index():
+    index = SpatialIndex()
+    assert len(index) == 0 and index.items() == []
+    assert index.nearest((1, 1)) == [] and index.nearest((1, 1), k=3) == []
+    assert index.within_radius((1, 1), 10) == []
+    assert index.nearest_to_each([(0, 0), (2, 3)]) == {}
+
+    index.set((2, 2), 5)
+    index.set((2, 2), 0)  # back to empty
+    index.set((3, 3), 0)  # unknown group
+    assert len(index) == 0 and not index._buckets and index.nearest((2, 2)) == []
+    # no group satisfying the condition
+    index.set((1, 0), 5)
+    assert index.nearest((0, 0), condition=lambda group, number: number > 5) == []
+    assert index.nearest_to_each([(0, 0)], lambda group, number, position: False) == {}
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Territory planes against a cell by cell computation, and the territory heuristic"""
+import numpy as np
+import pytest
+
+from alphabeta.simple_heuristics import TerritoryHeuristic
+from common.models import Species
+from game_management.game_map import GameMap
+from game_management.map_helpers import get_direct_distance
+from game_management.territory import UNREACHABLE, compute_territory
+from tests.test_kernels import SEEDS, random_game_map
+
+
+@pytest.mark.parametrize("tie_species", [Species.NONE, Species.VAMPIRE])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_territory_matches_a_cell_by_cell_scan(seed, tie_species):
+    game_map = random_game_map(np.random.default_rng(seed))
+    territory = compute_territory(game_map, Species.VAMPIRE, Species.WEREWOLF, tie_species)
+    vampires = game_map.find_species_position(Species.VAMPIRE)
+    werewolves = game_map.find_species_position(Species.WEREWOLF)
+    for y in range(game_map.n):
+        for x in range(game_map.m):
+            vampire_distances = [get_direct_distance(position, (x, y)) for position in vampires]
+            werewolf_distances = [get_direct_distance(position, (x, y)) for position in werewolves]
+            assert territory.distance_1[y, x] == min(vampire_distances)
+            assert territory.distance_2[y, x] == min(werewolf_distances)
+            assert territory.closest_1[y, x] == vampire_distances.index(min(vampire_distances))  # first group
+            assert territory.closest_2[y, x] == werewolf_distances.index(min(werewolf_distances))
+            expected = (Species.VAMPIRE if min(vampire_distances) < min(werewolf_distances)
+                        else Species.WEREWOLF if min(werewolf_distances) < min(vampire_distances) else tie_species)
+            assert territory.labels[y, x] == expected
+
+
+def test_ties():
+    game_map = GameMap()
+    game_map.load_map(3, 5)
+    game_map.update([Species.VAMPIRE.to_cell((0, 1), 4), Species.WEREWOLF.to_cell((4, 1), 4)])
+    expected = np.array([[1, 1, 3, 2, 2]] * 3)
+    assert np.array_equal(compute_territory(game_map, Species.VAMPIRE, Species.WEREWOLF).labels, expected)
+    expected[:, 2] = Species.WEREWOLF
+    assert np.array_equal(compute_territory(game_map, Species.VAMPIRE, Species.WEREWOLF, Species.WEREWOLF).labels,
+                          expected)
+
+
+def test_unreachable_cells():
+    game_map = GameMap()
+    game_map.load_map(3, 4)
+    game_map.update([Species.VAMPIRE.to_cell((1, 1), 4), Species.HUMAN.to_cell((3, 2), 2)])
+    territory = compute_territory(game_map, Species.VAMPIRE, Species.WEREWOLF, Species.WEREWOLF)
+    assert (territory.labels == Species.VAMPIRE).all()
+    assert (territory.distance_2 == UNREACHABLE).all() and (territory.closest_2 == -1).all()
+    assert territory.distance_1.max() == 2 and (territory.closest_1 == 0).all()
+
+    game_map.update([Species.VAMPIRE.to_cell((1, 1), 0)])  # no group at all
+    territory = compute_territory(game_map, Species.VAMPIRE, Species.WEREWOLF, Species.WEREWOLF)
+    assert (territory.labels == Species.NONE).all()
+    assert (territory.distance_1 == UNREACHABLE).all() and (territory.closest_1 == -1).all()
+
+
+def test_territory_heuristic():
+    game_map = GameMap()
+    game_map.load_map(3, 5)
+    game_map.update([Species.VAMPIRE.to_cell((0, 1), 4), Species.WEREWOLF.to_cell((4, 1), 6),
+                     Species.HUMAN.to_cell((1, 0), 5), Species.HUMAN.to_cell((2, 2), 3),  # tie: nobody's
+                     Species.HUMAN.to_cell((3, 0), 1)])
+    heuristic = TerritoryHeuristic()
+    assert heuristic.evaluate(game_map, Species.VAMPIRE) == (4 + 5) - (6 + 1)
+    assert heuristic.evaluate(game_map, Species.WEREWOLF) == (6 + 1) - (4 + 5)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Equivalence tests between the transition kernel and the former per-move algorithms of the server and the search"""
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from battle_computer.battle_computer import BattleComputer
+from battle_computer.battle_policies import EXPECTATION, MINMAX
+from common.models import Species
+from game_management.board_snapshot import BoardSnapshot
+from game_management.compact_game_map import CompactGameMap
+from game_management.game_map import GameMap, compute_new_board_after_moves
+from game_management.sparse_game_map import SparseGameMap
+from game_management.transition import compute_transition, to_updates
+from tests.test_kernels import SEEDS, random_game_map
+
+MAP_CLASSES = [GameMap, CompactGameMap, SparseGameMap, BoardSnapshot]
+
+
+def minmax_fight(species: Species, number: int, target_species: Species, target_number: int):
+    if target_species in (Species.NONE, species):
+        return species, number + target_number
+    return BattleComputer((species, number), (target_species, target_number)).compute_battle_for_minmax()
+
+
+def expectation_fight(species: Species, number: int, target_species: Species, target_number: int):
+    # expected survivors are truncated: the server protocol only sends integers (floats raised TypeError)
+    result_species, result_number = BattleComputer((species, number), (target_species, target_number)
+                                                   ).compute_one_battle_result(use_expectation=True)
+    return result_species, int(result_number)
+
+
+FIGHTS = {"minmax": (MINMAX, minmax_fight), "expectation": (EXPECTATION, expectation_fight)}
+
+
+def former_server_updates(game_map, moves, fight) -> List[Tuple[int, int, int, int, int]]:
+    """Updates of the former GameMasterWorker._update_game_map (move by move bookkeeping)"""
+    species = game_map.get_cell_species(moves[0][:2])
+    ls_updates = []
+    nb_old_pos = {}
+    nb_new_pos = {}
+    for old_x, old_y, nb_move, new_x, new_y in moves:
+        previous_nb = nb_old_pos.get((old_x, old_y), game_map.get_cell_species_and_number((old_x, old_y))[1])
+        nb_old_pos[(old_x, old_y)] = previous_nb - nb_move
+        nb_new_pos[(new_x, new_y)] = nb_new_pos.get((new_x, new_y), 0) + nb_move
+    for pos, nb in nb_old_pos.items():
+        ls_updates.append(species.to_cell(pos, nb))
+    for pos, nb in nb_new_pos.items():
+        target_species, target_nb = game_map.get_cell_species_and_number(pos)
+        res_species, res_nb = fight(species, nb, target_species, target_nb)
+        ls_updates.append(res_species.to_cell(pos, res_nb))
+    return ls_updates
+
+
+def random_moves(game_map: GameMap, rng: np.random.Generator) -> List[Tuple[int, int, int, int, int]]:
+    """Valid moves of one species: several sources, splits, merges, no target being a source (rule #5)"""
+    species = Species.VAMPIRE if rng.integers(2) else Species.WEREWOLF
+    groups = game_map.find_species_position_and_number(species)
+    sources = {position: int(number) for position, number in
+               (groups[i] for i in rng.permutation(len(groups))[:rng.integers(1, 4)])}
+    moves = []
+    for (x, y), number in sources.items():
+        destinations = [destination for destination in game_map.get_possible_moves((x, y), force_move=True)
+                        if destination not in sources]
+        if not destinations:
+            continue
+        nb_moving = int(rng.integers(1, number + 1))
+        nb_splits = min(nb_moving, int(rng.integers(1, 3)))
+        for i, destination_index in enumerate(rng.permutation(len(destinations))[:nb_splits]):
+            split = nb_moving // nb_splits + (nb_moving % nb_splits if i == 0 else 0)
+            moves.append((x, y, split, *destinations[destination_index]))
+    return moves
+
+
+def small_map(updates) -> GameMap:
+    game_map = GameMap()
+    game_map.load_map(5, 5)
+    game_map.update(updates)
+    return game_map
+
+
+CASES = {
+    "empty cell": ([(0, 0, 0, 10, 0), (4, 4, 0, 0, 3)], [(0, 0, 4, 1, 1)]),
+    "merge": ([(0, 0, 0, 5, 0), (2, 0, 0, 6, 0), (4, 4, 0, 0, 3)], [(0, 0, 5, 1, 0), (2, 0, 6, 1, 0)]),
+    "merge with a group": ([(0, 0, 0, 5, 0), (1, 1, 0, 2, 0), (4, 4, 0, 0, 3)], [(0, 0, 3, 1, 1)]),
+    "split": ([(2, 2, 0, 9, 0), (4, 4, 0, 0, 3)], [(2, 2, 4, 1, 1), (2, 2, 3, 3, 3), (2, 2, 1, 2, 3)]),
+    "certain human battle": ([(0, 0, 0, 6, 0), (1, 0, 4, 0, 0), (4, 4, 0, 0, 3)], [(0, 0, 6, 1, 0)]),
+    "random human battle": ([(0, 0, 0, 3, 0), (1, 0, 5, 0, 0), (4, 4, 0, 0, 3)], [(0, 0, 3, 1, 0)]),
+    "certain enemy battle": ([(0, 0, 0, 9, 0), (1, 0, 0, 0, 6)], [(0, 0, 9, 1, 0)]),
+    "random enemy battle": ([(0, 0, 0, 7, 0), (1, 0, 0, 0, 6)], [(0, 0, 7, 1, 0)]),
+    "losing battle": ([(0, 0, 0, 2, 0), (1, 0, 0, 0, 6)], [(0, 0, 2, 1, 0)]),
+    "merged attack": ([(0, 0, 0, 4, 0), (2, 0, 0, 5, 0), (1, 1, 0, 0, 6)], [(0, 0, 4, 1, 1), (2, 0, 5, 1, 1)]),
+    "split attacks": ([(2, 2, 0, 12, 0), (1, 1, 3, 0, 0), (3, 3, 0, 0, 4), (0, 0, 0, 0, 1)],
+                      [(2, 2, 4, 1, 1), (2, 2, 8, 3, 3)]),
+}
+
+
+@pytest.mark.parametrize("fight_name", FIGHTS)
+@pytest.mark.parametrize("case", CASES)
+def test_transition_equals_former_server_algorithm(case, fight_name):
+    updates, moves = CASES[case]
+    game_map = small_map(updates)
+    battle_policy, fight = FIGHTS[fight_name]
+    assert to_updates(compute_transition(game_map, moves, battle_policy)) == former_server_updates(game_map, moves,
+                                                                                                    fight)
+
+
+@pytest.mark.parametrize("fight_name", FIGHTS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_random_transitions_equal_former_server_algorithm(seed, fight_name):
+    rng = np.random.default_rng(seed)
+    battle_policy, fight = FIGHTS[fight_name]
+    for _i in range(20):
+        game_map = random_game_map(rng)
+        moves = random_moves(game_map, rng)
+        if moves:
+            assert to_updates(compute_transition(game_map, moves, battle_policy)) \
+                == former_server_updates(game_map, moves, fight)
+
+
+@pytest.mark.parametrize("map_class", MAP_CLASSES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_apply_moves_on_all_boards(seed, map_class):
+    """Boards after a turn are the boards updated with the former server updates"""
+    rng = np.random.default_rng(seed)
+    game_map = random_game_map(rng)
+    moves = random_moves(game_map, rng)
+    board = game_map if map_class is GameMap else map_class.from_game_map(game_map)
+    expected = game_map.copy()
+    expected.update(former_server_updates(game_map, moves, minmax_fight))
+
+    new_board = compute_new_board_after_moves(board, moves)
+    for species_map in ("human_map", "vampire_map", "werewolf_map"):
+        assert np.array_equal(getattr(new_board, species_map), getattr(expected, species_map))
+    for species in (Species.HUMAN, Species.VAMPIRE, Species.WEREWOLF):
+        assert [(tuple(position), int(number)) for position, number
+                in new_board.species_position_and_number_generator(species)] \
+            == [(tuple(position), int(number)) for position, number
+                in expected.species_position_and_number_generator(species)]
+        assert new_board.count_species(species) == expected.count_species(species)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""SPSA optimizer and parameter mapping of the heuristic tuning, and a tiny headless evaluation"""
+import numpy as np
+import pytest
+
+from common.models import Species
+from game_management.board_codec import to_bytes
+from tuning.spsa import SPSA
+from tuning.tune_heuristics import (TUNING_TARGETS, Parameter, get_bounds, play_games, random_game_map,
+                                    to_params)
+
+OPTIMUM = np.array([0.5, 3.])  # second coordinate out of the bounds
+
+
+def quadratic(theta: np.ndarray) -> float:
+    return -float(np.sum((theta - OPTIMUM) ** 2))
+
+
+def make_optimizer(seed=0) -> SPSA:
+    return SPSA(initial_theta=[0., 0.], lower_bounds=[-2., -2.], upper_bounds=[2., 2.], seed=seed)
+
+
+def run(optimizer: SPSA, nb_iterations: int):
+    for _i in range(nb_iterations):
+        theta_plus, theta_minus = optimizer.ask()
+        for theta in (theta_plus, theta_minus):
+            assert ((-2 <= theta) & (theta <= 2)).all()
+        optimizer.tell(quadratic(theta_plus), quadratic(theta_minus))
+        assert ((-2 <= optimizer.theta) & (optimizer.theta <= 2)).all()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_spsa_converges_within_the_bounds(seed):
+    optimizer = make_optimizer(seed)
+    run(optimizer, 500)
+    assert optimizer.iteration == len(optimizer.history) == 500
+    assert optimizer.theta[0] == pytest.approx(OPTIMUM[0], abs=0.15)
+    assert optimizer.theta[1] == 2.  # clipped optimum
+
+
+def test_spsa_save_and_load_resume_identically(tmp_path):
+    optimizer = make_optimizer()
+    run(optimizer, 7)
+    asked = optimizer.ask()  # pending perturbation
+    path = str(tmp_path / "spsa.json")
+    optimizer.save(path)
+
+    resumed = make_optimizer(seed=123)
+    resumed.load(path)
+    assert resumed.iteration == optimizer.iteration and resumed.history == optimizer.history
+    for theta, resumed_theta in zip(asked, resumed.ask()):
+        assert np.array_equal(resumed_theta, theta)
+    for ongoing in (optimizer, resumed):
+        ongoing.tell(quadratic(asked[0]), quadratic(asked[1]))
+        run(ongoing, 5)  # random generator state restored: same perturbations
+    assert np.array_equal(resumed.theta, optimizer.theta)
+    assert resumed.history == optimizer.history
+
+
+def test_to_params_and_bounds():
+    parameters = [Parameter("a", 10, 5, 0, 100), Parameter("b", 0, 1, -10, 10)]
+    lower_bounds, upper_bounds = get_bounds(parameters)
+    assert (lower_bounds, upper_bounds) == ([-2., -10.], [18., 10.])
+    assert to_params(parameters, np.zeros(2)) == {"a": 10., "b": 0.}
+    assert to_params(parameters, np.array([1., -0.5])) == {"a": 15., "b": -0.5}
+    assert to_params(parameters, np.array(lower_bounds)) == {"a": 0., "b": -10.}
+    assert to_params(parameters, np.array(upper_bounds)) == {"a": 100., "b": 10.}
+    for ai_class, target_parameters in TUNING_TARGETS.values():
+        params = to_params(target_parameters, np.array(get_bounds(target_parameters)[0]))
+        assert params == pytest.approx({parameter.name: parameter.lower for parameter in target_parameters})
+        ai_class(**params)  # parameters accepted by the AI
+
+
+def test_play_games():
+    game_map = random_game_map(np.random.default_rng(0))
+    assert 5 <= game_map.n <= 12 and 5 <= game_map.m <= 12
+    ai_class, parameters = TUNING_TARGETS["alphabeta"]
+    ai_spec = (ai_class, to_params(parameters, np.zeros(len(parameters))))
+    result = play_games(to_bytes(game_map), ai_spec, ai_spec, Species.VAMPIRE, Species.VAMPIRE, nb_games=1, seed=0,
+                        max_rounds=10)
+    assert result in (0., 0.5, 1.)
+    assert play_games(to_bytes(game_map), ai_spec, ai_spec, Species.VAMPIRE, Species.VAMPIRE, nb_games=1, seed=0,
+                      max_rounds=10) == result
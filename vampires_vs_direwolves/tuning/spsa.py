@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+
+class SPSA:
+    """Simultaneous Perturbation Stochastic Approximation, maximizing a noisy objective.
+
+    Each iteration needs only 2 evaluations, whatever the number of parameters:
+
+    >>> optimizer = SPSA(initial_theta=[0., 0.])
+    >>> theta_plus, theta_minus = optimizer.ask()
+    >>> optimizer.tell(objective(theta_plus), objective(theta_minus))
+
+    The optimizer state (including the random generator) can be saved and reloaded to resume a tuning.
+    """
+
+    def __init__(self, initial_theta: List[float], lower_bounds: List[float] = None, upper_bounds: List[float] = None,
+                 a: float = 0.5, c: float = 0.2, big_a: float = 10, alpha: float = 0.602, gamma: float = 0.101,
+                 seed=None):
+        self.theta = np.array(initial_theta, dtype=float)
+        self._lower_bounds = np.array(lower_bounds if lower_bounds is not None else [-np.inf] * len(self.theta))
+        self._upper_bounds = np.array(upper_bounds if upper_bounds is not None else [np.inf] * len(self.theta))
+        self._a, self._c, self._big_a, self._alpha, self._gamma = a, c, big_a, alpha, gamma
+        self._rng = np.random.default_rng(seed)
+        self.iteration = 0
+        self.history = []  # (theta, f_plus, f_minus) of each iteration
+        self._delta = None
+
+    @property
+    def _c_k(self) -> float:
+        return self._c / (self.iteration + 1) ** self._gamma
+
+    def _clip(self, theta: np.ndarray) -> np.ndarray:
+        return np.clip(theta, self._lower_bounds, self._upper_bounds)
+
+    def ask(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Two perturbed parameter vectors to evaluate"""
+        if self._delta is None:
+            self._delta = self._rng.choice([-1., 1.], size=len(self.theta))
+        return self._clip(self.theta + self._c_k * self._delta), self._clip(self.theta - self._c_k * self._delta)
+
+    def tell(self, f_plus: float, f_minus: float):
+        """Update parameters with the objective values of the vectors given by `ask`"""
+        assert self._delta is not None, "ask() must be called before tell()"
+        a_k = self._a / (self.iteration + 1 + self._big_a) ** self._alpha
+        gradient = (f_plus - f_minus) / (2 * self._c_k * self._delta)
+        self.history.append((self.theta.tolist(), f_plus, f_minus))
+        self.theta = self._clip(self.theta + a_k * gradient)
+        self.iteration += 1
+        self._delta = None
+
+    def save(self, path: str):
+        state = dict(theta=self.theta.tolist(), iteration=self.iteration, history=self.history,
+                     delta=None if self._delta is None else self._delta.tolist(),
+                     rng=self._rng.bit_generator.state)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(state, file)
+        os.replace(tmp_path, path)  # a crash while saving keeps the previous checkpoint
+
+    def load(self, path: str):
+        with open(path) as file:
+            state = json.load(file)
+        self.theta = np.array(state["theta"])
+        self.iteration = state["iteration"]
+        self.history = [tuple(entry) for entry in state["history"]]  # (theta, f_plus, f_minus), as in tell
+        self._delta = None if state["delta"] is None else np.array(state["delta"])
+        self._rng.bit_generator.state = state["rng"]
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Tune heuristic parameters with SPSA, each candidate being evaluated with headless games played in parallel processes.
+The optimizer state is saved after each iteration: launching the same command again resumes the tuning.
+
+Example:
+    python -m tuning.tune_heuristics alphabeta --iterations 100 --games 32 --checkpoint logs/tuning_alphabeta.json
+"""
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, NamedTuple, Tuple, Type
+
+import numpy as np
+
+from alphabeta.abstract_possible_moves_computer import SimpleMoveComputer
+from alphabeta.alphabeta import AlphaBetaSearch
+from alphabeta.num_dist_heur import NumberAndDistanceHeuristic
+from boutchou.abstract_ai import AbstractAI
+from boutchou.alpha_beta_ai import AlphaBetaAI
+from boutchou.rules_sequence import RulesSequence
+from boutchou.rush_to_humans_ai import MoveToBestHumans
+from common.logger import logger
+from common.models import Species
+from game_management.abstract_game_map import AbstractGameMap
+from game_management.batch_simulator import BatchSimulator, ai_policy
+from game_management.board_codec import decode_game_map, to_bytes
+from game_management.game_map import GameMap
+from tuning.spsa import SPSA
+
+AISpec = Tuple[Type[AbstractAI], Dict[str, float]]
+
+
+class TunedAlphaBetaAI(AlphaBetaAI):
+    """AlphaBetaAI with the parameters of NumberAndDistanceHeuristic as arguments"""
+
+    def __init__(self, depth=3, **heuristic_params):
+        super().__init__()
+        self.search = AlphaBetaSearch(possible_moves_computer=SimpleMoveComputer,
+                                      heuristic=partial(NumberAndDistanceHeuristic, **heuristic_params),
+                                      depth=depth)
+
+
+class Parameter(NamedTuple):
+    name: str
+    initial: float
+    scale: float  # variation of the parameter for a variation of 1 in the optimizer space
+    lower: float
+    upper: float
+
+
+TUNING_TARGETS: Dict[str, Tuple[Type[AbstractAI], List[Parameter]]] = {
+    "alphabeta": (TunedAlphaBetaAI, [Parameter("num_factor", 10, 5, 0, 100),
+                                     Parameter("dist_factor", 0.1, 0.05, 0, 10),
+                                     Parameter("opponent_distance_factor", 0.001, 0.001, 0, 1)]),
+    "best_humans": (MoveToBestHumans, [Parameter("coef_distance", 0, 1, -10, 10),
+                                       Parameter("coef_number", 0, 1, -10, 10)]),
+}
+
+
+def to_params(parameters: List[Parameter], theta: np.ndarray) -> Dict[str, float]:
+    return {parameter.name: float(parameter.initial + parameter.scale * value)
+            for parameter, value in zip(parameters, theta)}
+
+
+def get_bounds(parameters: List[Parameter]) -> Tuple[List[float], List[float]]:
+    """Lower and upper bounds of the parameters in the optimizer space (inverse of to_params)"""
+    return ([(parameter.lower - parameter.initial) / parameter.scale for parameter in parameters],
+            [(parameter.upper - parameter.initial) / parameter.scale for parameter in parameters])
+
+
+def random_game_map(rng: np.random.Generator) -> GameMap:
+    """Random map with one group per species (same number) and a few human houses"""
+    n, m = (int(value) for value in rng.integers(5, 13, size=2))
+    cells = rng.permutation(n * m)[:int(rng.integers(4, 12))]
+    nb_monsters = int(rng.integers(4, 16))
+    updates = []
+    for i, cell in enumerate(cells):
+        species = (Species.VAMPIRE, Species.WEREWOLF)[i] if i < 2 else Species.HUMAN
+        updates.append(species.to_cell((int(cell % m), int(cell // m)),
+                                       nb_monsters if i < 2 else int(rng.integers(1, 10))))
+    game_map = GameMap()
+    game_map.load_map(n, m)
+    game_map.update(updates)
+    return game_map
+
+
+def _init_worker():
+    RulesSequence.wait_time = 0  # headless games: no need to wait
+
+
+def play_games(board: bytes, candidate: AISpec, opponent: AISpec, candidate_species: Species,
+               starting_species: Species, nb_games: int, seed: int, max_rounds: int) -> float:
+    """Play headless games on a board, and return the sum of candidate results (1 for a victory, 0.5 for a draw)"""
+    random.seed(seed)  # rules use the random module
+    game_map = decode_game_map(board)
+    simulator = BatchSimulator.from_game_map(game_map, nb_games, seed=seed)
+    winners = simulator.run({candidate_species: ai_policy(candidate[0], **candidate[1]),
+                             candidate_species.get_opposite_species(): ai_policy(opponent[0], **opponent[1])},
+                            starting_species=starting_species, max_rounds=max_rounds)
+    return float(np.sum(winners == candidate_species) + 0.5 * np.sum(winners == Species.NONE))
+
+
+def evaluate_candidates(executor: ProcessPoolExecutor, candidates: List[AISpec], opponent: AISpec,
+                        game_maps: List[AbstractGameMap], nb_games: int, seed: int, max_rounds: int) -> List[float]:
+    """Score (between 0 and 1) of each candidate against the opponent.
+
+    All the candidates play the same games (same maps and seeds), split in tasks run in parallel:
+    one per map, candidate species and starting species.
+    """
+    nb_tasks_per_candidate = 4 * len(game_maps)
+    nb_games_per_task = max(1, nb_games // nb_tasks_per_candidate)
+    futures = []
+    for candidate in candidates:
+        futures.append([])
+        for i, game_map in enumerate(game_maps):
+            for candidate_species in (Species.VAMPIRE, Species.WEREWOLF):
+                for starting_species in (Species.VAMPIRE, Species.WEREWOLF):
+                    task_seed = seed + 4 * i + 2 * int(candidate_species) + int(starting_species)
+                    futures[-1].append(executor.submit(play_games, to_bytes(game_map), candidate, opponent,
+                                                       candidate_species, starting_species, nb_games_per_task,
+                                                       task_seed, max_rounds))
+    return [sum(future.result() for future in candidate_futures) / (nb_tasks_per_candidate * nb_games_per_task)
+            for candidate_futures in futures]
+
+
+def tune(target: str, nb_iterations: int, nb_games: int, checkpoint: str, nb_processes: int = None, seed: int = 0,
+         max_rounds: int = 100, map_paths: List[str] = None):
+    ai_class, parameters = TUNING_TARGETS[target]
+    lower_bounds, upper_bounds = get_bounds(parameters)
+    optimizer = SPSA(initial_theta=[0.] * len(parameters), lower_bounds=lower_bounds, upper_bounds=upper_bounds,
+                     seed=seed)
+    if checkpoint and os.path.isfile(checkpoint):
+        optimizer.load(checkpoint)
+        logger.info(f"Tuning resumed from {checkpoint} at iteration {optimizer.iteration}")
+
+    opponent = (ai_class, to_params(parameters, np.zeros(len(parameters))))  # default parameters
+    with ProcessPoolExecutor(max_workers=nb_processes, initializer=_init_worker) as executor:
+        while optimizer.iteration < nb_iterations:
+            # new maps and seeds at each iteration, common to both candidates
+            rng = np.random.default_rng([seed, optimizer.iteration])
+            if map_paths:
+                game_maps = []
+                for path in map_paths:
+                    n, m, updates = GameMap.get_map_param_from_file(path)
+                    game_maps.append(GameMap())
+                    game_maps[-1].load_map(n, m)
+                    game_maps[-1].update(updates)
+            else:
+                game_maps = [random_game_map(rng) for _ in range(2)]
+            theta_plus, theta_minus = optimizer.ask()
+            f_plus, f_minus = evaluate_candidates(
+                executor, [(ai_class, to_params(parameters, theta)) for theta in (theta_plus, theta_minus)],
+                opponent, game_maps, nb_games, seed=int(rng.integers(2 ** 31)), max_rounds=max_rounds)
+            optimizer.tell(f_plus, f_minus)
+            if checkpoint:
+                optimizer.save(checkpoint)
+            logger.info(f"Tuning {target} #{optimizer.iteration}: scores {f_plus:.3f} / {f_minus:.3f}, "
+                        f"parameters {to_params(parameters, optimizer.theta)}")
+    return to_params(parameters, optimizer.theta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", choices=sorted(TUNING_TARGETS))
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--games", type=int, default=32, help="number of games per candidate evaluation")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default="", help="JSON file of the optimizer state, to resume the tuning")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-rounds", type=int, default=100)
+    parser.add_argument("--maps", nargs="*", help="XML map paths (default: random maps)")
+    args = parser.parse_args()
+    params = tune(args.target, args.iterations, args.games, args.checkpoint, args.processes, args.seed,
+                  args.max_rounds, args.maps)
+    print(f"Tuned parameters: {params}")
+
+
+if __name__ == '__main__':
+    main()